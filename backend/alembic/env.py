@@ -17,6 +17,8 @@ from app.models.tenant import Tenant
 from app.models.financial import Revenue, Expense, BudgetExecution
 from app.models.esic import ESICRequest, ESICStatistics
 from app.models.contract import Supplier, Bidding, Contract, ContractAmendment
+from app.models.dataset import DatasetVersion, DashboardSnapshot, OpenDataSnapshot, ArchivedYear
+from app.models.search import SearchOutbox
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,70 @@
+"""esic statistics rollup
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables are created by the application on first start; nothing to do before that
+    if not sa.inspect(op.get_bind()).has_table("esic_statistics"):
+        return
+
+    op.execute(
+        "ALTER TABLE esic_statistics "
+        "ADD COLUMN IF NOT EXISTS total_response_seconds BIGINT NOT NULL DEFAULT 0"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_esic_statistics_tenant_period "
+        "ON esic_statistics (tenant_id, year, month)"
+    )
+
+    # Backfill the rollup from the existing requests
+    op.execute("DELETE FROM esic_statistics")
+    op.execute("""
+        INSERT INTO esic_statistics (
+            tenant_id, year, month,
+            total_requests, answered_requests, overdue_requests, appealed_requests,
+            total_response_seconds, avg_response_time,
+            financial_requests, contracts_requests, personnel_requests, other_requests,
+            is_deleted
+        )
+        SELECT
+            tenant_id,
+            EXTRACT(year FROM timezone('UTC', request_date)),
+            EXTRACT(month FROM timezone('UTC', request_date)),
+            count(*),
+            count(*) FILTER (WHERE response_date IS NOT NULL),
+            count(*) FILTER (WHERE response_date::date > due_date),
+            count(*) FILTER (WHERE has_appeal),
+            coalesce(sum(EXTRACT(epoch FROM response_date - request_date))
+                FILTER (WHERE response_date IS NOT NULL), 0),
+            coalesce(floor(avg(EXTRACT(epoch FROM response_date - request_date))
+                FILTER (WHERE response_date IS NOT NULL) / 86400), 0),
+            count(*) FILTER (WHERE category = 'FINANCIAL'),
+            count(*) FILTER (WHERE category = 'CONTRACTS'),
+            count(*) FILTER (WHERE category = 'PERSONNEL'),
+            count(*) FILTER (WHERE category NOT IN ('FINANCIAL', 'CONTRACTS', 'PERSONNEL')),
+            false
+        FROM esic_requests
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("esic_statistics"):
+        return
+
+    op.execute("DROP INDEX IF EXISTS uq_esic_statistics_tenant_period")
+    op.execute("ALTER TABLE esic_statistics DROP COLUMN IF EXISTS total_response_seconds")
@@ -0,0 +1,59 @@
+"""full-text search vectors
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+# table -> (column, weight) pairs of its search vector
+SEARCH_VECTORS = {
+    "revenues": [("description", "A"), ("source", "B")],
+    "expenses": [("description", "A"), ("beneficiary_name", "B")],
+    "contracts": [("object", "A"), ("description", "B")],
+    "biddings": [("object", "A"), ("description", "B")],
+}
+
+
+def _vector_sql(columns) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('portuguese'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in SEARCH_VECTORS.items():
+        # Tables are created by the application on first start; nothing to do before that
+        if not inspector.has_table(table):
+            continue
+
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({_vector_sql(columns)}) STORED"
+        )
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector "
+            f"ON {table} USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in SEARCH_VECTORS:
+        if not inspector.has_table(table):
+            continue
+
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
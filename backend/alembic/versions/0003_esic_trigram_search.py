@@ -0,0 +1,50 @@
+"""esic trigram search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables are created by the application on first start; nothing to do before that
+    if not sa.inspect(op.get_bind()).has_table("esic_requests"):
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "ALTER TABLE esic_requests "
+        "ADD COLUMN IF NOT EXISTS is_public BOOLEAN NOT NULL DEFAULT false"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_esic_requests_protocol_pattern "
+        "ON esic_requests (protocol text_pattern_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_esic_requests_subject_trgm "
+        "ON esic_requests USING gin (subject gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_esic_requests_description_trgm "
+        "ON esic_requests USING gin (description gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("esic_requests"):
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_esic_requests_description_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_esic_requests_subject_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_esic_requests_protocol_pattern")
+    op.execute("ALTER TABLE esic_requests DROP COLUMN IF EXISTS is_public")
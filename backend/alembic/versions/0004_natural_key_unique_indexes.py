@@ -0,0 +1,38 @@
+"""natural key unique indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# table -> (index, columns)
+NATURAL_KEYS = {
+    "expenses": ("uq_expenses_natural_key", "tenant_id, process_number, expense_type"),
+    "contracts": ("uq_contracts_natural_key", "tenant_id, number, year"),
+    "biddings": ("uq_biddings_natural_key", "tenant_id, number, year"),
+}
+
+
+def upgrade() -> None:
+    # Fails if a tenant already has duplicate natural keys; those must be merged by hand first
+    inspector = sa.inspect(op.get_bind())
+    for table, (index, columns) in NATURAL_KEYS.items():
+        # Tables are created by the application on first start; nothing to do before that
+        if not inspector.has_table(table):
+            continue
+        op.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({columns})")
+
+
+def downgrade() -> None:
+    for index, _ in NATURAL_KEYS.values():
+        op.execute(f"DROP INDEX IF EXISTS {index}")
@@ -0,0 +1,48 @@
+"""financial period columns
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TABLES = ("revenues", "expenses")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        # Tables are created by the application on first start; nothing to do before that
+        if not inspector.has_table(table):
+            continue
+
+        # Adding a stored generated column rewrites the table
+        for field in ("year", "month"):
+            op.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {field} integer "
+                f"GENERATED ALWAYS AS (EXTRACT({field} FROM date)::integer) STORED"
+            )
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_period "
+            f"ON {table} (tenant_id, year, month, category)"
+        )
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_period")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS month")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS year")
@@ -0,0 +1,58 @@
+"""tenant listing indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# index -> (table, definition)
+INDEXES = {
+    "ix_contracts_tenant_status_created": ("contracts", "(tenant_id, status, created_at DESC, id DESC) WHERE is_deleted = false"),
+    "ix_biddings_tenant_status_created": ("biddings", "(tenant_id, status, created_at DESC, id DESC) WHERE is_deleted = false"),
+    "ix_esic_requests_tenant_status_created": ("esic_requests", "(tenant_id, status, created_at DESC, id DESC) WHERE is_deleted = false"),
+    "ix_esic_requests_public": ("esic_requests", "(tenant_id, created_at DESC, id DESC) WHERE is_public AND is_deleted = false"),
+    "ix_revenues_tenant_date": ("revenues", "(tenant_id, date DESC, id DESC) WHERE is_deleted = false"),
+    "ix_expenses_tenant_date": ("expenses", "(tenant_id, date DESC, id DESC) WHERE is_deleted = false"),
+}
+
+
+def _invalid_index(bind, index: str) -> bool:
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index behind
+    return bind.execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :index AND NOT i.indisvalid"
+        ),
+        {"index": index}
+    ).first() is not None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # CONCURRENTLY builds without blocking writes, but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for index, (table, definition) in INDEXES.items():
+            # Tables are created by the application on first start; nothing to do before that
+            if not inspector.has_table(table):
+                continue
+
+            if _invalid_index(bind, index):
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
@@ -0,0 +1,141 @@
+"""partition financial tables by fiscal year
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 19:00:00.000000
+
+The existing table becomes the default partition of a new table
+partitioned by RANGE (date), so no row is copied here. The plain
+indexes are attached as they are, but the primary key becomes
+(id, date) and the expense natural key gains date, which the old table
+has no index for: ATTACH builds both over the existing rows, under an
+ACCESS EXCLUSIVE lock, so run this off peak on large tables. Historical
+years are then moved out of the default partition, in batches and off
+peak, by `python manage_partitions.py split`; the scheduled
+partitions.ensure task only pre-creates empty partitions of the current
+and coming years.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# table -> index -> definition, as of the partitioned models
+INDEXES = {
+    "revenues": {
+        "ix_revenues_id": "(id)",
+        "ix_revenues_tenant_id": "(tenant_id)",
+        "ix_revenues_search_vector": "USING gin (search_vector)",
+        "ix_revenues_period": "(tenant_id, year, month, category)",
+        "ix_revenues_tenant_date": "(tenant_id, date DESC, id DESC) WHERE is_deleted = false",
+    },
+    "expenses": {
+        "ix_expenses_id": "(id)",
+        "ix_expenses_tenant_id": "(tenant_id)",
+        "ix_expenses_search_vector": "USING gin (search_vector)",
+        "ix_expenses_period": "(tenant_id, year, month, category)",
+        "ix_expenses_tenant_date": "(tenant_id, date DESC, id DESC) WHERE is_deleted = false",
+    },
+}
+
+# Natural keys: unique indexes of a partitioned table must include the partition key
+UNIQUE_INDEXES = {
+    "expenses": ("uq_expenses_natural_key", "tenant_id, process_number, expense_type"),
+}
+
+FOREIGN_KEYS = {
+    "revenues": ["FOREIGN KEY (tenant_id) REFERENCES tenants (id)"],
+    "expenses": [
+        "FOREIGN KEY (tenant_id) REFERENCES tenants (id)",
+        "FOREIGN KEY (contract_id) REFERENCES contracts (id)",
+    ],
+}
+
+
+def _relkind(bind, table: str):
+    return bind.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table}
+    ).scalar()
+
+
+def _index_names(bind, table: str):
+    return bind.execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"),
+        {"table": table}
+    ).scalars().all()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table, indexes in INDEXES.items():
+        # Tables are created by the application on first start (already partitioned); nothing to do then
+        if _relkind(bind, table) != "r":
+            continue
+
+        default = f"{table}_default"
+        # Free the index names for the partitioned table; equivalent indexes are attached, not rebuilt
+        # (the primary key and natural key change shape, so those two are built on ATTACH)
+        for index in _index_names(bind, table):
+            op.execute(f"ALTER INDEX {index} RENAME TO {index}_default")
+        if table in UNIQUE_INDEXES:
+            # The old natural key (without date) would be stricter than the new one
+            op.execute(f"DROP INDEX IF EXISTS {UNIQUE_INDEXES[table][0]}_default")
+        op.execute(f"ALTER TABLE {table} RENAME TO {default}")
+
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {default} INCLUDING DEFAULTS INCLUDING GENERATED) "
+            f"PARTITION BY RANGE (date)"
+        )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, date)")
+        for foreign_key in FOREIGN_KEYS[table]:
+            op.execute(f"ALTER TABLE {table} ADD {foreign_key}")
+        for index, definition in indexes.items():
+            op.execute(f"CREATE INDEX {index} ON {table} {definition}")
+        if table in UNIQUE_INDEXES:
+            index, columns = UNIQUE_INDEXES[table]
+            op.execute(f"CREATE UNIQUE INDEX {index} ON {table} ({columns}, date)")
+
+        op.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table, indexes in INDEXES.items():
+        if _relkind(bind, table) != "p":
+            continue
+
+        partitioned = f"{table}_partitioned"
+        for index in _index_names(bind, table):
+            op.execute(f"ALTER INDEX {index} RENAME TO {index}_partitioned")
+        op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+
+        op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING GENERATED)")
+        columns = ", ".join(bind.execute(
+            sa.text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :table AND is_generated = 'NEVER' "
+                "ORDER BY ordinal_position"
+            ),
+            {"table": table}
+        ).scalars().all())
+        op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {partitioned}")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        # Drops every attached partition; detached years are left alone
+        op.execute(f"DROP TABLE {partitioned} CASCADE")
+
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+        for foreign_key in FOREIGN_KEYS[table]:
+            op.execute(f"ALTER TABLE {table} ADD {foreign_key}")
+        for index, definition in indexes.items():
+            op.execute(f"CREATE INDEX {index} ON {table} {definition}")
+        if table in UNIQUE_INDEXES:
+            index, columns = UNIQUE_INDEXES[table]
+            op.execute(f"CREATE UNIQUE INDEX {index} ON {table} ({columns})")
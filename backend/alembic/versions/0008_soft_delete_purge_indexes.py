@@ -0,0 +1,118 @@
+"""soft delete purge indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 21:00:00.000000
+
+Every soft-delete table gets a partial index of its deleted rows by
+deleted_at, which the purge job scans. Rows deleted before deleted_at was
+set get their last update as deletion time, so they are purged too.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+TABLES = [
+    "suppliers", "biddings", "contracts", "contract_amendments",
+    "revenues", "expenses", "budget_executions",
+    "esic_requests", "esic_attachments", "esic_statistics",
+]
+
+DEFINITION = "(deleted_at) WHERE is_deleted"
+
+
+def _index(table: str) -> str:
+    return f"ix_{table}_deleted_at"
+
+
+def _relkind(bind, table: str):
+    return bind.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table}
+    ).scalar()
+
+
+def _partitions(bind, table: str):
+    return bind.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+        ),
+        {"table": table}
+    ).scalars().all()
+
+
+def _index_exists(bind, index: str) -> bool:
+    return bind.execute(sa.text("SELECT to_regclass(:index) IS NOT NULL"), {"index": index}).scalar()
+
+
+def _is_attached(bind, index: str) -> bool:
+    return bind.execute(
+        sa.text("SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:index)"),
+        {"index": index}
+    ).first() is not None
+
+
+def _invalid_index(bind, index: str) -> bool:
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index behind
+    return bind.execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :index AND NOT i.indisvalid"
+        ),
+        {"index": index}
+    ).first() is not None
+
+
+def _create_index(bind, table: str) -> None:
+    index = _index(table)
+    if _relkind(bind, table) == "p":
+        # Complete already (e.g. created with the table, partition indexes included)
+        if _index_exists(bind, index) and not _invalid_index(bind, index):
+            return
+        # A partitioned table cannot be indexed concurrently: create the parent
+        # index ON ONLY (invalid until complete), build each partition's index
+        # concurrently and attach it
+        op.execute(f"CREATE INDEX IF NOT EXISTS {index} ON ONLY {table} {DEFINITION}")
+        for partition in _partitions(bind, table):
+            _create_index(bind, partition)
+            if not _is_attached(bind, _index(partition)):
+                op.execute(f"ALTER INDEX {index} ATTACH PARTITION {_index(partition)}")
+        return
+
+    if _invalid_index(bind, index):
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} {DEFINITION}")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # Tables are created by the application on first start; nothing to do before that
+    tables = [table for table in TABLES if inspector.has_table(table)]
+
+    for table in tables:
+        op.execute(f"UPDATE {table} SET deleted_at = updated_at WHERE is_deleted AND deleted_at IS NULL")
+
+    # CONCURRENTLY builds without blocking writes, but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for table in tables:
+            _create_index(bind, table)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            if _relkind(bind, table) == "p":
+                # Dropping the parent index drops the attached partition indexes
+                op.execute(f"DROP INDEX IF EXISTS {_index(table)}")
+            else:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_index(table)}")
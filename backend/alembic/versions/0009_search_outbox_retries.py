@@ -0,0 +1,37 @@
+"""search outbox retries
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # Tables are created by the application on first start; nothing to do before that
+    if not inspector.has_table("search_outbox"):
+        return
+
+    op.execute("ALTER TABLE search_outbox ADD COLUMN IF NOT EXISTS attempts integer NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE search_outbox ADD COLUMN IF NOT EXISTS last_error text")
+    op.execute("ALTER TABLE search_outbox ADD COLUMN IF NOT EXISTS next_attempt_at timestamp with time zone")
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("search_outbox"):
+        return
+
+    op.execute("ALTER TABLE search_outbox DROP COLUMN IF EXISTS next_attempt_at")
+    op.execute("ALTER TABLE search_outbox DROP COLUMN IF EXISTS last_error")
+    op.execute("ALTER TABLE search_outbox DROP COLUMN IF EXISTS attempts")
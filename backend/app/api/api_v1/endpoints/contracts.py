@@ -1,8 +1,9 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_active_user, get_tenant_access
+from app.core.pagination import set_next_cursor
 from app.models.user import User
 from app.schemas.contract import (
     ContractCreate, 
@@ -10,8 +11,11 @@ from app.schemas.contract import (
     ContractResponse, 
     BiddingCreate, 
     BiddingUpdate, 
-    BiddingResponse
+    BiddingResponse,
+    ContractBatch,
+    BiddingBatch
 )
+from app.schemas.batch import BatchResponse
 from app.services.contract_service import ContractService
 
 router = APIRouter()
@@ -34,9 +38,11 @@ def create_contract(
 
 @router.get("/", response_model=List[ContractResponse])
 def list_contracts(
+    response: Response,
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     year: Optional[int] = Query(None),
     category: Optional[str] = Query(None),
@@ -55,8 +61,10 @@ def list_contracts(
         limit=limit,
         status=status,
         year=year,
-        category=category
+        category=category,
+        cursor=cursor
     )
+    set_next_cursor(response, contracts, contract_service.CONTRACT_KEYSET, limit)
     return contracts
 
 @router.get("/{contract_id}", response_model=ContractResponse)
@@ -113,6 +121,20 @@ def delete_contract(
     contract_service.delete_contract(db=db, contract_id=contract_id)
     return {"message": "Contract deleted successfully"}
 
+@router.post(":batch", response_model=BatchResponse)
+def batch_contracts(
+    batch: ContractBatch,
+    tenant_id: int = Query(...),
+    upsert: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create, update and delete contracts in one transaction (with upsert, creates match existing contracts by number/year)"""
+    # Check tenant access
+    get_tenant_access(tenant_id=tenant_id, current_user=current_user, db=db)
+    
+    return contract_service.batch_contracts(db=db, tenant_id=tenant_id, batch=batch, upsert=upsert)
+
 # Bidding endpoints
 @router.post("/biddings", response_model=BiddingResponse)
 def create_bidding(
@@ -130,9 +152,11 @@ def create_bidding(
 
 @router.get("/biddings", response_model=List[BiddingResponse])
 def list_biddings(
+    response: Response,
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     year: Optional[int] = Query(None),
     modality: Optional[str] = Query(None),
@@ -151,8 +175,10 @@ def list_biddings(
         limit=limit,
         status=status,
         year=year,
-        modality=modality
+        modality=modality,
+        cursor=cursor
     )
+    set_next_cursor(response, biddings, contract_service.BIDDING_KEYSET, limit)
     return biddings
 
 @router.get("/biddings/{bidding_id}", response_model=BiddingResponse)
@@ -209,12 +235,28 @@ def delete_bidding(
     contract_service.delete_bidding(db=db, bidding_id=bidding_id)
     return {"message": "Bidding deleted successfully"}
 
+@router.post("/biddings:batch", response_model=BatchResponse)
+def batch_biddings(
+    batch: BiddingBatch,
+    tenant_id: int = Query(...),
+    upsert: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create, update and delete biddings in one transaction (with upsert, creates match existing biddings by number/year)"""
+    # Check tenant access
+    get_tenant_access(tenant_id=tenant_id, current_user=current_user, db=db)
+    
+    return contract_service.batch_biddings(db=db, tenant_id=tenant_id, batch=batch, upsert=upsert)
+
 # Public endpoints
 @router.get("/public/contracts", response_model=List[ContractResponse])
 def get_public_contracts(
+    response: Response,
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
@@ -225,15 +267,19 @@ def get_public_contracts(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
-        status=status
+        status=status,
+        cursor=cursor
     )
+    set_next_cursor(response, contracts, contract_service.CONTRACT_KEYSET, limit)
     return contracts
 
 @router.get("/public/biddings", response_model=List[BiddingResponse])
 def get_public_biddings(
+    response: Response,
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
@@ -244,6 +290,8 @@ def get_public_biddings(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
-        status=status
+        status=status,
+        cursor=cursor
     )
+    set_next_cursor(response, biddings, contract_service.BIDDING_KEYSET, limit)
     return biddings
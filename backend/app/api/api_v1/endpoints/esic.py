@@ -1,8 +1,9 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_active_user, get_tenant_access
+from app.core.pagination import set_next_cursor
 from app.models.user import User
 from app.models.esic import ESICRequest, ESICAttachment
 from app.schemas.esic import (
@@ -34,9 +35,11 @@ def create_esic_request(
 
 @router.get("/requests", response_model=List[ESICRequestResponse])
 def list_esic_requests(
+    response: Response,
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -51,8 +54,10 @@ def list_esic_requests(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
-        status=status
+        status=status,
+        cursor=cursor
     )
+    set_next_cursor(response, requests, esic_service.REQUEST_KEYSET, limit)
     return requests
 
 @router.get("/requests/{request_id}", response_model=ESICRequestResponse)
@@ -72,9 +77,11 @@ def get_esic_request(
 
 @router.get("/public", response_model=List[ESICRequestResponse])
 def search_public_requests(
+    response: Response,
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     query: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
@@ -85,8 +92,14 @@ def search_public_requests(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
-        query=query
+        query=query,
+        cursor=cursor,
+        with_total=False
     )
+    
+    # Similarity-ranked text searches are paged with skip, not cursors
+    if not query or esic_service.protocol_prefix(query):
+        set_next_cursor(response, results, esic_service.REQUEST_KEYSET, limit)
     return results
 
 @router.put("/requests/{request_id}", response_model=ESICRequestResponse)
@@ -1,19 +1,24 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Path, Response, UploadFile, status
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.pagination import set_next_cursor
 from app.models.user import User
 from app.models.financial import Revenue, Expense
 from app.schemas.financial import (
     RevenueCreate, RevenueUpdate, RevenueResponse, 
     ExpenseCreate, ExpenseUpdate, ExpenseResponse,
-    FinancialSummary
+    FinancialSummary, ImportResult, RevenueBatch, ExpenseBatch
 )
+from app.schemas.batch import BatchResponse
+from app.core.config import settings
 from app.services.financial_service import FinancialService
+from app.services.import_service import FinancialImportService
 
 router = APIRouter()
 financial_service = FinancialService()
+import_service = FinancialImportService()
 
 # Revenue endpoints
 @router.post("/revenues", response_model=RevenueResponse, status_code=status.HTTP_201_CREATED)
@@ -34,10 +39,12 @@ def create_revenue(
 
 @router.get("/revenues", response_model=List[RevenueResponse])
 def list_revenues(
+    response: Response,
     db: Session = Depends(deps.get_db),
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     year: Optional[int] = Query(None),
     month: Optional[int] = Query(None),
     category: Optional[str] = Query(None),
@@ -45,6 +52,8 @@ def list_revenues(
 ) -> Any:
     """
     List revenue records.
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
     """
     # Check tenant access
     deps.get_tenant_access(tenant_id=tenant_id, current_user=current_user)
@@ -56,8 +65,10 @@ def list_revenues(
         limit=limit,
         year=year,
         month=month,
-        category=category
+        category=category,
+        cursor=cursor
     )
+    set_next_cursor(response, revenues, financial_service.REVENUE_KEYSET, limit)
     return revenues
 
 @router.get("/revenues/{revenue_id}", response_model=RevenueResponse)
@@ -137,10 +148,12 @@ def create_expense(
 
 @router.get("/expenses", response_model=List[ExpenseResponse])
 def list_expenses(
+    response: Response,
     db: Session = Depends(deps.get_db),
     tenant_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     year: Optional[int] = Query(None),
     month: Optional[int] = Query(None),
     category: Optional[str] = Query(None),
@@ -148,6 +161,8 @@ def list_expenses(
 ) -> Any:
     """
     List expense records.
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
     """
     # Check tenant access
     deps.get_tenant_access(tenant_id=tenant_id, current_user=current_user)
@@ -159,8 +174,10 @@ def list_expenses(
         limit=limit,
         year=year,
         month=month,
-        category=category
+        category=category,
+        cursor=cursor
     )
+    set_next_cursor(response, expenses, financial_service.EXPENSE_KEYSET, limit)
     return expenses
 
 @router.get("/expenses/{expense_id}", response_model=ExpenseResponse)
@@ -221,6 +238,47 @@ def delete_expense(
     financial_service.delete_expense(db=db, expense_id=expense_id)
     return expense
 
+# Batch endpoints
+@router.post("/revenues:batch", response_model=BatchResponse)
+def batch_revenues(
+    *,
+    db: Session = Depends(deps.get_db),
+    tenant_id: int = Query(...),
+    batch: RevenueBatch,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Create, update and delete revenue records in one transaction.
+    
+    Returns one result per item, with the status it would have had as a
+    single request.
+    """
+    # Check tenant access
+    deps.get_tenant_access(tenant_id=tenant_id, current_user=current_user)
+    
+    return financial_service.batch_revenues(db=db, tenant_id=tenant_id, batch=batch)
+
+@router.post("/expenses:batch", response_model=BatchResponse)
+def batch_expenses(
+    *,
+    db: Session = Depends(deps.get_db),
+    tenant_id: int = Query(...),
+    upsert: bool = Query(False),
+    batch: ExpenseBatch,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Create, update and delete expense records in one transaction.
+    
+    With `upsert`, a created item whose process number and expense type
+    already exist updates that record instead. Returns one result per item,
+    with the status it would have had as a single request.
+    """
+    # Check tenant access
+    deps.get_tenant_access(tenant_id=tenant_id, current_user=current_user)
+    
+    return financial_service.batch_expenses(db=db, tenant_id=tenant_id, batch=batch, upsert=upsert)
+
 # Summary endpoint
 @router.get("/summary", response_model=FinancialSummary)
 def get_financial_summary(
@@ -237,3 +295,46 @@ def get_financial_summary(
     
     summary = financial_service.get_financial_summary(db=db, tenant_id=tenant_id, year=year)
     return summary
+
+# Bulk import endpoint
+@router.post("/{dataset}/import", response_model=ImportResult)
+def import_financial_file(
+    *,
+    db: Session = Depends(deps.get_db),
+    dataset: str = Path(..., pattern="^(revenues|expenses)$"),
+    tenant_id: int = Query(...),
+    upsert: bool = Query(False),
+    file: UploadFile = File(...),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Import revenue or expense records from a CSV or XLSX file.
+    
+    Valid rows are loaded in one transaction; rejected rows are listed
+    with their line number in the file. With `upsert`, expenses whose
+    process number and expense type already exist are updated instead.
+    """
+    # Check tenant access
+    deps.get_tenant_access(tenant_id=tenant_id, current_user=current_user)
+    
+    # Check file
+    if file.content_type not in settings.ALLOWED_FILE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed: {file.content_type}"
+        )
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large"
+        )
+    
+    result = import_service.import_file(
+        db=db,
+        tenant_id=tenant_id,
+        dataset=dataset,
+        file=file.file,
+        filename=file.filename or "",
+        upsert=upsert
+    )
+    return result
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.tenant_cache import tenant_domain_index
+from app.services.tenant_service import TenantService
+
+logger = logging.getLogger(__name__)
+
+class TenantHostMiddleware:
+    """
+    Resolve the tenant from the Host header and expose it as request.state.tenant.
+    
+    Lookups go to the in-memory TenantDomainIndex; the database is only
+    read when the index has to be (re)loaded. Requests to
+    {API_V1_STR}/public/portal/... on a tenant host are rewritten to the
+    matching /public/tenant/{slug}/... route, so portals served on their
+    own domain do not need the slug in the URL.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.portal_prefix = f"{settings.API_V1_STR}/public/portal"
+        self.tenant_prefix = f"{settings.API_V1_STR}/public/tenant"
+        self._refresh_lock = asyncio.Lock()
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        if tenant_domain_index.needs_refresh:
+            await self._refresh_index()
+        
+        tenant = tenant_domain_index.resolve(Headers(scope=scope).get("host"))
+        scope.setdefault("state", {})["tenant"] = tenant
+        
+        path = scope["path"]
+        if tenant is not None and (path == self.portal_prefix or path.startswith(self.portal_prefix + "/")):
+            scope["path"] = f"{self.tenant_prefix}/{tenant.slug}{path[len(self.portal_prefix):]}"
+        
+        await self.app(scope, receive, send)
+    
+    async def _refresh_index(self):
+        """Reload the domain index once, even under concurrent requests"""
+        async with self._refresh_lock:
+            if not tenant_domain_index.needs_refresh:
+                return
+            try:
+                async with AsyncSessionLocal() as db:
+                    tenants = await TenantService().get_active_tenants_async(db)
+                tenant_domain_index.load(tenants)
+            except Exception as e:
+                # Keep serving with the previous index; slug routes still work
+                logger.error(f"Tenant domain index refresh failed: {e}")
+                tenant_domain_index.defer_refresh()
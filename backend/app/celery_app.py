@@ -0,0 +1,45 @@
+from celery import Celery
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "transparencia",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
+    include=["app.tasks.dashboard", "app.tasks.search", "app.tasks.open_data", "app.tasks.partitions", "app.tasks.archive", "app.tasks.purge"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="America/Sao_Paulo",
+    enable_utc=True,
+    task_ignore_result=True,
+    beat_schedule={
+        "refresh-dashboard-snapshots": {
+            "task": "dashboard.refresh_all",
+            "schedule": settings.DASHBOARD_SNAPSHOT_INTERVAL,
+        },
+        "process-search-outbox": {
+            "task": "search.process_outbox",
+            "schedule": settings.SEARCH_OUTBOX_INTERVAL,
+        },
+        "refresh-open-data-snapshots": {
+            "task": "open_data.refresh_all",
+            "schedule": settings.OPEN_DATA_SNAPSHOT_INTERVAL,
+        },
+        "ensure-financial-partitions": {
+            "task": "partitions.ensure",
+            "schedule": settings.FINANCIAL_PARTITION_INTERVAL,
+        },
+        "archive-closed-years": {
+            "task": "archive.run_all",
+            "schedule": settings.ARCHIVE_INTERVAL,
+        },
+        "purge-soft-deleted-rows": {
+            "task": "purge.run",
+            "schedule": settings.SOFT_DELETE_PURGE_INTERVAL,
+        },
+    },
+)
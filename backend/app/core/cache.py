@@ -0,0 +1,99 @@
+from typing import Dict, Optional
+import json
+import logging
+
+import redis
+import redis.asyncio as aioredis
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Response header telling whether a public response came from the cache
+CACHE_STATUS_HEADER = "X-Cache"
+
+class ResponseCache:
+    """
+    Redis cache of rendered public API responses.
+    
+    Entries are keyed by tenant and the response's ETag, which covers the
+    route, the normalized query string and the DatasetVersion counters
+    bumped inside every write transaction. A committed write therefore
+    moves readers to new keys by itself, with no separate invalidation
+    step that could fail or lag; orphaned entries expire after CACHE_TTL.
+    Redis errors are logged and treated as cache misses, so an unavailable
+    Redis never breaks the public portal.
+    """
+    
+    def __init__(self, url: str, ttl: int, enabled: bool = True):
+        self.url = url
+        self.ttl = ttl
+        self.enabled = enabled
+        self._client: Optional[redis.Redis] = None
+        self._async_client: Optional[aioredis.Redis] = None
+    
+    @property
+    def client(self) -> redis.Redis:
+        """Sync client, used by the workers"""
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=1, socket_connect_timeout=1)
+        return self._client
+    
+    @property
+    def async_client(self) -> aioredis.Redis:
+        """Async client, used by the public read paths"""
+        if self._async_client is None:
+            self._async_client = aioredis.Redis.from_url(self.url, socket_timeout=1, socket_connect_timeout=1)
+        return self._async_client
+    
+    def _entry_key(self, tenant_id: int, etag: str) -> str:
+        digest = etag.strip('"')
+        return f"public:{tenant_id}:{digest}"
+    
+    async def get(self, tenant_id: int, request: Request, etag: str) -> Optional[Response]:
+        """Get the cached response of a request with the given ETag, or None on a miss"""
+        if not self.enabled:
+            return None
+        # Remember the key so set() stores under the versions read before the query ran
+        request.state.response_cache_key = self._entry_key(tenant_id, etag)
+        try:
+            cached = await self.async_client.get(request.state.response_cache_key)
+        except redis.RedisError as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        
+        if cached is None:
+            return None
+        entry = json.loads(cached)
+        headers = {**entry["headers"], CACHE_STATUS_HEADER: "HIT"}
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+    
+    async def set(
+        self,
+        request: Request,
+        body: bytes,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        """Store a rendered JSON body under the key looked up by get() and return it as a response"""
+        headers = headers or {}
+        key = getattr(request.state, "response_cache_key", None)
+        if self.enabled and key is not None:
+            entry = json.dumps({"body": body.decode(), "headers": headers})
+            try:
+                await self.async_client.set(key, entry, ex=self.ttl)
+            except redis.RedisError as e:
+                logger.warning(f"Response cache write failed: {e}")
+        
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**headers, CACHE_STATUS_HEADER: "MISS"}
+        )
+
+response_cache = ResponseCache(
+    url=settings.REDIS_URL,
+    ttl=settings.CACHE_TTL,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
@@ -0,0 +1,79 @@
+from typing import Any, NamedTuple, Optional, Sequence
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import json
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Public data is revalidated on every use; 304s make that cheap
+PUBLIC_CACHE_CONTROL = "public, no-cache"
+
+# Files whose content can never change (e.g. closed fiscal years)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class Validators(NamedTuple):
+    """Conditional request validators of a response"""
+    etag: str
+    last_modified: Optional[datetime]
+
+def build_validators(request: Request, versions: Sequence[Any]) -> Validators:
+    """
+    Build the ETag and Last-Modified of a public response from the
+    DatasetVersion rows it depends on.
+    
+    The ETag covers the route, the normalized query string and every
+    dataset counter, so it changes whenever any underlying write commits.
+    """
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if v != "")
+    counters = sorted((v.dataset, v.version) for v in versions)
+    
+    raw = json.dumps([request.url.path, params, counters])
+    etag = f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+    last_modified = max((v.updated_at for v in versions), default=None)
+    return Validators(etag=etag, last_modified=last_modified)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): proxies such as nginx weaken ETags when compressing
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+def _not_modified_since(if_modified_since: str, last_modified: Optional[datetime]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+def apply_validators(response: Response, validators: Validators) -> Response:
+    """Set the ETag, Last-Modified and Cache-Control headers on a response"""
+    response.headers["ETag"] = validators.etag
+    response.headers["Cache-Control"] = PUBLIC_CACHE_CONTROL
+    if validators.last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(
+            validators.last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return response
+
+def not_modified(request: Request, validators: Validators) -> Optional[Response]:
+    """Return a 304 response if the client's copy is still current, else None"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        matches = _etag_matches(if_none_match, validators.etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        matches = if_modified_since is not None and _not_modified_since(
+            if_modified_since, validators.last_modified
+        )
+    
+    if not matches:
+        return None
+    return apply_validators(Response(status_code=304), validators)
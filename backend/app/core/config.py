@@ -63,11 +63,49 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
     
+    # Batch writes
+    BATCH_MAX_ITEMS: int = 1000  # Items per :batch request
+    
     # Cache
     CACHE_TTL: int = 300  # 5 minutes
+    TENANT_CACHE_TTL: int = 60  # In-process tenant lookups
+    RESPONSE_CACHE_ENABLED: bool = True  # Redis cache of public API responses
+    
+    # Dashboard snapshots
+    DASHBOARD_SNAPSHOT_INTERVAL: int = 15 * 60  # Scheduled refresh of every tenant
+    DASHBOARD_REFRESH_DELAY: int = 10  # Debounce of the refresh queued after writes
+    
+    # Open-data Parquet snapshots
+    OPEN_DATA_DIR: str = "open_data"
+    OPEN_DATA_SNAPSHOT_INTERVAL: int = 60 * 60  # Scheduled refresh of the current year
+    
+    # Fiscal-year partitions of revenues and expenses
+    FINANCIAL_PARTITIONS_AHEAD: int = 1  # Years created ahead of the current one
+    FINANCIAL_TENANT_HASH_PARTITIONS: int = 0  # Sub-partitions by tenant hash per year (0: none)
+    FINANCIAL_PARTITION_INTERVAL: int = 24 * 60 * 60  # Scheduled partition maintenance (pre-creation only)
+    FINANCIAL_PARTITION_SPLIT_BATCH: int = 10000  # Rows copied per transaction when splitting a year out of the default partition
+    FINANCIAL_PARTITION_SPLIT_PAUSE: float = 0.1  # Seconds between split batches
+    
+    # Cold storage of closed fiscal years
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_AFTER_YEARS: int = 5  # Years older than this many closed years are archived
+    ARCHIVE_INTERVAL: int = 24 * 60 * 60  # Scheduled archival run
+    ARCHIVE_CACHE_SIZE: int = 16  # Archived years kept in memory for public listings
+    
+    # Purge of soft-deleted rows
+    SOFT_DELETE_RETENTION_DAYS: int = 90  # Deleted rows are kept (and restorable) this long
+    SOFT_DELETE_PURGE_BATCH: int = 1000  # Rows removed per statement and transaction
+    SOFT_DELETE_PURGE_PAUSE: float = 0.1  # Seconds between batches, to spare replication and autovacuum
+    SOFT_DELETE_PURGE_INTERVAL: int = 24 * 60 * 60  # Scheduled purge run
     
     # Elasticsearch
     ELASTICSEARCH_URL: str = "http://localhost:9200"
+    ELASTICSEARCH_INDEX: str = "transparencia-search"
+    SEARCH_BACKEND: str = "postgres"  # postgres or elasticsearch
+    SEARCH_OUTBOX_INTERVAL: int = 10  # Seconds between indexer runs
+    SEARCH_OUTBOX_BATCH: int = 500  # Outbox entries per bulk request
+    SEARCH_OUTBOX_RETRY_DELAY: int = 30  # Seconds before the first retry of a failed entry, doubled per attempt
+    SEARCH_OUTBOX_MAX_ATTEMPTS: int = 8  # Entries failing this often are kept as dead letters
     
     # AWS/S3 (for production)
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -84,6 +122,8 @@ class Settings(BaseSettings):
     
     # Multi-tenancy
     DEFAULT_TENANT: str = "default"
+    TENANT_BASE_DOMAIN: str = "transparencia.gov.br"  # Subdomain portals live under this domain
+    TENANT_INDEX_REFRESH: int = 300  # Max age (seconds) of the in-memory domain index
     
     # Legal compliance
     LAI_RESPONSE_DAYS: int = 20
@@ -0,0 +1,80 @@
+from typing import Any, List, Optional, Sequence
+from datetime import date, datetime
+import base64
+import json
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode keyset values into an opaque cursor"""
+    payload = [
+        value.isoformat() if isinstance(value, (date, datetime)) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    """Decode an opaque cursor into keyset values typed after the key columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(keys):
+            raise ValueError("cursor does not match the sort keys")
+        
+        values = []
+        for key, value in zip(keys, payload):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                values.append(date.fromisoformat(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def apply_keyset(
+    query: Select,
+    keys: Sequence[Any],
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Select:
+    """
+    Order a statement by the keyset columns (descending) and paginate it.
+    
+    With a cursor the page starts right after the encoded row, so the cost
+    per page does not grow with depth; otherwise the legacy offset is used.
+    """
+    query = query.order_by(*[key.desc() for key in keys])
+    
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        query = query.where(tuple_(*keys) < tuple_(*values))
+    elif skip:
+        query = query.offset(skip)
+    
+    return query.limit(limit)
+
+def next_cursor(items: Sequence[Any], keys: Sequence[Any], limit: int) -> Optional[str]:
+    """Build the cursor of the page following items, or None on the last page"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor([getattr(last, key.key) for key in keys])
+
+def set_next_cursor(response: Response, items: Sequence[Any], keys: Sequence[Any], limit: int) -> None:
+    """Expose the next page cursor as a response header"""
+    cursor = next_cursor(items, keys, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
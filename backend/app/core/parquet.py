@@ -0,0 +1,25 @@
+from typing import Any
+
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, Integer, Numeric
+
+# pyarrow is imported lazily by the Parquet writers and passed in, so
+# importing this module does not require it.
+
+def arrow_type(pa: Any, column: Any) -> Any:
+    """Map a table column to the Arrow type it is written as"""
+    column_type = column.type
+    if isinstance(column_type, Enum):
+        return pa.string()
+    if isinstance(column_type, BigInteger):
+        return pa.int64()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, Numeric):
+        return pa.decimal128(column_type.precision, column_type.scale)
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    return pa.string()
@@ -0,0 +1,24 @@
+from typing import Any
+from datetime import date
+
+from sqlalchemy import and_
+
+# Tables partitioned by fiscal year: RANGE on their date column, one
+# partition per calendar year (the Brazilian fiscal year), plus a default
+# partition for rows of years without one.
+FISCAL_YEAR_PARTITIONED = {"revenues": "date", "expenses": "date"}
+
+def fiscal_year_condition(table: Any, year: int) -> Any:
+    """
+    Condition selecting the rows of a fiscal year.
+    
+    The year column keeps the period indexes usable; on partitioned tables
+    the equivalent range on the partition key lets Postgres prune every
+    other year's partition.
+    """
+    condition = table.c.year == year
+    date_column = FISCAL_YEAR_PARTITIONED.get(table.name)
+    if date_column:
+        column = table.c[date_column]
+        condition = and_(condition, column >= date(year, 1, 1), column < date(year + 1, 1, 1))
+    return condition
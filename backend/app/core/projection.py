@@ -0,0 +1,57 @@
+from typing import Any, List, Sequence, Type
+from decimal import Decimal
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import Float, Numeric, cast, null
+from sqlalchemy.sql import ColumnElement, Select
+
+# Fast path of read-only listings: the columns of a response schema are
+# selected with Core and the rows dumped with orjson, skipping ORM objects
+# (and the identity map) and Pydantic validation.
+
+def response_columns(model: Any, schema: Type[BaseModel]) -> List[ColumnElement]:
+    """
+    Project a table onto the fields of a response schema.
+    
+    Numeric columns are cast to float in the query (the schemas expose
+    floats); optional schema fields without a column are selected as
+    null, and a required one is an error, since the rendered bytes skip
+    response_model validation. The mapped attributes are selected, not
+    the table's columns, so the statement stays ORM-enabled and
+    soft-deleted rows are left out.
+    """
+    table = model.__table__
+    columns = []
+    for name, field in schema.model_fields.items():
+        if name not in table.c:
+            if field.is_required():
+                raise ValueError(f"{schema.__name__}.{name} has no column in {table.name}")
+            columns.append(null().label(name))
+            continue
+        column = getattr(model, name)
+        if isinstance(table.c[name].type, Numeric):
+            column = cast(column, Float)
+        columns.append(column.label(name))
+    return columns
+
+def project(query: Select, model: Any, schema: Type[BaseModel], keys: Sequence[Any] = ()) -> Select:
+    """
+    Replace the entity of a listing statement with the schema's columns.
+    
+    Keyset columns missing from the schema are appended after them, so
+    next_cursor() can still read them from the last row.
+    """
+    extra = [key for key in keys if key.key not in schema.model_fields]
+    return query.with_only_columns(*response_columns(model, schema), *extra)
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dump_rows(rows: Sequence[Any], schema: Type[BaseModel]) -> bytes:
+    """Serialize projected rows as a JSON array of schema-shaped objects"""
+    names = list(schema.model_fields)
+    width = len(names)
+    return orjson.dumps([dict(zip(names, row[:width])) for row in rows], default=_default)
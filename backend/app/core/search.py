@@ -0,0 +1,55 @@
+from typing import Any, Optional, Tuple
+
+from elasticsearch import Elasticsearch
+from sqlalchemy import Column, Computed, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.core.config import settings
+
+# Text search configuration of the search vectors and queries
+SEARCH_CONFIG = "portuguese"
+
+def search_vector_expression(*weighted_columns: Tuple[str, str]) -> str:
+    """
+    Build the SQL of a weighted search vector over text columns, e.g.
+    search_vector_expression(("object", "A"), ("description", "B")).
+    
+    Only immutable functions are used so it can back a stored generated column.
+    """
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+
+def search_vector_column(*weighted_columns: Tuple[str, str]) -> Any:
+    """Stored generated tsvector column over the given (column, weight) pairs"""
+    return Column(
+        TSVECTOR,
+        Computed(search_vector_expression(*weighted_columns), persisted=True),
+        nullable=True
+    )
+
+def search_query(q: str) -> Any:
+    """Parse user input with web search syntax (quotes, OR, -word)"""
+    return func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+
+def search_match(vector: Any, q: str) -> Any:
+    """Condition matching a search vector against user input (GIN-indexable)"""
+    return vector.op("@@")(search_query(q))
+
+def search_rank(vector: Any, q: str) -> Any:
+    """Relevance of a search vector for user input"""
+    return func.ts_rank(vector, search_query(q))
+
+_search_client: Optional[Elasticsearch] = None
+
+def get_search_client() -> Elasticsearch:
+    """Shared Elasticsearch client, created on first use"""
+    global _search_client
+    if _search_client is None:
+        _search_client = Elasticsearch(settings.ELASTICSEARCH_URL, request_timeout=10)
+    return _search_client
+
+def elasticsearch_enabled() -> bool:
+    """Whether public search is served by (and writes are queued for) Elasticsearch"""
+    return settings.SEARCH_BACKEND == "elasticsearch"
@@ -7,9 +7,11 @@ import time
 import logging
 
 from app.core.config import settings
-from app.core.database import sync_engine, Base
+from app.core.database import sync_engine, Base, SessionLocal
 from app.api.api_v1.api import api_router
+from app.api.middleware import TenantHostMiddleware
 from app.core.security import get_password_hash
+from app.services.partition_service import PartitionService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +28,10 @@ async def lifespan(app: FastAPI):
     # Create database tables
     Base.metadata.create_all(bind=sync_engine)
     
+    # Partitions of the current and coming fiscal years (history is split with manage_partitions.py split)
+    with SessionLocal() as db:
+        PartitionService().ensure_partitions(db)
+    
     yield
     
     # Shutdown
@@ -42,6 +48,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Resolve tenants served on their own domain or subdomain
+app.add_middleware(TenantHostMiddleware)
+
 # Set all CORS enabled origins
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +58,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing"],
 )
 
 # Add trusted host middleware
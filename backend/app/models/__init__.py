@@ -11,6 +11,8 @@ from .user import User
 from .financial import Revenue, Expense, BudgetExecution
 from .contract import Supplier, Bidding, Contract, ContractAmendment
 from .esic import ESICRequest, ESICAttachment, ESICStatistics
+from .dataset import DatasetVersion, DashboardSnapshot, OpenDataSnapshot, ArchivedYear
+from .search import SearchOutbox
 
 # Ensure all models are available
 __all__ = [
@@ -29,4 +31,9 @@ __all__ = [
     "ESICRequest",
     "ESICAttachment",
     "ESICStatistics",
+    "DatasetVersion",
+    "DashboardSnapshot",
+    "OpenDataSnapshot",
+    "ArchivedYear",
+    "SearchOutbox",
 ]
\ No newline at end of file
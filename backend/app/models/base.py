@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, DateTime, Boolean, String
+from sqlalchemy import Column, Index, Integer, DateTime, Boolean, String, event, false
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import Session, with_loader_criteria
 from sqlalchemy.sql import func
 from app.core.database import Base
 from datetime import datetime
@@ -14,6 +15,31 @@ class SoftDeleteMixin:
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
+@event.listens_for(SoftDeleteMixin, "instrument_class", propagate=True)
+def _index_deleted_rows(mapper, cls):
+    """Partial index of the deleted rows, which the purge job scans by deleted_at"""
+    table = cls.__table__
+    Index(f"ix_{table.name}_deleted_at", table.c.deleted_at, postgresql_where=table.c.is_deleted)
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_soft_deleted(execute_state):
+    """
+    Hide soft-deleted rows from every ORM query, sync or async.
+    
+    The criteria also apply to the relationship and column loads of the
+    returned objects. Pass execution_options(include_deleted=True) to
+    include deleted rows.
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.is_deleted == false(), include_aliases=True)
+        )
+
 class TenantMixin:
     """Mixin for multi-tenant support"""
     @declared_attr
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Text, Boolean, Enum, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Text, Boolean, Enum, DateTime, Index, desc, text
+from sqlalchemy.orm import relationship, deferred
 from app.models.base import TenantBaseModel
+from app.core.search import search_vector_column
 import enum
 from decimal import Decimal
 
@@ -68,6 +69,14 @@ class Supplier(TenantBaseModel):
 
 class Bidding(TenantBaseModel):
     __tablename__ = "biddings"
+    __table_args__ = (
+        Index("ix_biddings_search_vector", "search_vector", postgresql_using="gin"),
+        # Natural key, used by upsert ingestion. Not partial: soft-deleted rows keep their key, and
+        # creating it again restores them (see BaseService._create_record)
+        Index("uq_biddings_natural_key", "tenant_id", "number", "year", unique=True),
+        # Tenant listings filtered by status, newest first (keyset order), live rows only
+        Index("ix_biddings_tenant_status_created", "tenant_id", "status", desc("created_at"), desc("id"), postgresql_where=text("is_deleted = false")),
+    )
     
     # Basic info
     number = Column(String(50), nullable=False)
@@ -99,6 +108,9 @@ class Bidding(TenantBaseModel):
     winner_supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=True)
     winning_value = Column(Numeric(15, 2), nullable=True)
     
+    # Full-text search (generated by Postgres, not loaded by default)
+    search_vector = deferred(search_vector_column(("object", "A"), ("description", "B")))
+    
     # Override tenant_id to add ForeignKey
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
     
@@ -116,6 +128,14 @@ class Bidding(TenantBaseModel):
 
 class Contract(TenantBaseModel):
     __tablename__ = "contracts"
+    __table_args__ = (
+        Index("ix_contracts_search_vector", "search_vector", postgresql_using="gin"),
+        # Natural key, used by upsert ingestion. Not partial: soft-deleted rows keep their key, and
+        # creating it again restores them (see BaseService._create_record)
+        Index("uq_contracts_natural_key", "tenant_id", "number", "year", unique=True),
+        # Tenant listings filtered by status, newest first (keyset order), live rows only
+        Index("ix_contracts_tenant_status_created", "tenant_id", "status", desc("created_at"), desc("id"), postgresql_where=text("is_deleted = false")),
+    )
     
     # Basic info
     number = Column(String(50), nullable=False)
@@ -152,6 +172,9 @@ class Contract(TenantBaseModel):
     # Execution
     executed_value = Column(Numeric(15, 2), default=0, nullable=False)
     
+    # Full-text search (generated by Postgres, not loaded by default)
+    search_vector = deferred(search_vector_column(("object", "A"), ("description", "B")))
+    
     # Override tenant_id to add ForeignKey
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
     
@@ -0,0 +1,68 @@
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, ForeignKey, Index, JSON
+from app.models.base import BaseModel
+
+class DatasetVersion(BaseModel):
+    __tablename__ = "dataset_versions"
+    __table_args__ = (
+        # One change counter per tenant and dataset, used as the upsert target
+        Index("uq_dataset_versions_tenant_dataset", "tenant_id", "dataset", unique=True),
+    )
+    
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    dataset = Column(String(50), nullable=False)  # revenues, expenses, contracts, biddings, esic, tenant
+    
+    # Bumped in the same transaction as every write to the dataset
+    version = Column(BigInteger, default=0, nullable=False)
+
+class DashboardSnapshot(BaseModel):
+    __tablename__ = "dashboard_snapshots"
+    __table_args__ = (
+        Index("uq_dashboard_snapshots_tenant_year", "tenant_id", "year", unique=True),
+    )
+    
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    
+    # Materialized financial, contract and e-SIC summaries
+    data = Column(JSON, nullable=False)
+    
+    # DatasetVersion counters the snapshot was built from; stale once they move
+    versions = Column(JSON, nullable=False)
+
+class OpenDataSnapshot(BaseModel):
+    __tablename__ = "open_data_snapshots"
+    __table_args__ = (
+        Index("uq_open_data_snapshots_tenant_dataset_year", "tenant_id", "dataset", "year", unique=True),
+    )
+    
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    dataset = Column(String(50), nullable=False)  # revenues, expenses, contracts, biddings
+    year = Column(Integer, nullable=False)
+    
+    # Parquet file (relative to OPEN_DATA_DIR) and its content hash, used as the download ETag
+    path = Column(String(500), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    
+    # Row count and latest change of the year's rows when written; the file is rewritten when it moves
+    fingerprint = Column(String(100), nullable=False)
+    
+    # Written after the fiscal year closed: never regenerated
+    is_final = Column(Boolean, default=False, nullable=False)
+
+class ArchivedYear(BaseModel):
+    __tablename__ = "archived_years"
+    __table_args__ = (
+        Index("uq_archived_years_tenant_dataset_year", "tenant_id", "dataset", "year", unique=True),
+    )
+    
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    dataset = Column(String(50), nullable=False)  # revenues, expenses, contracts, biddings, esic_requests
+    year = Column(Integer, nullable=False)
+    
+    # Parquet file (relative to ARCHIVE_DIR) with every column of the rows moved out of the table
+    path = Column(String(500), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    row_count = Column(Integer, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, ForeignKey, Boolean, Enum, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, ForeignKey, Boolean, Enum, DateTime, Index, DDL, event, desc, text
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBaseModel
 import enum
@@ -25,6 +25,17 @@ class ESICCategory(str, enum.Enum):
 
 class ESICRequest(TenantBaseModel):
     __tablename__ = "esic_requests"
+    __table_args__ = (
+        # Prefix lookups on protocol (LIKE 'ESIC-AB%') regardless of collation
+        Index("ix_esic_requests_protocol_pattern", "protocol", postgresql_ops={"protocol": "text_pattern_ops"}),
+        # Fuzzy and substring search on the public search fields
+        Index("ix_esic_requests_subject_trgm", "subject", postgresql_using="gin", postgresql_ops={"subject": "gin_trgm_ops"}),
+        Index("ix_esic_requests_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        # Tenant listings filtered by status, newest first (keyset order), live rows only
+        Index("ix_esic_requests_tenant_status_created", "tenant_id", "status", desc("created_at"), desc("id"), postgresql_where=text("is_deleted = false")),
+        # Public e-SIC listing and search
+        Index("ix_esic_requests_public", "tenant_id", desc("created_at"), desc("id"), postgresql_where=text("is_public AND is_deleted = false")),
+    )
     
     # Protocol
     protocol = Column(String(20), unique=True, nullable=False, index=True)
@@ -49,6 +60,7 @@ class ESICRequest(TenantBaseModel):
     # Response
     response_text = Column(Text, nullable=True)
     response_attachments = Column(Text, nullable=True)  # JSON array of file paths
+    is_public = Column(Boolean, default=False, nullable=False)  # Listed in the public e-SIC search
     
     # Override tenant_id to add ForeignKey
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
@@ -100,6 +112,13 @@ class ESICRequest(TenantBaseModel):
         delta = self.appeal_due_date - datetime.now().date()
         return max(0, delta.days)
 
+# The trigram indexes need pg_trgm (also enabled by docker/postgres/init.sql)
+event.listen(
+    ESICRequest.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
 class ESICAttachment(TenantBaseModel):
     __tablename__ = "esic_attachments"
     
@@ -126,6 +145,10 @@ class ESICAttachment(TenantBaseModel):
 
 class ESICStatistics(TenantBaseModel):
     __tablename__ = "esic_statistics"
+    __table_args__ = (
+        # One rollup row per tenant and period, used as the upsert target
+        Index("uq_esic_statistics_tenant_period", "tenant_id", "year", "month", unique=True),
+    )
     
     # Period
     year = Column(Integer, nullable=False)
@@ -139,6 +162,7 @@ class ESICStatistics(TenantBaseModel):
     
     # Response times (in days)
     avg_response_time = Column(Integer, default=0, nullable=False)
+    total_response_seconds = Column(BigInteger, default=0, nullable=False)  # Sum used to keep the average exact
     
     # Categories
     financial_requests = Column(Integer, default=0, nullable=False)
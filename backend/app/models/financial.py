@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Text, Boolean, Enum, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, Numeric, Date, ForeignKey, Text, Boolean, Enum, DateTime, Index, desc, text
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import TenantBaseModel
+from app.core.search import search_vector_column
 import enum
 from decimal import Decimal
 
+def date_part_column(field: str) -> Column:
+    """Stored generated integer column holding a part (year, month) of the date column"""
+    return Column(Integer, Computed(f"EXTRACT({field} FROM date)::integer", persisted=True))
+
 class RevenueCategory(str, enum.Enum):
     TAXES = "impostos"
     TRANSFERS = "transferencias"
@@ -27,6 +32,18 @@ class ExpenseType(str, enum.Enum):
 
 class Revenue(TenantBaseModel):
     __tablename__ = "revenues"
+    __table_args__ = (
+        Index("ix_revenues_search_vector", "search_vector", postgresql_using="gin"),
+        # Period filters and aggregates (year, month, category) are index range scans
+        Index("ix_revenues_period", "tenant_id", "year", "month", "category"),
+        # Tenant listings, newest first (keyset order), live rows only
+        Index("ix_revenues_tenant_date", "tenant_id", desc("date"), desc("id"), postgresql_where=text("is_deleted = false")),
+        # One partition per fiscal year (see app.core.partitioning)
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+    
+    # Primary key is (id, date); id still comes from its own sequence
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     
     # Basic info
     description = Column(String(500), nullable=False)
@@ -35,7 +52,11 @@ class Revenue(TenantBaseModel):
     
     # Financial data
     amount = Column(Numeric(15, 2), nullable=False)
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True, nullable=False)  # Partition key, so part of the primary key
+    
+    # Fiscal period of date (generated by Postgres)
+    year = date_part_column("year")
+    month = date_part_column("month")
     
     # Classification
     budget_code = Column(String(50), nullable=True)
@@ -44,6 +65,9 @@ class Revenue(TenantBaseModel):
     # Legal compliance
     process_number = Column(String(50), nullable=True)
     
+    # Full-text search (generated by Postgres, not loaded by default)
+    search_vector = deferred(search_vector_column(("description", "A"), ("source", "B")))
+    
     # Override tenant_id to add ForeignKey
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
     
@@ -55,6 +79,25 @@ class Revenue(TenantBaseModel):
 
 class Expense(TenantBaseModel):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_search_vector", "search_vector", postgresql_using="gin"),
+        # Period filters and aggregates (year, month, category) are index range scans
+        Index("ix_expenses_period", "tenant_id", "year", "month", "category"),
+        # Tenant listings, newest first (keyset order), live rows only
+        Index("ix_expenses_tenant_date", "tenant_id", desc("date"), desc("id"), postgresql_where=text("is_deleted = false")),
+        # Natural key, used by upsert ingestion: a process has one commitment, liquidation and payment entry.
+        # Unique indexes of a partitioned table must include the partition key, so Postgres only enforces
+        # (tenant_id, process_number, expense_type, date): upserts move a record to its new date before
+        # merging on this index (see BaseService._upsert_rows), and single creates check the key under an
+        # advisory lock (see BaseService._create_record). Batch creates and imports without upsert do not,
+        # and may leave one process on several dates. Soft-deleted rows keep their key.
+        Index("uq_expenses_natural_key", "tenant_id", "process_number", "expense_type", "date", unique=True),
+        # One partition per fiscal year (see app.core.partitioning)
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+    
+    # Primary key is (id, date); id still comes from its own sequence
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     
     # Basic info
     description = Column(String(500), nullable=False)
@@ -64,7 +107,11 @@ class Expense(TenantBaseModel):
     
     # Financial data
     amount = Column(Numeric(15, 2), nullable=False)
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True, nullable=False)  # Partition key, so part of the primary key
+    
+    # Fiscal period of date (generated by Postgres)
+    year = date_part_column("year")
+    month = date_part_column("month")
     
     # Beneficiary
     beneficiary_name = Column(String(255), nullable=False)
@@ -82,6 +129,9 @@ class Expense(TenantBaseModel):
     # Contract reference
     contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=True)
     
+    # Full-text search (generated by Postgres, not loaded by default)
+    search_vector = deferred(search_vector_column(("description", "A"), ("beneficiary_name", "B")))
+    
     # Override tenant_id to add ForeignKey
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
     
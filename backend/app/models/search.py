@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from app.models.base import BaseModel
+
+class SearchOutbox(BaseModel):
+    __tablename__ = "search_outbox"
+    
+    # Changed record, written in the same transaction as the change
+    tenant_id = Column(Integer, nullable=False)
+    entity = Column(String(20), nullable=False)  # revenue, expense, contract, bidding
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # index or delete
+    
+    # Failed deliveries: retried with exponential backoff, then left as dead letters
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # NULL: due now
@@ -0,0 +1,37 @@
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel, model_validator
+
+from app.core.config import settings
+
+CreateT = TypeVar("CreateT")
+UpdateT = TypeVar("UpdateT")
+
+class BatchRequest(BaseModel, Generic[CreateT, UpdateT]):
+    """Schema for a batch of creates, updates (by id) and deletes (by id)"""
+    create: List[CreateT] = []
+    update: List[UpdateT] = []
+    delete: List[int] = []
+    
+    @model_validator(mode="after")
+    def check_size(self):
+        total = len(self.create) + len(self.update) + len(self.delete)
+        if total == 0:
+            raise ValueError("Batch is empty")
+        if total > settings.BATCH_MAX_ITEMS:
+            raise ValueError(f"Batch has {total} items, the maximum is {settings.BATCH_MAX_ITEMS}")
+        return self
+
+class BatchItemResult(BaseModel):
+    """Outcome of one item of a batch"""
+    operation: str  # create, update or delete
+    index: int  # Position of the item in its list
+    id: Optional[int] = None
+    status: int  # HTTP status the item would have had as a single request
+    detail: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    """Schema for batch response"""
+    created: int
+    updated: int
+    deleted: int
+    results: List[BatchItemResult]
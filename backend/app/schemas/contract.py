@@ -1,19 +1,28 @@
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field
 
+from app.models.contract import ContractType, ContractStatus, BiddingModality, BiddingStatus
+
+from app.schemas.batch import BatchRequest
+
 class ContractBase(BaseModel):
     """Base schema for contracts"""
     tenant_id: int
     number: str
-    description: str
-    contractor_name: str
-    contractor_document: str
-    start_date: datetime
-    end_date: datetime
-    value: float
-    category: Optional[str] = None
-    status: str = "active"
+    year: int
+    contract_type: ContractType
+    object: str
+    description: Optional[str] = None
+    supplier_id: int
+    original_value: float
+    current_value: float
+    signature_date: date
+    start_date: date
+    end_date: date
+    status: ContractStatus = ContractStatus.ACTIVE
+    bidding_id: Optional[int] = None
+    legal_basis: Optional[str] = None
     
     model_config = {
         "from_attributes": True
@@ -26,14 +35,20 @@ class ContractCreate(ContractBase):
 class ContractUpdate(BaseModel):
     """Schema for contract update"""
     number: Optional[str] = None
+    year: Optional[int] = None
+    contract_type: Optional[ContractType] = None
+    object: Optional[str] = None
     description: Optional[str] = None
-    contractor_name: Optional[str] = None
-    contractor_document: Optional[str] = None
-    start_date: Optional[datetime] = None
-    end_date: Optional[datetime] = None
-    value: Optional[float] = None
-    category: Optional[str] = None
-    status: Optional[str] = None
+    supplier_id: Optional[int] = None
+    original_value: Optional[float] = None
+    current_value: Optional[float] = None
+    executed_value: Optional[float] = None
+    signature_date: Optional[date] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    status: Optional[ContractStatus] = None
+    bidding_id: Optional[int] = None
+    legal_basis: Optional[str] = None
     
     model_config = {
         "from_attributes": True
@@ -42,6 +57,7 @@ class ContractUpdate(BaseModel):
 class ContractResponse(ContractBase):
     """Schema for contract response"""
     id: int
+    executed_value: float
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -49,16 +65,25 @@ class ContractResponse(ContractBase):
         "from_attributes": True
     }
 
+class ContractBatchUpdate(ContractUpdate):
+    """Schema for a contract update inside a batch"""
+    id: int
+
+ContractBatch = BatchRequest[ContractCreate, ContractBatchUpdate]
+
 class BiddingBase(BaseModel):
     """Base schema for biddings"""
     tenant_id: int
     number: str
-    description: str
-    modality: str
-    publication_date: datetime
+    year: int
+    modality: BiddingModality
+    object: str
+    description: Optional[str] = None
+    publication_date: date
     opening_date: datetime
-    estimated_value: float
-    status: str = "open"
+    estimated_value: Optional[float] = None
+    status: BiddingStatus = BiddingStatus.PUBLISHED
+    law_basis: Optional[str] = None
     
     model_config = {
         "from_attributes": True
@@ -71,12 +96,17 @@ class BiddingCreate(BiddingBase):
 class BiddingUpdate(BaseModel):
     """Schema for bidding update"""
     number: Optional[str] = None
+    year: Optional[int] = None
+    modality: Optional[BiddingModality] = None
+    object: Optional[str] = None
     description: Optional[str] = None
-    modality: Optional[str] = None
-    publication_date: Optional[datetime] = None
+    publication_date: Optional[date] = None
     opening_date: Optional[datetime] = None
     estimated_value: Optional[float] = None
-    status: Optional[str] = None
+    status: Optional[BiddingStatus] = None
+    law_basis: Optional[str] = None
+    winner_supplier_id: Optional[int] = None
+    winning_value: Optional[float] = None
     
     model_config = {
         "from_attributes": True
@@ -85,6 +115,8 @@ class BiddingUpdate(BaseModel):
 class BiddingResponse(BiddingBase):
     """Schema for bidding response"""
     id: int
+    winner_supplier_id: Optional[int] = None
+    winning_value: Optional[float] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -92,15 +124,22 @@ class BiddingResponse(BiddingBase):
         "from_attributes": True
     }
 
+class BiddingBatchUpdate(BiddingUpdate):
+    """Schema for a bidding update inside a batch"""
+    id: int
+
+BiddingBatch = BatchRequest[BiddingCreate, BiddingBatchUpdate]
+
 class ContractPublicResponse(BaseModel):
     """Schema for public contract response"""
     number: str
-    description: str
-    contractor_name: str
-    start_date: datetime
-    end_date: datetime
-    value: float
-    status: str
+    year: int
+    object: str
+    supplier_id: int
+    start_date: date
+    end_date: date
+    current_value: float
+    status: ContractStatus
     
     model_config = {
         "from_attributes": True
@@ -109,12 +148,13 @@ class ContractPublicResponse(BaseModel):
 class BiddingPublicResponse(BaseModel):
     """Schema for public bidding response"""
     number: str
-    description: str
-    modality: str
-    publication_date: datetime
+    year: int
+    modality: BiddingModality
+    object: str
+    publication_date: date
     opening_date: datetime
-    estimated_value: float
-    status: str
+    estimated_value: Optional[float] = None
+    status: BiddingStatus
     
     model_config = {
         "from_attributes": True
@@ -1,16 +1,19 @@
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+import datetime
 from pydantic import BaseModel, Field
 
+from app.models.financial import RevenueCategory, ExpenseCategory, ExpenseType
+
+from app.schemas.batch import BatchRequest
+
 class FinancialBase(BaseModel):
     """Base class for financial schemas"""
     tenant_id: int
-    year: int
-    month: int
+    date: datetime.date
     amount: float
     description: str
-    category: str
     subcategory: Optional[str] = None
+    budget_code: Optional[str] = None
     
     model_config = {
         "from_attributes": True
@@ -18,8 +21,9 @@ class FinancialBase(BaseModel):
 
 class RevenueBase(FinancialBase):
     """Base schema for revenue"""
+    category: RevenueCategory
     source: Optional[str] = None
-    revenue_code: Optional[str] = None
+    process_number: Optional[str] = None
     
 class RevenueCreate(RevenueBase):
     """Schema for revenue creation"""
@@ -28,29 +32,40 @@ class RevenueCreate(RevenueBase):
 class RevenueUpdate(RevenueBase):
     """Schema for revenue update"""
     tenant_id: Optional[int] = None
-    year: Optional[int] = None
-    month: Optional[int] = None
+    date: Optional[datetime.date] = None
     amount: Optional[float] = None
     description: Optional[str] = None
-    category: Optional[str] = None
+    category: Optional[RevenueCategory] = None
     
 class RevenueResponse(RevenueBase):
     """Schema for revenue response"""
     id: int
-    created_at: datetime
-    updated_at: Optional[datetime] = None
+    year: int  # Derived from date
+    month: int
+    created_at: datetime.datetime
+    updated_at: Optional[datetime.datetime] = None
     
     model_config = {
         "from_attributes": True
     }
-    
+
+class RevenueBatchUpdate(RevenueUpdate):
+    """Schema for a revenue update inside a batch"""
+    id: int
+
+RevenueBatch = BatchRequest[RevenueCreate, RevenueBatchUpdate]
+
 class ExpenseBase(FinancialBase):
     """Base schema for expense"""
-    supplier_name: Optional[str] = None
-    supplier_document: Optional[str] = None
-    expense_code: Optional[str] = None
-    payment_date: Optional[datetime] = None
-    commitment_date: Optional[datetime] = None
+    category: ExpenseCategory
+    expense_type: ExpenseType
+    beneficiary_name: str
+    beneficiary_document: str
+    function_code: Optional[str] = None
+    subfunction_code: Optional[str] = None
+    process_number: str
+    bidding_process: Optional[str] = None
+    contract_id: Optional[int] = None
     
 class ExpenseCreate(ExpenseBase):
     """Schema for expense creation"""
@@ -59,22 +74,33 @@ class ExpenseCreate(ExpenseBase):
 class ExpenseUpdate(ExpenseBase):
     """Schema for expense update"""
     tenant_id: Optional[int] = None
-    year: Optional[int] = None
-    month: Optional[int] = None
+    date: Optional[datetime.date] = None
     amount: Optional[float] = None
     description: Optional[str] = None
-    category: Optional[str] = None
+    category: Optional[ExpenseCategory] = None
+    expense_type: Optional[ExpenseType] = None
+    beneficiary_name: Optional[str] = None
+    beneficiary_document: Optional[str] = None
+    process_number: Optional[str] = None
     
 class ExpenseResponse(ExpenseBase):
     """Schema for expense response"""
     id: int
-    created_at: datetime
-    updated_at: Optional[datetime] = None
+    year: int  # Derived from date
+    month: int
+    created_at: datetime.datetime
+    updated_at: Optional[datetime.datetime] = None
     
     model_config = {
         "from_attributes": True
     }
-        
+
+class ExpenseBatchUpdate(ExpenseUpdate):
+    """Schema for an expense update inside a batch"""
+    id: int
+
+ExpenseBatch = BatchRequest[ExpenseCreate, ExpenseBatchUpdate]
+
 class FinancialSummary(BaseModel):
     """Schema for financial summary"""
     total_revenue: float
@@ -84,3 +110,18 @@ class FinancialSummary(BaseModel):
     expense_by_category: Dict[str, float]
     revenue_by_month: Dict[int, float]
     expense_by_month: Dict[int, float]
+
+class ImportRowError(BaseModel):
+    """A rejected row of an import file"""
+    row: int
+    field: str
+    message: str
+
+class ImportResult(BaseModel):
+    """Schema for the outcome of a bulk import"""
+    dataset: str
+    total_rows: int
+    imported: int
+    updated: int = 0  # Existing records changed by an upsert import
+    rejected: int
+    errors: List[ImportRowError]
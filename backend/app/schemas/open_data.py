@@ -0,0 +1,17 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class OpenDataSnapshotResponse(BaseModel):
+    """Schema for a downloadable Parquet snapshot of a dataset year"""
+    dataset: str
+    year: int
+    row_count: int
+    size_bytes: int
+    sha256: str
+    is_final: bool
+    updated_at: Optional[datetime] = None
+    
+    model_config = {
+        "from_attributes": True
+    }
@@ -0,0 +1,25 @@
+from typing import Optional, List, Dict
+import datetime
+from pydantic import BaseModel
+
+class SearchHit(BaseModel):
+    """Schema for one public search result"""
+    type: str
+    id: int
+    title: str
+    description: Optional[str] = None
+    amount: Optional[float] = None
+    date: Optional[datetime.date] = None
+    rank: float
+    
+    model_config = {
+        "from_attributes": True
+    }
+
+class SearchResponse(BaseModel):
+    """Schema for public search results with per-type facet counts"""
+    query: str
+    tenant: str
+    total: int
+    facets: Dict[str, int]
+    results: List[SearchHit]
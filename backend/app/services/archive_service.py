@@ -0,0 +1,376 @@
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+from collections import namedtuple
+from datetime import datetime
+import asyncio
+import enum
+import functools
+import hashlib
+import logging
+import os
+
+from pydantic import BaseModel
+from sqlalchemy import delete, extract, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.core.pagination import apply_keyset, decode_cursor
+from app.core.parquet import arrow_type
+from app.core.partitioning import fiscal_year_condition
+from app.core.projection import project
+from app.models.dataset import ArchivedYear
+from app.models.financial import Revenue, Expense
+from app.models.contract import Contract, Bidding
+from app.models.esic import ESICRequest
+from app.services.base_service import BaseService
+
+logger = logging.getLogger(__name__)
+
+# Rows per Parquet row group when archiving and per batch when reading back
+ARCHIVE_BATCH_SIZE = 50000
+
+class ArchiveSpec(NamedTuple):
+    """What a dataset's archive holds and how its rows are assigned to a year"""
+    model: Any
+    search_type: Optional[str]
+    year_column: str = "year"  # Otherwise a date/time column whose year is taken
+    versioned_as: Optional[str] = None  # DatasetVersion name, when it is not the dataset's
+
+# In archival order: referencing tables before the tables they reference
+ARCHIVE_DATASETS: Dict[str, ArchiveSpec] = {
+    "expenses": ArchiveSpec(model=Expense, search_type="expense"),
+    "revenues": ArchiveSpec(model=Revenue, search_type="revenue"),
+    "esic_requests": ArchiveSpec(model=ESICRequest, search_type=None, year_column="request_date", versioned_as="esic"),
+    "contracts": ArchiveSpec(model=Contract, search_type="contract"),
+    "biddings": ArchiveSpec(model=Bidding, search_type="bidding"),
+}
+
+# Generated date parts (see app.models.financial.date_part_column): not
+# archived, recomputed from date with the Arrow function of the same name
+GENERATED_DATE_PARTS = {"year": "year", "month": "month"}
+
+def _archive_value(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+def _and(condition: Any, other: Any) -> Any:
+    return other if condition is None else condition & other
+
+@functools.lru_cache(maxsize=settings.ARCHIVE_CACHE_SIZE)
+def _sorted_archive(path: str, columns: Tuple[str, ...], keys: Tuple[str, ...]) -> Any:
+    """
+    An archive's live rows, newest first by the keyset, as an Arrow table.
+    
+    Archive files never change (their name holds their digest), so the
+    table is cached by path. Generated date parts are not stored in the
+    file and are recomputed from date.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    
+    file_schema = pq.read_schema(path)
+    stored = [name for name in columns if name in file_schema.names]
+    derived = [name for name in columns if name in GENERATED_DATE_PARTS and name not in file_schema.names]
+    if derived and "date" not in stored:
+        stored.append("date")
+    data = pq.read_table(path, columns=stored, filters=pc.field("is_deleted") == pa.scalar(False))
+    for name in derived:
+        data = data.append_column(name, getattr(pc, GENERATED_DATE_PARTS[name])(data["date"]).cast(pa.int32()))
+    return data.sort_by([(key, "descending") for key in keys])
+
+class ArchiveService(BaseService):
+    """
+    Cold storage of closed fiscal years.
+    
+    The rows of a tenant's dataset and year are moved out of their table
+    into a zstd-compressed Parquet file recorded in archived_years; rows
+    other tables still reference stay in the table. Public listings and
+    exports read the archived years' files next to the rows left behind,
+    whether or not a year is asked for.
+    """
+    
+    def file_path(self, archive: ArchivedYear) -> str:
+        """Absolute path of an archive's Parquet file"""
+        return os.path.join(settings.ARCHIVE_DIR, archive.path)
+    
+    def _columns(self, dataset: str) -> List[Any]:
+        # Generated columns are recomputed when rows are restored
+        table = ARCHIVE_DATASETS[dataset].model.__table__
+        return [column for column in table.columns if column.computed is None]
+    
+    def _year_condition(self, dataset: str, year: int) -> Any:
+        spec = ARCHIVE_DATASETS[dataset]
+        table = spec.model.__table__
+        if spec.year_column == "year":
+            return fiscal_year_condition(table, year)
+        return extract("year", table.c[spec.year_column]) == year
+    
+    def archivable_years(self, db: Session, tenant_id: int, dataset: str) -> List[int]:
+        """Get the years of a tenant's dataset that are old enough and not archived yet"""
+        spec = ARCHIVE_DATASETS[dataset]
+        table = spec.model.__table__
+        year = table.c.year if spec.year_column == "year" else extract("year", table.c[spec.year_column])
+        cutoff = datetime.now().year - settings.ARCHIVE_AFTER_YEARS
+        archived = select(ArchivedYear.year).where(
+            ArchivedYear.tenant_id == tenant_id,
+            ArchivedYear.dataset == dataset
+        )
+        rows = db.execute(
+            select(year).where(
+                table.c.tenant_id == tenant_id,
+                year < cutoff,
+                year.not_in(archived)
+            ).distinct()
+        ).scalars().all()
+        return sorted(int(value) for value in rows if value is not None)
+    
+    def archive_year(self, db: Session, tenant_id: int, dataset: str, year: int) -> Optional[ArchivedYear]:
+        """
+        Move a closed year of a tenant's dataset into a Parquet archive.
+        
+        The file is written first; the rows are then deleted and the archive
+        recorded in one transaction, which is rolled back (and the file
+        removed) unless exactly the written rows were deleted. Returns None
+        when the year has nothing to archive.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        if year >= datetime.now().year - settings.ARCHIVE_AFTER_YEARS:
+            raise ValueError(f"Fiscal year {year} is not old enough to archive")
+        
+        spec = ARCHIVE_DATASETS[dataset]
+        table = spec.model.__table__
+        columns = self._columns(dataset)
+        schema = pa.schema([
+            pa.field(column.name, arrow_type(pa, column), nullable=column.nullable) for column in columns
+        ])
+        conditions = [table.c.tenant_id == tenant_id, self._year_condition(dataset, year), *self._unreferenced(table)]
+        
+        directory = os.path.join(settings.ARCHIVE_DIR, str(tenant_id), dataset)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f"{year}.parquet.tmp")
+        
+        row_count = 0
+        result = db.execute(
+            select(*columns).where(*conditions).order_by(table.c.id).execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+        )
+        with pq.ParquetWriter(temp_path, schema, compression="zstd") as writer:
+            for rows in result.partitions():
+                arrays = [
+                    pa.array([_archive_value(value) for value in column], type=field.type)
+                    for column, field in zip(zip(*rows), schema)
+                ]
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                row_count += len(rows)
+        if not row_count:
+            os.remove(temp_path)
+            return None
+        
+        digest = hashlib.sha256()
+        with open(temp_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        relative_path = os.path.join(str(tenant_id), dataset, f"{year}.{digest.hexdigest()[:16]}.parquet")
+        path = os.path.join(settings.ARCHIVE_DIR, relative_path)
+        os.replace(temp_path, path)
+        
+        try:
+            deleted = db.execute(delete(table).where(*conditions).returning(table.c.id)).scalars().all()
+            if len(deleted) != row_count:
+                raise RuntimeError(f"{dataset} {year} changed while it was archived")
+            if spec.search_type:
+                self._queue_search_updates(db, spec.search_type, tenant_id, deleted, "delete")
+            archive = ArchivedYear(
+                tenant_id=tenant_id,
+                dataset=dataset,
+                year=year,
+                path=relative_path,
+                sha256=digest.hexdigest(),
+                size_bytes=os.path.getsize(path),
+                row_count=row_count
+            )
+            db.add(archive)
+            # Cached public responses and ETags still list the archived rows
+            self._touch_datasets(db, tenant_id, spec.versioned_as or dataset)
+            db.commit()
+        except Exception:
+            db.rollback()
+            os.remove(path)
+            raise
+        self._data_changed(tenant_id)
+        
+        logger.info(f"Archived {row_count} {dataset} of {year} for tenant {tenant_id}")
+        return archive
+    
+    def archive_tenant(self, db: Session, tenant_id: int) -> List[ArchivedYear]:
+        """Archive every closed year of a tenant that is old enough"""
+        archives = []
+        for dataset in ARCHIVE_DATASETS:
+            for year in self.archivable_years(db, tenant_id, dataset):
+                archive = self.archive_year(db, tenant_id, dataset, year)
+                if archive is not None:
+                    archives.append(archive)
+        return archives
+    
+    def restore_year(self, db: Session, tenant_id: int, dataset: str, year: int) -> int:
+        """Move an archived year back into its table; returns the number of rows restored"""
+        import pyarrow.parquet as pq
+        
+        archive = db.execute(
+            select(ArchivedYear).where(
+                ArchivedYear.tenant_id == tenant_id,
+                ArchivedYear.dataset == dataset,
+                ArchivedYear.year == year
+            )
+        ).scalar_one_or_none()
+        if archive is None:
+            return 0
+        
+        spec = ARCHIVE_DATASETS[dataset]
+        table = spec.model.__table__
+        enum_classes = {
+            column.name: column.type.enum_class
+            for column in self._columns(dataset) if getattr(column.type, "enum_class", None)
+        }
+        path = self.file_path(archive)
+        restored = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=ARCHIVE_BATCH_SIZE):
+            rows = batch.to_pylist()
+            for row in rows:
+                for name, enum_class in enum_classes.items():
+                    if row[name] is not None:
+                        row[name] = enum_class(row[name])
+            db.execute(insert(table), rows)
+            if spec.search_type:
+                self._queue_search_updates(db, spec.search_type, tenant_id, [row["id"] for row in rows])
+            restored += len(rows)
+        db.delete(archive)
+        self._touch_datasets(db, tenant_id, spec.versioned_as or dataset)
+        db.commit()
+        os.remove(path)
+        self._data_changed(tenant_id)
+        
+        logger.info(f"Restored {restored} {dataset} of {year} for tenant {tenant_id}")
+        return restored
+    
+    async def list_archives_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        dataset: str,
+        year: Optional[int] = None
+    ) -> List[ArchivedYear]:
+        """List the archives of a tenant's dataset (or of one year), oldest first"""
+        query = select(ArchivedYear).where(
+            ArchivedYear.tenant_id == tenant_id,
+            ArchivedYear.dataset == dataset
+        )
+        if year:
+            query = query.where(ArchivedYear.year == year)
+        result = await db.execute(query.order_by(ArchivedYear.year))
+        return result.scalars().all()
+    
+    def _read_page(
+        self,
+        archive: ArchivedYear,
+        names: Sequence[str],
+        filters: Dict[str, Any],
+        keys: Sequence[Any],
+        cursor: Optional[str],
+        count: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Read the first count live records of an archive past the cursor, newest first.
+        
+        The archive's rows are loaded once, sorted by the keyset, and kept
+        in memory (see _sorted_archive); each page is then a filter and a
+        slice of that table.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        columns = ARCHIVE_DATASETS[archive.dataset].model.__table__.c
+        data = _sorted_archive(
+            self.file_path(archive),
+            tuple(dict.fromkeys([*names, *filters])),
+            tuple(key.key for key in keys)
+        )
+        
+        condition = None
+        for name, value in filters.items():
+            if not value:
+                continue
+            enum_class = getattr(columns[name].type, "enum_class", None)
+            if enum_class is not None:
+                member = enum_class.__members__.get(value)
+                value = member.value if member is not None else value
+            condition = _and(condition, pc.field(name) == pa.scalar(value))
+        if cursor:
+            # (k1, k2, ...) < (v1, v2, ...), spelled out for Arrow
+            values = [
+                pa.scalar(value, type=data.schema.field(key.key).type)
+                for key, value in zip(keys, decode_cursor(cursor, keys))
+            ]
+            after = pc.field(keys[-1].key) < values[-1]
+            for key, value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+                after = (pc.field(key.key) < value) | ((pc.field(key.key) == value) & after)
+            condition = _and(condition, after)
+        
+        if condition is not None:
+            data = data.filter(condition)
+        return data.slice(0, count).select(list(names)).to_pylist()
+    
+    async def list_rows_async(
+        self,
+        db: AsyncSession,
+        archives: Sequence[ArchivedYear],
+        query: Select,
+        model: Any,
+        schema: Type[BaseModel],
+        keys: Sequence[Any],
+        filters: Dict[str, Any],
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Page through a listing that spans archived years, as rows shaped like project() output.
+        
+        query is the listing statement, over the rows still in the table.
+        The table and each archive supply at most one page past the cursor
+        (or skip + limit rows), which are merged by the keyset.
+        """
+        count = limit if cursor else skip + limit
+        hot_rows = (await db.execute(project(apply_keyset(query, keys, 0, count, cursor), model, schema, keys))).all()
+        
+        names = list(schema.model_fields) + [key.key for key in keys if key.key not in schema.model_fields]
+        table = model.__table__
+        stored = [name for name in names if name in table.c]
+        
+        row_type = namedtuple("ArchivedRow", names)
+        rows = [row_type(*row) for row in hot_rows]
+        for archive in archives:
+            records = await asyncio.to_thread(self._read_page, archive, stored, filters, keys, cursor, count)
+            rows.extend(row_type(*(record.get(name) for name in names)) for record in records)
+        rows.sort(key=lambda row: tuple(getattr(row, key.key) for key in keys), reverse=True)
+        if not cursor:
+            rows = rows[skip:]
+        return rows[:limit]
+    
+    async def stream_rows(self, archive: ArchivedYear, columns: Sequence[str]) -> AsyncIterator[List[tuple]]:
+        """Yield an archive's live rows in batches, as tuples of the given columns"""
+        import pyarrow.parquet as pq
+        
+        batches = pq.ParquetFile(self.file_path(archive)).iter_batches(
+            batch_size=ARCHIVE_BATCH_SIZE, columns=[*columns, "is_deleted"]
+        )
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            yield [
+                tuple(record[name] for name in columns)
+                for record in batch.to_pylist() if not record["is_deleted"]
+            ]
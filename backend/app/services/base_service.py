@@ -1,10 +1,453 @@
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Iterable, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import Column, Integer, Row, cast, column, exists, false, func, insert, literal_column, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.orm import Session
+from app.core.database import Base
+from app.core.partitioning import FISCAL_YEAR_PARTITIONED
 from app.models.base import BaseModel as DBBaseModel
+from app.models.dataset import DatasetVersion
+from app.models.search import SearchOutbox
+from app.core.search import elasticsearch_enabled
 
 class BaseService:
     """Base service class"""
     # Esta classe serve apenas como base para outros serviços
     # Cada serviço específico deverá implementar seus próprios métodos
-    pass
-
+    
+    def _touch_datasets(self, db: Session, tenant_id: int, *datasets: str) -> None:
+        """Bump the change counters of a tenant's datasets, inside the caller's transaction"""
+        for dataset in datasets:
+            stmt = pg_insert(DatasetVersion).values(tenant_id=tenant_id, dataset=dataset, version=1)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[DatasetVersion.tenant_id, DatasetVersion.dataset],
+                set_={
+                    "version": DatasetVersion.version + 1,
+                    "updated_at": func.now(),
+                }
+            ))
+    
+    def _queue_search_update(self, db: Session, search_type: str, record: Any, operation: str = "index") -> None:
+        """Queue a record for the search indexer, inside the caller's transaction"""
+        if not elasticsearch_enabled():
+            return
+        if record.id is None:
+            db.flush()
+        db.add(SearchOutbox(
+            tenant_id=record.tenant_id,
+            entity=search_type,
+            entity_id=record.id,
+            operation=operation
+        ))
+    
+    def _queue_search_updates(
+        self,
+        db: Session,
+        search_type: str,
+        tenant_id: int,
+        entity_ids: Iterable[int],
+        operation: str = "index"
+    ) -> None:
+        """Queue many records of a tenant for the search indexer with one INSERT"""
+        if not elasticsearch_enabled():
+            return
+        rows = [
+            {"tenant_id": tenant_id, "entity": search_type, "entity_id": entity_id, "operation": operation}
+            for entity_id in entity_ids
+        ]
+        if rows:
+            db.execute(insert(SearchOutbox), rows)
+    
+    def _column_values(self, model: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the payload fields that are writable columns of the model's table"""
+        columns = model.__table__.c
+        return {
+            field: value for field, value in data.items()
+            # Generated columns are computed by Postgres and cannot be written
+            if field in columns and columns[field].computed is None
+        }
+    
+    def _coerce_enums(self, model: Any, data: Dict[str, Any]) -> Optional[str]:
+        """Convert enum fields (given by value or name) to members in place; return an error message if one is invalid"""
+        columns = model.__table__.c
+        for field, value in data.items():
+            enum_class = getattr(columns[field].type, "enum_class", None)
+            if enum_class is None or value is None or isinstance(value, enum_class):
+                continue
+            member = enum_class.__members__.get(value)
+            if member is None:
+                member = next((m for m in enum_class if m.value == value), None)
+            if member is None:
+                allowed = ", ".join(m.value for m in enum_class)
+                return f"Invalid {field} '{value}' (expected one of: {allowed})"
+            data[field] = member
+        return None
+    
+    def _soft_delete(self, db: Session, model: Any, *conditions: Any) -> List[Row]:
+        """
+        Mark the live rows matching the conditions deleted with one UPDATE ... RETURNING.
+        
+        Returns (id, tenant_id) of each row deleted; the purge job removes
+        them physically once the retention window has passed.
+        """
+        table = model.__table__
+        return db.execute(
+            update(table)
+            .where(*conditions, table.c.is_deleted == false())
+            .values(is_deleted=True, deleted_at=func.now())
+            .returning(table.c.id, table.c.tenant_id)
+        ).all()
+    
+    def _create_record(
+        self,
+        db: Session,
+        model: Any,
+        search_type: str,
+        dataset: str,
+        data: Dict[str, Any],
+        natural_key: Optional[Sequence[Column]] = None
+    ) -> Any:
+        """
+        Create one record and commit.
+        
+        With a natural_key, a live record with the same key is a 409. A
+        soft-deleted one keeps its key (the unique index is not partial),
+        so it is restored with the new values instead, as an upsert would.
+        On a partitioned table the key is checked under an advisory lock.
+        """
+        record = None
+        if natural_key is not None:
+            partition_column = FISCAL_YEAR_PARTITIONED.get(model.__table__.name)
+            if partition_column is not None and partition_column not in [key_column.name for key_column in natural_key]:
+                # The unique index also holds the partition column and cannot enforce the key:
+                # serialize creates of the same key until commit instead
+                lock_name = "|".join([model.__table__.name, *[str(data.get(key_column.name)) for key_column in natural_key]])
+                db.execute(select(func.pg_advisory_xact_lock(func.hashtext(lock_name))))
+            record = db.scalars(
+                select(model)
+                .where(*[key_column == data.get(key_column.name) for key_column in natural_key])
+                .execution_options(include_deleted=True)
+            ).first()
+            if record is not None and not record.is_deleted:
+                key_names = ", ".join(key_column.name for key_column in natural_key)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"A record with the same {key_names} already exists (id {record.id})"
+                )
+        if record is None:
+            record = model(**data)
+            db.add(record)
+        else:
+            for field, value in data.items():
+                setattr(record, field, value)
+            record.is_deleted = False
+            record.deleted_at = None
+        
+        try:
+            self._queue_search_update(db, search_type, record)
+            self._touch_datasets(db, record.tenant_id, dataset)
+            db.commit()
+        except IntegrityError as e:
+            # Another request created the key since the lookup
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Record rejected: {e.orig}"
+            )
+        db.refresh(record)
+        self._data_changed(record.tenant_id)
+        return record
+    
+    def _unreferenced(self, table: Any) -> List[Any]:
+        """Conditions matching only the rows of a table no other table references"""
+        conditions = []
+        for other in Base.metadata.tables.values():
+            for foreign_key in other.foreign_keys:
+                if foreign_key.column.table is table:
+                    conditions.append(~exists().where(foreign_key.parent == foreign_key.column))
+        return conditions
+    
+    def _upsert_rows(
+        self,
+        db: Session,
+        table: Any,
+        natural_key: Sequence[Column],
+        rows: List[Dict[str, Any]]
+    ) -> Dict[Tuple[Any, ...], Tuple[int, Optional[bool]]]:
+        """
+        Insert rows, updating the existing record with the same natural key instead.
+        
+        Records whose values are all unchanged are left alone (no new row
+        version); a soft-deleted record with the key is restored. Returns
+        (id, inserted) by natural key; inserted is None for unchanged
+        records. Rows must not repeat a natural key.
+        
+        On a table partitioned by fiscal year the unique index also holds
+        the partition column, which the natural key leaves out: a record
+        whose date changed is first moved to the new date, so the upsert
+        updates it instead of inserting a second record.
+        """
+        key_names = [key_column.name for key_column in natural_key]
+        conflict_names = key_names
+        moved = set()
+        partition_column = FISCAL_YEAR_PARTITIONED.get(table.name)
+        if partition_column is not None and partition_column not in key_names:
+            conflict_names = [*key_names, partition_column]
+            moved = self._move_partition_keys(db, table, key_names, partition_column, rows)
+        fields = [name for name in rows[0] if name not in conflict_names]
+        
+        stmt = pg_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_names,
+            set_={
+                **{field: stmt.excluded[field] for field in fields},
+                "is_deleted": False,
+                "deleted_at": None,
+                "updated_at": func.now(),
+            },
+            where=tuple_(*[table.c[field] for field in fields]).is_distinct_from(
+                tuple_(*[stmt.excluded[field] for field in fields])
+            ) | table.c.is_deleted
+        ).returning(
+            table.c.id,
+            # xmax is 0 only for freshly inserted row versions
+            literal_column("xmax = 0").label("inserted"),
+            *[table.c[name] for name in key_names]
+        )
+        merged = {tuple(row[2:]): (row.id, row.inserted) for row in db.execute(stmt, rows)}
+        
+        # Unchanged records are not returned by the statement; look their ids up
+        unchanged = [row for row in rows if tuple(row[name] for name in key_names) not in merged]
+        if unchanged:
+            # By the conflict columns, which pick one record even if a key was left on several dates
+            conflict_columns = [table.c[name] for name in conflict_names]
+            found = db.execute(
+                select(table.c.id, *conflict_columns)
+                .where(tuple_(*conflict_columns).in_([tuple(row[name] for name in conflict_names) for row in unchanged]))
+            )
+            for row in found:
+                key = tuple(row[1:len(key_names) + 1])
+                # Only the date changed: still an update
+                merged[key] = (row.id, False if key in moved else None)
+        return merged
+    
+    def _move_partition_keys(
+        self,
+        db: Session,
+        table: Any,
+        key_names: Sequence[str],
+        partition_column: str,
+        rows: List[Dict[str, Any]]
+    ) -> set:
+        """Set the partition column of existing records to the rows' values; returns the moved natural keys"""
+        names = [*key_names, partition_column]
+        incoming = values(
+            *[column(name, table.c[name].type) for name in names],
+            name="incoming_keys"
+        ).data([tuple(row[name] for name in names) for row in rows])
+        # VALUES columns are untyped in Postgres; cast them back to the column types
+        typed = {name: cast(incoming.c[name], table.c[name].type) for name in names}
+        # The unique index holds the date too, so a key may already be on several dates: leave
+        # them alone if one has the new date (the upsert updates it), else move only the oldest
+        other = table.alias("other")
+        same_key = [other.c[name] == table.c[name] for name in key_names]
+        moved = db.execute(
+            update(table)
+            .where(
+                *[table.c[name] == typed[name] for name in key_names],
+                table.c[partition_column].is_distinct_from(typed[partition_column]),
+                ~exists().where(*same_key, other.c[partition_column] == typed[partition_column]),
+                ~exists().where(*same_key, other.c.id < table.c.id)
+            )
+            .values({partition_column: typed[partition_column]})
+            .returning(*[table.c[name] for name in key_names])
+        ).all()
+        return {tuple(row) for row in moved}
+    
+    def _apply_batch(
+        self,
+        db: Session,
+        model: Any,
+        search_type: str,
+        dataset: str,
+        tenant_id: int,
+        batch: Any,
+        natural_key: Optional[Sequence[Column]] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply a batch of creates, updates and deletes of a tenant in one transaction.
+        
+        Creates go out as one multi-row INSERT ... RETURNING, updates as one
+        UPDATE ... FROM (VALUES ...) per set of changed fields, and deletes as
+        one soft-deleting UPDATE ... RETURNING. Invalid items and ids that
+        match no live record of the tenant are reported per item and skipped.
+        
+        With a natural_key the creates are upserts: an item whose key already
+        exists updates that record (only if something changed).
+        """
+        table = model.__table__
+        results: List[Dict[str, Any]] = []
+        
+        def result(operation: str, index: int, item_status: int, item_id: Optional[int] = None, detail: Optional[str] = None):
+            results.append({
+                "operation": operation,
+                "index": index,
+                "id": item_id,
+                "status": item_status,
+                "detail": detail,
+            })
+        
+        try:
+            # Creates
+            rows: List[Dict[str, Any]] = []
+            row_indexes: List[int] = []
+            for index, item in enumerate(batch.create):
+                data = self._column_values(model, item.model_dump())
+                if data.get("tenant_id", tenant_id) != tenant_id:
+                    result("create", index, status.HTTP_400_BAD_REQUEST, detail="tenant_id does not match the batch tenant")
+                    continue
+                error = self._coerce_enums(model, data)
+                if error:
+                    result("create", index, status.HTTP_422_UNPROCESSABLE_ENTITY, detail=error)
+                    continue
+                data["tenant_id"] = tenant_id
+                if natural_key is not None:
+                    missing = [key_column.name for key_column in natural_key if data.get(key_column.name) is None]
+                    if missing:
+                        result("create", index, status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Missing natural key: {', '.join(missing)}")
+                        continue
+                rows.append(data)
+                row_indexes.append(index)
+            
+            created_ids: List[int] = []
+            updated_ids = set()
+            if rows and natural_key is not None:
+                key_names = [key_column.name for key_column in natural_key]
+                keys = [tuple(data[name] for name in key_names) for data in rows]
+                # A key may appear once per statement; the last item with it wins
+                latest = {key: index for key, index in zip(keys, row_indexes)}
+                merged = self._upsert_rows(
+                    db, table, natural_key,
+                    [data for key, index, data in zip(keys, row_indexes, rows) if latest[key] == index]
+                )
+                for key, index in zip(keys, row_indexes):
+                    if latest[key] != index:
+                        result("create", index, status.HTTP_409_CONFLICT, detail=f"Same natural key as item {latest[key]}")
+                        continue
+                    record_id, inserted = merged[key]
+                    if inserted:
+                        created_ids.append(record_id)
+                        result("create", index, status.HTTP_201_CREATED, record_id)
+                    elif inserted is None:
+                        result("create", index, status.HTTP_200_OK, record_id, "Unchanged")
+                    else:
+                        updated_ids.add(record_id)
+                        result("create", index, status.HTTP_200_OK, record_id, "Updated")
+            elif rows:
+                created_ids = db.scalars(
+                    insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                    rows
+                ).all()
+                for index, created_id in zip(row_indexes, created_ids):
+                    result("create", index, status.HTTP_201_CREATED, created_id)
+            
+            # Updates, one statement per set of changed fields
+            changes_by_item: List[Tuple[int, int, Dict[str, Any]]] = []
+            for index, item in enumerate(batch.update):
+                data = self._column_values(model, item.model_dump(exclude_unset=True))
+                data.pop("id", None)
+                data.pop("tenant_id", None)  # Records never move between tenants
+                error = self._coerce_enums(model, data)
+                if error:
+                    result("update", index, status.HTTP_422_UNPROCESSABLE_ENTITY, item.id, error)
+                    continue
+                changes_by_item.append((index, item.id, data))
+            
+            # An id may appear once per batch; the last item with it wins
+            latest_update = {item_id: index for index, item_id, _ in changes_by_item}
+            groups: Dict[Tuple[str, ...], List[Tuple[int, int, Dict[str, Any]]]] = {}
+            for index, item_id, data in changes_by_item:
+                if latest_update[item_id] != index:
+                    result("update", index, status.HTTP_409_CONFLICT, item_id, f"Same id as item {latest_update[item_id]}")
+                    continue
+                groups.setdefault(tuple(sorted(data)), []).append((index, item_id, data))
+            
+            for fields, items in groups.items():
+                changes = values(
+                    column("id", Integer),
+                    *[column(field, table.c[field].type) for field in fields],
+                    name="batch_values"
+                ).data([(item_id, *[data[field] for field in fields]) for _, item_id, data in items])
+                # VALUES columns are untyped in Postgres; cast them back to the column types
+                assignments = {field: cast(changes.c[field], table.c[field].type) for field in fields}
+                # Judge each item by its own statement, not by ids updated elsewhere in the batch
+                group_ids = set(db.scalars(
+                    update(table)
+                    .where(table.c.id == changes.c.id, table.c.tenant_id == tenant_id, table.c.is_deleted == false())
+                    .values(assignments or {"updated_at": func.now()})
+                    .returning(table.c.id)
+                ).all())
+                updated_ids.update(group_ids)
+                for index, item_id, _ in items:
+                    if item_id in group_ids:
+                        result("update", index, status.HTTP_200_OK, item_id)
+                    else:
+                        result("update", index, status.HTTP_404_NOT_FOUND, item_id, "Not found")
+            
+            # Deletes
+            deleted_ids = set()
+            if batch.delete:
+                deleted_ids = {
+                    row.id for row in self._soft_delete(
+                        db, model, table.c.id.in_(batch.delete), table.c.tenant_id == tenant_id
+                    )
+                }
+            for index, item_id in enumerate(batch.delete):
+                if item_id in deleted_ids:
+                    result("delete", index, status.HTTP_200_OK, item_id)
+                else:
+                    result("delete", index, status.HTTP_404_NOT_FOUND, item_id, "Not found")
+            
+            changed = bool(created_ids or updated_ids or deleted_ids)
+            if changed:
+                self._queue_search_updates(db, search_type, tenant_id, [*created_ids, *updated_ids])
+                self._queue_search_updates(db, search_type, tenant_id, deleted_ids, "delete")
+                self._touch_datasets(db, tenant_id, dataset)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Batch rejected: {e.orig}"
+            )
+        except DataError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Batch rejected: {e.orig}"
+            )
+        
+        if changed:
+            self._data_changed(tenant_id)
+        
+        operation_order = {"create": 0, "update": 1, "delete": 2}
+        results.sort(key=lambda r: (operation_order[r["operation"]], r["index"]))
+        return {
+            "created": len(created_ids),
+            "updated": len(updated_ids),
+            "deleted": len(deleted_ids),
+            "results": results,
+        }
+    
+    def _data_changed(self, tenant_id: int) -> None:
+        """
+        Called after a commit that changed a tenant's public data.
+        
+        Cached public responses need no invalidation: they are keyed by the
+        DatasetVersion counters the write bumped in its transaction.
+        """
+        # Imported here: the task module depends on the services
+        from app.tasks.dashboard import schedule_dashboard_refresh
+        
+        schedule_dashboard_refresh(tenant_id)
@@ -1,20 +1,38 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Sequence
 from datetime import datetime
+from sqlalchemy import Row, select, func
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.models.contract import Contract, Bidding
-from app.schemas.contract import ContractCreate, ContractUpdate, BiddingCreate, BiddingUpdate
+from app.schemas.contract import (
+    ContractCreate, ContractUpdate, BiddingCreate, BiddingUpdate,
+    ContractBatch, BiddingBatch, ContractResponse, BiddingResponse
+)
+from app.core.pagination import apply_keyset
+from app.core.projection import project
+from app.core.search import search_match, search_rank
 from app.services.base_service import BaseService
+from app.services.archive_service import ArchiveService
 
 class ContractService(BaseService):
+    # Sort keys used for listing and cursor pagination
+    CONTRACT_KEYSET = (Contract.created_at, Contract.id)
+    BIDDING_KEYSET = (Bidding.created_at, Bidding.id)
+    # Natural keys of upserted records (see uq_contracts_natural_key and uq_biddings_natural_key)
+    CONTRACT_NATURAL_KEY = (Contract.tenant_id, Contract.number, Contract.year)
+    BIDDING_NATURAL_KEY = (Bidding.tenant_id, Bidding.number, Bidding.year)
+    
+    def __init__(self):
+        self.archive_service = ArchiveService()
+    
     def create_contract(self, db: Session, contract_create: ContractCreate) -> Contract:
         """Create a new contract"""
-        contract = Contract(**contract_create.model_dump())
-        db.add(contract)
-        db.commit()
-        db.refresh(contract)
-        return contract
+        return self._create_record(
+            db, Contract, "contract", "contracts", contract_create.model_dump(), self.CONTRACT_NATURAL_KEY
+        )
     
     def update_contract(self, db: Session, contract_id: int, contract_update: ContractUpdate) -> Contract:
         """Update an existing contract"""
@@ -29,8 +47,11 @@ class ContractService(BaseService):
         for field, value in update_data.items():
             setattr(contract, field, value)
             
+        self._queue_search_update(db, "contract", contract)
+        self._touch_datasets(db, contract.tenant_id, "contracts")
         db.commit()
         db.refresh(contract)
+        self._data_changed(contract.tenant_id)
         return contract
     
     def get_contract(self, db: Session, contract_id: int) -> Contract:
@@ -51,7 +72,8 @@ class ContractService(BaseService):
         limit: int = 100,
         status: Optional[str] = None,
         year: Optional[int] = None,
-        category: Optional[str] = None
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Contract]:
         """List contracts with optional filters"""
         query = db.query(Contract).filter(Contract.tenant_id == tenant_id)
@@ -69,28 +91,30 @@ class ContractService(BaseService):
         if category:
             query = query.filter(Contract.category == category)
             
-        return query.order_by(Contract.created_at.desc()).offset(skip).limit(limit).all()
+        query = apply_keyset(query, self.CONTRACT_KEYSET, skip, limit, cursor)
+        return query.all()
     
     def delete_contract(self, db: Session, contract_id: int) -> bool:
-        """Delete a contract"""
-        contract = db.query(Contract).filter(Contract.id == contract_id).first()
-        if not contract:
+        """Soft-delete a contract"""
+        deleted = self._soft_delete(db, Contract, Contract.id == contract_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Contract not found"
             )
-            
-        db.delete(contract)
+        
+        tenant_id = deleted[0].tenant_id
+        self._queue_search_updates(db, "contract", tenant_id, [contract_id], "delete")
+        self._touch_datasets(db, tenant_id, "contracts")
         db.commit()
+        self._data_changed(tenant_id)
         return True
     
     def create_bidding(self, db: Session, bidding_create: BiddingCreate) -> Bidding:
         """Create a new bidding"""
-        bidding = Bidding(**bidding_create.model_dump())
-        db.add(bidding)
-        db.commit()
-        db.refresh(bidding)
-        return bidding
+        return self._create_record(
+            db, Bidding, "bidding", "biddings", bidding_create.model_dump(), self.BIDDING_NATURAL_KEY
+        )
     
     def update_bidding(self, db: Session, bidding_id: int, bidding_update: BiddingUpdate) -> Bidding:
         """Update an existing bidding"""
@@ -105,8 +129,11 @@ class ContractService(BaseService):
         for field, value in update_data.items():
             setattr(bidding, field, value)
             
+        self._queue_search_update(db, "bidding", bidding)
+        self._touch_datasets(db, bidding.tenant_id, "biddings")
         db.commit()
         db.refresh(bidding)
+        self._data_changed(bidding.tenant_id)
         return bidding
     
     def get_bidding(self, db: Session, bidding_id: int) -> Bidding:
@@ -127,7 +154,8 @@ class ContractService(BaseService):
         limit: int = 100,
         status: Optional[str] = None,
         year: Optional[int] = None,
-        modality: Optional[str] = None
+        modality: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Bidding]:
         """List biddings with optional filters"""
         query = db.query(Bidding).filter(Bidding.tenant_id == tenant_id)
@@ -145,36 +173,122 @@ class ContractService(BaseService):
         if modality:
             query = query.filter(Bidding.modality == modality)
             
-        return query.order_by(Bidding.created_at.desc()).offset(skip).limit(limit).all()
+        query = apply_keyset(query, self.BIDDING_KEYSET, skip, limit, cursor)
+        return query.all()
     
     def delete_bidding(self, db: Session, bidding_id: int) -> bool:
-        """Delete a bidding"""
-        bidding = db.query(Bidding).filter(Bidding.id == bidding_id).first()
-        if not bidding:
+        """Soft-delete a bidding"""
+        deleted = self._soft_delete(db, Bidding, Bidding.id == bidding_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bidding not found"
             )
-            
-        db.delete(bidding)
+        
+        tenant_id = deleted[0].tenant_id
+        self._queue_search_updates(db, "bidding", tenant_id, [bidding_id], "delete")
+        self._touch_datasets(db, tenant_id, "biddings")
         db.commit()
+        self._data_changed(tenant_id)
         return True
     
+    def batch_contracts(self, db: Session, tenant_id: int, batch: ContractBatch, upsert: bool = False) -> Dict[str, Any]:
+        """Create (or upsert by number/year), update and delete contracts of a tenant in one transaction"""
+        natural_key = self.CONTRACT_NATURAL_KEY if upsert else None
+        return self._apply_batch(db, Contract, "contract", "contracts", tenant_id, batch, natural_key)
+    
+    def batch_biddings(self, db: Session, tenant_id: int, batch: BiddingBatch, upsert: bool = False) -> Dict[str, Any]:
+        """Create (or upsert by number/year), update and delete biddings of a tenant in one transaction"""
+        natural_key = self.BIDDING_NATURAL_KEY if upsert else None
+        return self._apply_batch(db, Bidding, "bidding", "biddings", tenant_id, batch, natural_key)
+    
+    def _public_contracts_query(
+        self,
+        tenant_id: int,
+        status: Optional[str] = None,
+        year: Optional[int] = None
+    ) -> Select:
+        """Build the public contract listing statement"""
+        query = select(Contract).where(Contract.tenant_id == tenant_id)
+        
+        if status:
+            query = query.where(Contract.status == status)
+        if year:
+            query = query.where(Contract.year == year)
+            
+        return query
+    
+    def _public_biddings_query(
+        self,
+        tenant_id: int,
+        status: Optional[str] = None,
+        modality: Optional[str] = None,
+        year: Optional[int] = None
+    ) -> Select:
+        """Build the public bidding listing statement"""
+        query = select(Bidding).where(Bidding.tenant_id == tenant_id)
+        
+        if status:
+            query = query.where(Bidding.status == status)
+        if modality:
+            query = query.where(Bidding.modality == modality)
+        if year:
+            query = query.where(Bidding.year == year)
+            
+        return query
+    
     def get_public_contracts(
         self, 
         db: Session, 
         tenant_id: int,
         skip: int = 0,
         limit: int = 10,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Contract]:
         """Get public contracts for a tenant"""
-        query = db.query(Contract).filter(Contract.tenant_id == tenant_id)
-        
-        if status:
-            query = query.filter(Contract.status == status)
-            
-        return query.order_by(Contract.created_at.desc()).offset(skip).limit(limit).all()
+        query = self._public_contracts_query(tenant_id, status)
+        query = apply_keyset(query, self.CONTRACT_KEYSET, skip, limit, cursor)
+        return db.execute(query).scalars().all()
+    
+    async def get_public_contracts_async(
+        self, 
+        db: AsyncSession, 
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> List[Contract]:
+        """Get public contracts for a tenant (async)"""
+        query = self._public_contracts_query(tenant_id, status)
+        query = apply_keyset(query, self.CONTRACT_KEYSET, skip, limit, cursor)
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    async def get_public_contract_rows_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        year: Optional[int] = None
+    ) -> Sequence[Row]:
+        """Get public contracts as plain rows of ContractResponse fields, for dump_rows() (async)"""
+        query = self._public_contracts_query(tenant_id, status, year)
+        # Archived years (all of them, unless one is asked for) are read from cold
+        # storage and merged with the rows kept in the table
+        archives = await self.archive_service.list_archives_async(db, tenant_id, "contracts", year)
+        if archives:
+            return await self.archive_service.list_rows_async(
+                db, archives, query, Contract, ContractResponse, self.CONTRACT_KEYSET,
+                {"status": status}, skip, limit, cursor
+            )
+        query = apply_keyset(query, self.CONTRACT_KEYSET, skip, limit, cursor)
+        result = await db.execute(project(query, Contract, ContractResponse, self.CONTRACT_KEYSET))
+        return result.all()
     
     def get_public_biddings(
         self, 
@@ -182,12 +296,153 @@ class ContractService(BaseService):
         tenant_id: int,
         skip: int = 0,
         limit: int = 10,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        modality: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Bidding]:
         """Get public biddings for a tenant"""
-        query = db.query(Bidding).filter(Bidding.tenant_id == tenant_id)
+        query = self._public_biddings_query(tenant_id, status, modality)
+        query = apply_keyset(query, self.BIDDING_KEYSET, skip, limit, cursor)
+        return db.execute(query).scalars().all()
+    
+    async def get_public_biddings_async(
+        self, 
+        db: AsyncSession, 
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[str] = None,
+        modality: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> List[Bidding]:
+        """Get public biddings for a tenant (async)"""
+        query = self._public_biddings_query(tenant_id, status, modality)
+        query = apply_keyset(query, self.BIDDING_KEYSET, skip, limit, cursor)
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    async def get_public_bidding_rows_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[str] = None,
+        modality: Optional[str] = None,
+        cursor: Optional[str] = None,
+        year: Optional[int] = None
+    ) -> Sequence[Row]:
+        """Get public biddings as plain rows of BiddingResponse fields, for dump_rows() (async)"""
+        query = self._public_biddings_query(tenant_id, status, modality, year)
+        # Archived years (all of them, unless one is asked for) are read from cold
+        # storage and merged with the rows kept in the table
+        archives = await self.archive_service.list_archives_async(db, tenant_id, "biddings", year)
+        if archives:
+            return await self.archive_service.list_rows_async(
+                db, archives, query, Bidding, BiddingResponse, self.BIDDING_KEYSET,
+                {"status": status, "modality": modality}, skip, limit, cursor
+            )
+        query = apply_keyset(query, self.BIDDING_KEYSET, skip, limit, cursor)
+        result = await db.execute(project(query, Bidding, BiddingResponse, self.BIDDING_KEYSET))
+        return result.all()
+    
+    def _search_contracts_query(self, tenant_id: int, q: str) -> Select:
+        """Build the contract full-text search statement, most relevant first"""
+        return select(Contract).where(
+            Contract.tenant_id == tenant_id,
+            search_match(Contract.search_vector, q)
+        ).order_by(search_rank(Contract.search_vector, q).desc(), Contract.created_at.desc())
+    
+    def _search_biddings_query(self, tenant_id: int, q: str) -> Select:
+        """Build the bidding full-text search statement, most relevant first"""
+        return select(Bidding).where(
+            Bidding.tenant_id == tenant_id,
+            search_match(Bidding.search_vector, q)
+        ).order_by(search_rank(Bidding.search_vector, q).desc(), Bidding.created_at.desc())
+    
+    def search_contracts(
+        self,
+        db: Session,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Contract]:
+        """Search contracts by object or description"""
+        query = self._search_contracts_query(tenant_id, q)
+        return db.execute(query.offset(skip).limit(limit)).scalars().all()
+    
+    async def search_contracts_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Contract]:
+        """Search contracts by object or description (async)"""
+        query = self._search_contracts_query(tenant_id, q)
+        result = await db.execute(query.offset(skip).limit(limit))
+        return result.scalars().all()
+    
+    def search_biddings(
+        self,
+        db: Session,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Bidding]:
+        """Search biddings by object or description"""
+        query = self._search_biddings_query(tenant_id, q)
+        return db.execute(query.offset(skip).limit(limit)).scalars().all()
+    
+    async def search_biddings_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Bidding]:
+        """Search biddings by object or description (async)"""
+        query = self._search_biddings_query(tenant_id, q)
+        result = await db.execute(query.offset(skip).limit(limit))
+        return result.scalars().all()
+    
+    def _summary_query(self, tenant_id: int) -> Select:
+        """Build the per-status contract aggregate statement"""
+        return select(
+            Contract.status,
+            func.count(Contract.id),
+            func.coalesce(func.sum(Contract.current_value), 0),
+            func.coalesce(func.sum(Contract.executed_value), 0)
+        ).where(Contract.tenant_id == tenant_id).group_by(Contract.status)
+    
+    def _build_summary(self, rows) -> Dict[str, Any]:
+        """Fold per-status aggregate rows into the contract summary"""
+        contracts_by_status: Dict[str, int] = {}
+        total_value = 0.0
+        executed_value = 0.0
+        for contract_status, count, current_value, executed in rows:
+            key = contract_status.value if hasattr(contract_status, "value") else str(contract_status)
+            contracts_by_status[key] = count
+            total_value += float(current_value)
+            executed_value += float(executed)
         
-        if status:
-            query = query.filter(Bidding.status == status)
-            
-        return query.order_by(Bidding.created_at.desc()).offset(skip).limit(limit).all()
+        return {
+            "total_contracts": sum(contracts_by_status.values()),
+            "contracts_by_status": contracts_by_status,
+            "total_value": total_value,
+            "executed_value": executed_value
+        }
+    
+    def get_summary(self, db: Session, tenant_id: int) -> Dict[str, Any]:
+        """Get contract summary for a tenant"""
+        rows = db.execute(self._summary_query(tenant_id)).all()
+        return self._build_summary(rows)
+    
+    async def get_summary_async(self, db: AsyncSession, tenant_id: int) -> Dict[str, Any]:
+        """Get contract summary for a tenant (async)"""
+        rows = (await db.execute(self._summary_query(tenant_id))).all()
+        return self._build_summary(rows)
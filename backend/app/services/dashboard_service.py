@@ -0,0 +1,85 @@
+from typing import Any, Dict, List, Optional, Sequence
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.dataset import DatasetVersion, DashboardSnapshot
+from app.services.base_service import BaseService
+from app.services.financial_service import FinancialService
+from app.services.contract_service import ContractService
+from app.services.esic_service import ESICService
+
+class DashboardService(BaseService):
+    # Datasets a dashboard snapshot is built from
+    SNAPSHOT_DATASETS = ("revenues", "expenses", "contracts", "esic")
+    
+    def __init__(self):
+        self.financial_service = FinancialService()
+        self.contract_service = ContractService()
+        self.esic_service = ESICService()
+    
+    def _versions(self, rows: Sequence[Any]) -> Dict[str, int]:
+        """Map DatasetVersion rows of the snapshot datasets to their counters"""
+        return {
+            row.dataset: row.version
+            for row in rows
+            if row.dataset in self.SNAPSHOT_DATASETS
+        }
+    
+    def build_sections(self, db: Session, tenant_id: int, year: int) -> Dict[str, Any]:
+        """Compute the financial, contract and e-SIC sections of a dashboard"""
+        return jsonable_encoder({
+            "financial": self.financial_service.get_financial_summary(db, tenant_id, year),
+            "contracts": self.contract_service.get_summary(db, tenant_id),
+            "esic": self.esic_service.get_esic_stats(db, tenant_id, year),
+        })
+    
+    def refresh_snapshot(self, db: Session, tenant_id: int, year: int) -> None:
+        """Rebuild and store the dashboard snapshot of a tenant and year"""
+        # Read the counters before the data: a write racing with the build
+        # leaves the snapshot labelled with older versions, i.e. stale
+        version_rows = db.execute(
+            select(DatasetVersion).where(DatasetVersion.tenant_id == tenant_id)
+        ).scalars().all()
+        versions = self._versions(version_rows)
+        data = self.build_sections(db, tenant_id, year)
+        
+        stmt = pg_insert(DashboardSnapshot).values(
+            tenant_id=tenant_id, year=year, data=data, versions=versions
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DashboardSnapshot.tenant_id, DashboardSnapshot.year],
+            set_={
+                "data": stmt.excluded.data,
+                "versions": stmt.excluded.versions,
+                "updated_at": func.now(),
+            }
+        ))
+        db.commit()
+    
+    def get_snapshot_years(self, db: Session, tenant_id: int) -> List[int]:
+        """Get the years a tenant has dashboard snapshots for"""
+        return db.execute(
+            select(DashboardSnapshot.year).where(DashboardSnapshot.tenant_id == tenant_id)
+        ).scalars().all()
+    
+    async def get_fresh_snapshot_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        year: int,
+        version_rows: Sequence[Any]
+    ) -> Optional[DashboardSnapshot]:
+        """Get the snapshot of a tenant and year if it matches the current dataset versions"""
+        result = await db.execute(
+            select(DashboardSnapshot).where(
+                DashboardSnapshot.tenant_id == tenant_id,
+                DashboardSnapshot.year == year
+            )
+        )
+        snapshot = result.scalars().first()
+        if snapshot is None or snapshot.versions != self._versions(version_rows):
+            return None
+        return snapshot
@@ -1,31 +1,49 @@
 from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, extract, delete, case, literal, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
+import re
 import uuid
 
-from app.models.esic import ESICRequest, ESICAttachment
+from app.core.config import settings
+from app.models.esic import ESICRequest, ESICAttachment, ESICStatistics, ESICStatus, ESICCategory
 from app.schemas.esic import ESICRequestCreate, ESICRequestUpdate, ESICAttachmentCreate, ESICStatsResponse
+from app.core.pagination import apply_keyset
 from app.services.base_service import BaseService
 
+# Protocol numbers are generated as ESIC-<8 hex digits>
+PROTOCOL_PATTERN = re.compile(r"ESIC-[0-9A-F]{0,8}")
+
 class ESICService(BaseService):
+    # Sort keys used for listing and cursor pagination
+    REQUEST_KEYSET = (ESICRequest.created_at, ESICRequest.id)
+    
     def create_esic_request(self, db: Session, esic_request: ESICRequestCreate) -> ESICRequest:
         """Create a new ESIC request"""
         # Generate unique protocol number
         protocol = f"ESIC-{uuid.uuid4().hex[:8].upper()}"
         
         # Create new ESIC request
+        request_date = datetime.now(timezone.utc)
         db_esic_request = ESICRequest(
             **esic_request.model_dump(),
             protocol=protocol,
-            status="open",
+            status=ESICStatus.PENDING,
+            request_date=request_date,
+            due_date=(request_date + timedelta(days=settings.LAI_RESPONSE_DAYS)).date(),
             is_public=False
         )
         
         db.add(db_esic_request)
+        self._record_request_created(db, db_esic_request)
+        self._touch_datasets(db, db_esic_request.tenant_id, "esic")
         db.commit()
         db.refresh(db_esic_request)
+        self._data_changed(db_esic_request.tenant_id)
         return db_esic_request
     
     def update_esic_request(self, db: Session, request_id: int, update_data: ESICRequestUpdate) -> ESICRequest:
@@ -42,13 +60,16 @@ class ESICService(BaseService):
         for key, value in update_dict.items():
             setattr(esic_request, key, value)
         
-        # If updating response, set responded_at
-        if "response_text" in update_dict and update_dict["response_text"]:
-            esic_request.responded_at = datetime.utcnow()
-            esic_request.status = "closed"
+        # If updating response for the first time, record the answer
+        if update_dict.get("response_text") and esic_request.response_date is None:
+            esic_request.response_date = datetime.now(timezone.utc)
+            esic_request.status = ESICStatus.ANSWERED
+            self._record_request_answered(db, esic_request)
         
+        self._touch_datasets(db, esic_request.tenant_id, "esic")
         db.commit()
         db.refresh(esic_request)
+        self._data_changed(esic_request.tenant_id)
         return esic_request
     
     def get_esic_request(self, db: Session, request_id: int) -> ESICRequest:
@@ -77,15 +98,24 @@ class ESICService(BaseService):
         tenant_id: int,
         skip: int = 0,
         limit: int = 100,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[ESICRequest]:
         """List ESIC requests with optional filtering"""
         query = db.query(ESICRequest).filter(ESICRequest.tenant_id == tenant_id)
         
         if status:
             query = query.filter(ESICRequest.status == status)
-            
-        return query.order_by(ESICRequest.created_at.desc()).offset(skip).limit(limit).all()
+        
+        query = apply_keyset(query, self.REQUEST_KEYSET, skip, limit, cursor)
+        return query.all()
+    
+    def protocol_prefix(self, query: str) -> Optional[str]:
+        """Return the normalized protocol if the query is a (partial) protocol number"""
+        candidate = query.strip().upper()
+        if PROTOCOL_PATTERN.fullmatch(candidate):
+            return candidate
+        return None
     
     def search_public_requests(
         self,
@@ -93,30 +123,79 @@ class ESICService(BaseService):
         tenant_id: int,
         skip: int = 0,
         limit: int = 10,
-        query: Optional[str] = None
-    ) -> tuple[List[ESICRequest], int]:
-        """Search public ESIC requests"""
-        db_query = db.query(ESICRequest).filter(
+        query: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = True
+    ) -> tuple[List[ESICRequest], Optional[int]]:
+        """
+        Search public ESIC requests.
+        
+        Protocol numbers go through an indexed prefix lookup; other text is
+        matched through the trigram indexes (substring or fuzzy word match)
+        and ranked by similarity, paged with skip. The total comes from a
+        window count in the same query. Cursor pages, and callers passing
+        with_total=False, get None instead: the window count would have to
+        scan every match, which defeats keyset pagination.
+        """
+        conditions = [
             ESICRequest.tenant_id == tenant_id,
             ESICRequest.is_public == True
-        )
+        ]
+        rank = None
         
         if query:
-            # Search in protocol, subject, and description
-            search_term = f"%{query}%"
-            db_query = db_query.filter(
-                ESICRequest.protocol.ilike(search_term) |
-                ESICRequest.subject.ilike(search_term) |
-                ESICRequest.description.ilike(search_term)
-            )
+            protocol = self.protocol_prefix(query)
+            if protocol:
+                conditions.append(ESICRequest.protocol.like(f"{protocol}%"))
+            else:
+                # Search in subject and description
+                search_term = f"%{query}%"
+                conditions.append(or_(
+                    ESICRequest.subject.ilike(search_term),
+                    ESICRequest.description.ilike(search_term),
+                    literal(query).op("<%")(ESICRequest.subject)
+                ))
+                rank = func.greatest(
+                    func.word_similarity(query, ESICRequest.subject),
+                    func.word_similarity(query, ESICRequest.description)
+                )
+        
+        if rank is not None and not with_total:
+            # Ranked page without the window count
+            statement = select(ESICRequest).where(*conditions).order_by(
+                rank.desc(), ESICRequest.created_at.desc(), ESICRequest.id.desc()
+            ).offset(skip).limit(limit)
+            return db.execute(statement).scalars().all(), None
+        if rank is None and (cursor or not with_total):
+            # Plain keyset page, served by the public listing index
+            statement = apply_keyset(select(ESICRequest).where(*conditions), self.REQUEST_KEYSET, skip, limit, cursor)
+            return db.execute(statement).scalars().all(), None
+        
+        # Count every match before paginating, in the same statement
+        columns = [ESICRequest, func.count().over().label("total")]
+        if rank is not None:
+            columns.append(rank.label("rank"))
+        matches = select(*columns).where(*conditions).subquery("matches")
+        request = aliased(ESICRequest, matches)
         
-        # Get total count
-        total = db_query.count()
+        statement = select(request, matches.c.total)
+        if rank is not None:
+            statement = statement.order_by(
+                matches.c.rank.desc(), request.created_at.desc(), request.id.desc()
+            ).offset(skip).limit(limit)
+        else:
+            statement = apply_keyset(statement, (request.created_at, request.id), skip, limit)
         
-        # Get paginated results
-        results = db_query.order_by(ESICRequest.created_at.desc()).offset(skip).limit(limit).all()
+        rows = db.execute(statement).all()
+        if rows:
+            total = rows[0].total
+        elif skip:
+            # Page past the end: the window count has no row to ride on
+            total = db.execute(select(func.count()).select_from(matches)).scalar_one()
+        else:
+            total = 0
         
-        return results, total
+        return [row[0] for row in rows], total
     
     def add_attachment(self, db: Session, attachment: ESICAttachmentCreate) -> ESICAttachment:
         """Add an attachment to an ESIC request"""
@@ -141,47 +220,166 @@ class ESICService(BaseService):
         return db.query(ESICAttachment).filter(ESICAttachment.request_id == request_id).all()
     
     def delete_attachment(self, db: Session, attachment_id: int) -> bool:
-        """Delete an attachment"""
-        attachment = db.query(ESICAttachment).filter(ESICAttachment.id == attachment_id).first()
-        if not attachment:
+        """Soft-delete an attachment"""
+        deleted = self._soft_delete(db, ESICAttachment, ESICAttachment.id == attachment_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Attachment not found"
             )
         
-        db.delete(attachment)
         db.commit()
         return True
     
-    def get_esic_stats(self, db: Session, tenant_id: int) -> ESICStatsResponse:
-        """Get ESIC statistics for a tenant"""
-        # Get all requests for the tenant
-        requests = db.query(ESICRequest).filter(ESICRequest.tenant_id == tenant_id).all()
+    # Columns of ESICStatistics that count requests per category
+    CATEGORY_COUNTERS = {
+        ESICCategory.FINANCIAL: "financial_requests",
+        ESICCategory.CONTRACTS: "contracts_requests",
+        ESICCategory.PERSONNEL: "personnel_requests",
+    }
+    
+    def _category_counter(self, category: Any) -> str:
+        """Get the ESICStatistics counter column for a request category"""
+        return self.CATEGORY_COUNTERS.get(category, "other_requests")
+    
+    def _upsert_statistics(self, db: Session, tenant_id: int, period: datetime, increments: Dict[str, int]):
+        """Add increments to the rollup row of a tenant and period, creating it if needed"""
+        stmt = pg_insert(ESICStatistics).values(
+            tenant_id=tenant_id,
+            year=period.year,
+            month=period.month,
+            **increments
+        )
+        update_set = {
+            column: getattr(ESICStatistics, column) + value
+            for column, value in increments.items()
+        }
+        if "total_response_seconds" in increments:
+            # Keep the integer average (in days) in step with the exact sum
+            update_set["avg_response_time"] = (
+                (ESICStatistics.total_response_seconds + increments["total_response_seconds"])
+                // (ESICStatistics.answered_requests + increments["answered_requests"])
+                // 86400
+            )
+        update_set["updated_at"] = func.now()
+        
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["tenant_id", "year", "month"],
+            set_=update_set
+        ))
+    
+    def _record_request_created(self, db: Session, esic_request: ESICRequest):
+        """Count a new request in the rollup of its period"""
+        self._upsert_statistics(db, esic_request.tenant_id, esic_request.request_date, {
+            "total_requests": 1,
+            self._category_counter(esic_request.category): 1,
+        })
+    
+    def _record_request_answered(self, db: Session, esic_request: ESICRequest):
+        """Count an answer (and its response time) in the rollup of the request period"""
+        response_seconds = int((esic_request.response_date - esic_request.request_date).total_seconds())
+        answered_late = 1 if esic_request.response_date.date() > esic_request.due_date else 0
         
-        # Count total, open, and closed requests
-        total_requests = len(requests)
-        open_requests = len([r for r in requests if r.status == "open"])
-        closed_requests = len([r for r in requests if r.status == "closed"])
+        self._upsert_statistics(db, esic_request.tenant_id, esic_request.request_date, {
+            "answered_requests": 1,
+            "overdue_requests": answered_late,
+            "total_response_seconds": response_seconds,
+            "avg_response_time": response_seconds // 86400,
+        })
+    
+    def rebuild_statistics(self, db: Session, tenant_id: int) -> None:
+        """
+        Recompute the ESICStatistics rollup of a tenant from esic_requests with
+        a single aggregate query. Used to backfill or repair the incremental counters.
+        """
+        request_date = func.timezone(literal_column("'UTC'"), ESICRequest.request_date)
+        response_seconds = extract("epoch", ESICRequest.response_date - ESICRequest.request_date)
+        answered = ESICRequest.response_date.isnot(None)
+        
+        def category_count(category: ESICCategory):
+            return func.count().filter(ESICRequest.category == category)
         
-        # Calculate average response time
-        response_times = []
-        for request in requests:
-            if request.status == "closed" and request.responded_at:
-                response_time = (request.responded_at - request.created_at).total_seconds()
-                response_times.append(response_time)
+        aggregate = select(
+            ESICRequest.tenant_id,
+            extract("year", request_date).label("year"),
+            extract("month", request_date).label("month"),
+            func.count().label("total_requests"),
+            func.count().filter(answered).label("answered_requests"),
+            func.count().filter(func.date(ESICRequest.response_date) > ESICRequest.due_date).label("overdue_requests"),
+            func.count().filter(ESICRequest.has_appeal.is_(True)).label("appealed_requests"),
+            func.coalesce(func.sum(response_seconds).filter(answered), 0).label("total_response_seconds"),
+            case(
+                (func.count().filter(answered) > 0,
+                 func.floor(func.sum(response_seconds).filter(answered) / func.count().filter(answered) / 86400)),
+                else_=0
+            ).label("avg_response_time"),
+            category_count(ESICCategory.FINANCIAL).label("financial_requests"),
+            category_count(ESICCategory.CONTRACTS).label("contracts_requests"),
+            category_count(ESICCategory.PERSONNEL).label("personnel_requests"),
+            func.count().filter(ESICRequest.category.notin_(list(self.CATEGORY_COUNTERS))).label("other_requests"),
+        ).where(ESICRequest.tenant_id == tenant_id).group_by(
+            ESICRequest.tenant_id,
+            extract("year", request_date),
+            extract("month", request_date)
+        )
+        
+        columns = [column.name for column in aggregate.selected_columns]
+        db.execute(delete(ESICStatistics).where(ESICStatistics.tenant_id == tenant_id))
+        db.execute(pg_insert(ESICStatistics).from_select(columns, aggregate))
+        self._touch_datasets(db, tenant_id, "esic")
+        db.commit()
+        self._data_changed(tenant_id)
+    
+    def _statistics_query(self, tenant_id: int, year: Optional[int] = None) -> Select:
+        """Build the statement that loads the rollup rows of a tenant"""
+        query = select(ESICStatistics).where(ESICStatistics.tenant_id == tenant_id)
+        
+        if year:
+            query = query.where(ESICStatistics.year == year)
+        
+        return query.order_by(ESICStatistics.year, ESICStatistics.month)
+    
+    def get_esic_stats(self, db: Session, tenant_id: int, year: Optional[int] = None) -> ESICStatsResponse:
+        """Get ESIC statistics for a tenant"""
+        rows = db.execute(self._statistics_query(tenant_id, year)).scalars().all()
+        return self._build_stats(rows)
+    
+    async def get_esic_stats_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        year: Optional[int] = None
+    ) -> ESICStatsResponse:
+        """Get ESIC statistics for a tenant (async)"""
+        rows = (await db.execute(self._statistics_query(tenant_id, year))).scalars().all()
+        return self._build_stats(rows)
+    
+    async def get_public_stats_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        year: Optional[int] = None
+    ) -> ESICStatsResponse:
+        """Get public ESIC statistics for a tenant (async)"""
+        return await self.get_esic_stats_async(db, tenant_id, year)
+    
+    def _build_stats(self, rows: List[ESICStatistics]) -> ESICStatsResponse:
+        """Fold monthly rollup rows into the statistics response"""
+        total_requests = sum(row.total_requests for row in rows)
+        closed_requests = sum(row.answered_requests for row in rows)
+        open_requests = total_requests - closed_requests
         
+        # Calculate average response time from the exact sums
         average_response_time_days = None
-        if response_times:
-            average_seconds = sum(response_times) / len(response_times)
-            average_response_time_days = round(average_seconds / (60 * 60 * 24), 1)
+        if closed_requests:
+            total_seconds = sum(row.total_response_seconds for row in rows)
+            average_response_time_days = round(total_seconds / closed_requests / (60 * 60 * 24), 1)
         
         # Group requests by month
-        requests_by_month = {}
-        for request in requests:
-            month_key = request.created_at.strftime("%Y-%m")
-            if month_key not in requests_by_month:
-                requests_by_month[month_key] = 0
-            requests_by_month[month_key] += 1
+        requests_by_month = {
+            f"{row.year}-{row.month:02d}": row.total_requests
+            for row in rows
+        }
         
         # Group requests by status
         requests_by_status = {"open": open_requests, "closed": closed_requests}
@@ -0,0 +1,206 @@
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence
+from datetime import date, datetime
+from decimal import Decimal
+import asyncio
+import csv
+import enum
+import io
+import json
+import os
+import tempfile
+
+import xlsxwriter
+from sqlalchemy import false, select
+from sqlalchemy.sql import Select
+
+from app.core.database import AsyncSessionLocal
+from app.core.partitioning import fiscal_year_condition
+from app.models.financial import Revenue, Expense
+from app.models.contract import Contract, Bidding
+from app.services.base_service import BaseService
+from app.services.archive_service import ArchiveService
+
+# Rows fetched per round trip of the server-side cursor
+EXPORT_BATCH_SIZE = 2000
+
+# Rows per XLSX worksheet (the format's limit, minus the header)
+XLSX_MAX_ROWS = 1048575
+
+class ExportSpec(NamedTuple):
+    """Which columns of a dataset are published (every dataset is filtered by its year column)"""
+    model: Any
+    columns: Sequence[str]
+
+EXPORT_DATASETS: Dict[str, ExportSpec] = {
+    "revenues": ExportSpec(
+        model=Revenue,
+        columns=(
+            "id", "date", "description", "category", "subcategory", "amount",
+            "budget_code", "source", "process_number",
+        ),
+    ),
+    "expenses": ExportSpec(
+        model=Expense,
+        columns=(
+            "id", "date", "description", "category", "subcategory", "expense_type", "amount",
+            "beneficiary_name", "beneficiary_document", "budget_code", "function_code",
+            "subfunction_code", "process_number", "bidding_process", "contract_id",
+        ),
+    ),
+    "contracts": ExportSpec(
+        model=Contract,
+        columns=(
+            "id", "number", "year", "contract_type", "object", "description", "supplier_id",
+            "original_value", "current_value", "executed_value", "signature_date",
+            "start_date", "end_date", "status", "bidding_id", "legal_basis",
+        ),
+    ),
+    "biddings": ExportSpec(
+        model=Bidding,
+        columns=(
+            "id", "number", "year", "modality", "object", "description", "publication_date",
+            "opening_date", "estimated_value", "status", "law_basis", "winner_supplier_id",
+            "winning_value",
+        ),
+    ),
+}
+
+# Export formats: media type and file extension
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+def _plain(value: Any) -> Any:
+    """Convert a column value to a scalar XLSX cells accept"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Spreadsheets have no time zones
+        return value.replace(tzinfo=None)
+    return value
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class ExportService(BaseService):
+    """Streams public datasets as open-data files"""
+    
+    def __init__(self):
+        self.archive_service = ArchiveService()
+    
+    def _export_query(self, dataset: str, tenant_id: int, year: Optional[int] = None) -> Select:
+        """Build the export statement of a dataset: published columns of live rows, in id order"""
+        spec = EXPORT_DATASETS[dataset]
+        table = spec.model.__table__
+        query = select(*[table.c[name] for name in spec.columns]).where(
+            table.c.tenant_id == tenant_id,
+            table.c.is_deleted == false()
+        )
+        
+        if year:
+            query = query.where(fiscal_year_condition(table, year))
+        
+        return query.order_by(table.c.id)
+    
+    async def _stream_rows(self, dataset: str, tenant_id: int, year: Optional[int]) -> AsyncIterator[List[Any]]:
+        """
+        Yield the rows of an export in batches from a server-side cursor.
+        
+        Archived years come first, read from their Parquet files. The
+        session is opened here, not taken from the request, because it
+        must stay open for as long as the response is streaming.
+        """
+        query = self._export_query(dataset, tenant_id, year)
+        async with AsyncSessionLocal() as db:
+            for archive in await self.archive_service.list_archives_async(db, tenant_id, dataset, year):
+                async for rows in self.archive_service.stream_rows(archive, EXPORT_DATASETS[dataset].columns):
+                    yield rows
+            result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for rows in result.partitions():
+                yield rows
+    
+    async def stream_csv(self, dataset: str, tenant_id: int, year: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream a dataset as CSV (UTF-8 with BOM, so spreadsheets detect the encoding)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_DATASETS[dataset].columns)
+        yield ("\ufeff" + buffer.getvalue()).encode()
+        
+        async for rows in self._stream_rows(dataset, tenant_id, year):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([value.value if isinstance(value, enum.Enum) else value for value in row] for row in rows)
+            yield buffer.getvalue().encode()
+    
+    async def stream_jsonl(self, dataset: str, tenant_id: int, year: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream a dataset as JSON Lines, one object per record"""
+        columns = EXPORT_DATASETS[dataset].columns
+        async for rows in self._stream_rows(dataset, tenant_id, year):
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode()
+    
+    async def stream_xlsx(self, dataset: str, tenant_id: int, year: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Stream a dataset as an XLSX workbook.
+        
+        An XLSX file is a zip archive that can only be finished once every
+        row is known, so rows are written in constant-memory mode to a
+        temporary file which is streamed once complete.
+        """
+        columns = EXPORT_DATASETS[dataset].columns
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            workbook = xlsxwriter.Workbook(path, {
+                "constant_memory": True,
+                "default_date_format": "yyyy-mm-dd",
+                "remove_timezone": True,
+            })
+            worksheet = None
+            row_number = XLSX_MAX_ROWS
+            
+            def write_rows(rows: Sequence[Any]) -> None:
+                nonlocal worksheet, row_number
+                for row in rows:
+                    if row_number == XLSX_MAX_ROWS:
+                        # Continue on a new sheet past the format's row limit
+                        worksheet = workbook.add_worksheet()
+                        worksheet.write_row(0, 0, columns)
+                        row_number = 0
+                    row_number += 1
+                    worksheet.write_row(row_number, 0, [_plain(value) for value in row])
+            
+            async for rows in self._stream_rows(dataset, tenant_id, year):
+                # Writing spills to the temporary file; keep it off the event loop
+                await asyncio.to_thread(write_rows, rows)
+            if worksheet is None:
+                workbook.add_worksheet().write_row(0, 0, columns)
+            await asyncio.to_thread(workbook.close)
+            
+            with open(path, "rb") as file:
+                while True:
+                    chunk = await asyncio.to_thread(file.read, 64 * 1024)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.unlink(path)
+    
+    def stream(self, dataset: str, export_format: str, tenant_id: int, year: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream a dataset in the given format (csv, jsonl or xlsx)"""
+        streams = {
+            "csv": self.stream_csv,
+            "jsonl": self.stream_jsonl,
+            "xlsx": self.stream_xlsx,
+        }
+        return streams[export_format](dataset, tenant_id, year)
@@ -1,19 +1,42 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Sequence
 from datetime import datetime
+from sqlalchemy import Row, select, func, tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.models.financial import Revenue, Expense
-from app.schemas.financial import RevenueCreate, RevenueUpdate, ExpenseCreate, ExpenseUpdate, FinancialSummary
+from app.schemas.financial import (
+    RevenueCreate, RevenueUpdate, ExpenseCreate, ExpenseUpdate, FinancialSummary,
+    RevenueBatch, ExpenseBatch, RevenueResponse, ExpenseResponse
+)
+from app.core.pagination import apply_keyset
+from app.core.partitioning import fiscal_year_condition
+from app.core.projection import project
+from app.core.search import search_match, search_rank
 from app.services.base_service import BaseService
+from app.services.archive_service import ArchiveService
 
 class FinancialService(BaseService):
+    # Sort keys used for listing and cursor pagination
+    REVENUE_KEYSET = (Revenue.date, Revenue.id)
+    EXPENSE_KEYSET = (Expense.date, Expense.id)
+    # Natural key of upserted expenses (see uq_expenses_natural_key, which adds the partition key)
+    EXPENSE_NATURAL_KEY = (Expense.tenant_id, Expense.process_number, Expense.expense_type)
+    
+    def __init__(self):
+        self.archive_service = ArchiveService()
+    
     def create_revenue(self, db: Session, revenue_create: RevenueCreate) -> Revenue:
         """Create a new revenue record"""
         revenue = Revenue(**revenue_create.model_dump())
         db.add(revenue)
+        self._queue_search_update(db, "revenue", revenue)
+        self._touch_datasets(db, revenue.tenant_id, "revenues")
         db.commit()
         db.refresh(revenue)
+        self._data_changed(revenue.tenant_id)
         return revenue
     
     def update_revenue(self, db: Session, revenue_id: int, revenue_update: RevenueUpdate) -> Revenue:
@@ -24,13 +47,16 @@ class FinancialService(BaseService):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Revenue not found"
             )
-            
+        
         update_data = revenue_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(revenue, field, value)
-            
+        
+        self._queue_search_update(db, "revenue", revenue)
+        self._touch_datasets(db, revenue.tenant_id, "revenues")
         db.commit()
         db.refresh(revenue)
+        self._data_changed(revenue.tenant_id)
         return revenue
     
     def get_revenue(self, db: Session, revenue_id: int) -> Revenue:
@@ -43,6 +69,25 @@ class FinancialService(BaseService):
             )
         return revenue
     
+    def _revenues_query(
+        self,
+        tenant_id: int,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        category: Optional[str] = None
+    ) -> Select:
+        """Build the revenue listing statement shared by sync and async paths"""
+        query = select(Revenue).where(Revenue.tenant_id == tenant_id)
+        
+        if year:
+            query = query.where(fiscal_year_condition(Revenue.__table__, year))
+        if month:
+            query = query.where(Revenue.month == month)
+        if category:
+            query = query.where(Revenue.category == category)
+        
+        return query
+    
     def list_revenues(
         self, 
         db: Session, 
@@ -51,40 +96,77 @@ class FinancialService(BaseService):
         limit: int = 100,
         year: Optional[int] = None,
         month: Optional[int] = None,
-        category: Optional[str] = None
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Revenue]:
         """List all revenues for a tenant with optional filters"""
-        query = db.query(Revenue).filter(Revenue.tenant_id == tenant_id)
-        
-        if year:
-            query = query.filter(Revenue.year == year)
-        if month:
-            query = query.filter(Revenue.month == month)
-        if category:
-            query = query.filter(Revenue.category == category)
-            
-        return query.offset(skip).limit(limit).all()
+        query = self._revenues_query(tenant_id, year, month, category)
+        query = apply_keyset(query, self.REVENUE_KEYSET, skip, limit, cursor)
+        return db.execute(query).scalars().all()
+    
+    async def list_revenues_async(
+        self, 
+        db: AsyncSession, 
+        tenant_id: int, 
+        skip: int = 0, 
+        limit: int = 100,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> List[Revenue]:
+        """List all revenues for a tenant with optional filters (async)"""
+        query = self._revenues_query(tenant_id, year, month, category)
+        query = apply_keyset(query, self.REVENUE_KEYSET, skip, limit, cursor)
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    async def list_revenue_rows_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """List revenues as plain rows of RevenueResponse fields, for dump_rows() (async)"""
+        query = self._revenues_query(tenant_id, year, month, category)
+        # Archived years (all of them, unless one is asked for) are read from cold
+        # storage and merged with the rows kept in the table
+        archives = await self.archive_service.list_archives_async(db, tenant_id, "revenues", year)
+        if archives:
+            return await self.archive_service.list_rows_async(
+                db, archives, query, Revenue, RevenueResponse, self.REVENUE_KEYSET,
+                {"month": month, "category": category}, skip, limit, cursor
+            )
+        query = apply_keyset(query, self.REVENUE_KEYSET, skip, limit, cursor)
+        result = await db.execute(project(query, Revenue, RevenueResponse, self.REVENUE_KEYSET))
+        return result.all()
     
     def delete_revenue(self, db: Session, revenue_id: int) -> bool:
-        """Delete a revenue record"""
-        revenue = db.query(Revenue).filter(Revenue.id == revenue_id).first()
-        if not revenue:
+        """Soft-delete a revenue record"""
+        deleted = self._soft_delete(db, Revenue, Revenue.id == revenue_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Revenue not found"
             )
-            
-        db.delete(revenue)
+        
+        tenant_id = deleted[0].tenant_id
+        self._queue_search_updates(db, "revenue", tenant_id, [revenue_id], "delete")
+        self._touch_datasets(db, tenant_id, "revenues")
         db.commit()
+        self._data_changed(tenant_id)
         return True
     
     def create_expense(self, db: Session, expense_create: ExpenseCreate) -> Expense:
         """Create a new expense record"""
-        expense = Expense(**expense_create.model_dump())
-        db.add(expense)
-        db.commit()
-        db.refresh(expense)
-        return expense
+        return self._create_record(
+            db, Expense, "expense", "expenses", expense_create.model_dump(), self.EXPENSE_NATURAL_KEY
+        )
     
     def update_expense(self, db: Session, expense_id: int, expense_update: ExpenseUpdate) -> Expense:
         """Update an expense record"""
@@ -94,13 +176,16 @@ class FinancialService(BaseService):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Expense not found"
             )
-            
+        
         update_data = expense_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(expense, field, value)
-            
+        
+        self._queue_search_update(db, "expense", expense)
+        self._touch_datasets(db, expense.tenant_id, "expenses")
         db.commit()
         db.refresh(expense)
+        self._data_changed(expense.tenant_id)
         return expense
     
     def get_expense(self, db: Session, expense_id: int) -> Expense:
@@ -113,6 +198,25 @@ class FinancialService(BaseService):
             )
         return expense
     
+    def _expenses_query(
+        self,
+        tenant_id: int,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        category: Optional[str] = None
+    ) -> Select:
+        """Build the expense listing statement shared by sync and async paths"""
+        query = select(Expense).where(Expense.tenant_id == tenant_id)
+        
+        if year:
+            query = query.where(fiscal_year_condition(Expense.__table__, year))
+        if month:
+            query = query.where(Expense.month == month)
+        if category:
+            query = query.where(Expense.category == category)
+        
+        return query
+    
     def list_expenses(
         self, 
         db: Session, 
@@ -121,33 +225,145 @@ class FinancialService(BaseService):
         limit: int = 100,
         year: Optional[int] = None,
         month: Optional[int] = None,
-        category: Optional[str] = None
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Expense]:
         """List all expenses for a tenant with optional filters"""
-        query = db.query(Expense).filter(Expense.tenant_id == tenant_id)
-        
-        if year:
-            query = query.filter(Expense.year == year)
-        if month:
-            query = query.filter(Expense.month == month)
-        if category:
-            query = query.filter(Expense.category == category)
-            
-        return query.offset(skip).limit(limit).all()
+        query = self._expenses_query(tenant_id, year, month, category)
+        query = apply_keyset(query, self.EXPENSE_KEYSET, skip, limit, cursor)
+        return db.execute(query).scalars().all()
+    
+    async def list_expenses_async(
+        self, 
+        db: AsyncSession, 
+        tenant_id: int, 
+        skip: int = 0, 
+        limit: int = 100,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> List[Expense]:
+        """List all expenses for a tenant with optional filters (async)"""
+        query = self._expenses_query(tenant_id, year, month, category)
+        query = apply_keyset(query, self.EXPENSE_KEYSET, skip, limit, cursor)
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    async def list_expense_rows_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """List expenses as plain rows of ExpenseResponse fields, for dump_rows() (async)"""
+        query = self._expenses_query(tenant_id, year, month, category)
+        # Archived years (all of them, unless one is asked for) are read from cold
+        # storage and merged with the rows kept in the table
+        archives = await self.archive_service.list_archives_async(db, tenant_id, "expenses", year)
+        if archives:
+            return await self.archive_service.list_rows_async(
+                db, archives, query, Expense, ExpenseResponse, self.EXPENSE_KEYSET,
+                {"month": month, "category": category}, skip, limit, cursor
+            )
+        query = apply_keyset(query, self.EXPENSE_KEYSET, skip, limit, cursor)
+        result = await db.execute(project(query, Expense, ExpenseResponse, self.EXPENSE_KEYSET))
+        return result.all()
     
     def delete_expense(self, db: Session, expense_id: int) -> bool:
-        """Delete an expense record"""
-        expense = db.query(Expense).filter(Expense.id == expense_id).first()
-        if not expense:
+        """Soft-delete an expense record"""
+        deleted = self._soft_delete(db, Expense, Expense.id == expense_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Expense not found"
             )
-            
-        db.delete(expense)
+        
+        tenant_id = deleted[0].tenant_id
+        self._queue_search_updates(db, "expense", tenant_id, [expense_id], "delete")
+        self._touch_datasets(db, tenant_id, "expenses")
         db.commit()
+        self._data_changed(tenant_id)
         return True
     
+    def batch_revenues(self, db: Session, tenant_id: int, batch: RevenueBatch) -> Dict[str, Any]:
+        """Create, update and delete revenue records of a tenant in one transaction"""
+        return self._apply_batch(db, Revenue, "revenue", "revenues", tenant_id, batch)
+    
+    def batch_expenses(self, db: Session, tenant_id: int, batch: ExpenseBatch, upsert: bool = False) -> Dict[str, Any]:
+        """Create (or upsert by natural key), update and delete expense records of a tenant in one transaction"""
+        natural_key = self.EXPENSE_NATURAL_KEY if upsert else None
+        return self._apply_batch(db, Expense, "expense", "expenses", tenant_id, batch, natural_key)
+    
+    def search_revenues(
+        self,
+        db: Session,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Revenue]:
+        """Search revenues by description or source"""
+        query = self._search_revenues_query(tenant_id, q)
+        return db.execute(query.offset(skip).limit(limit)).scalars().all()
+    
+    async def search_revenues_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Revenue]:
+        """Search revenues by description or source (async)"""
+        query = self._search_revenues_query(tenant_id, q)
+        result = await db.execute(query.offset(skip).limit(limit))
+        return result.scalars().all()
+    
+    def search_expenses(
+        self,
+        db: Session,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Expense]:
+        """Search expenses by description or beneficiary"""
+        query = self._search_expenses_query(tenant_id, q)
+        return db.execute(query.offset(skip).limit(limit)).scalars().all()
+    
+    async def search_expenses_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        q: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Expense]:
+        """Search expenses by description or beneficiary (async)"""
+        query = self._search_expenses_query(tenant_id, q)
+        result = await db.execute(query.offset(skip).limit(limit))
+        return result.scalars().all()
+    
+    def _search_revenues_query(self, tenant_id: int, q: str) -> Select:
+        """Build the revenue full-text search statement, most relevant first"""
+        return select(Revenue).where(
+            Revenue.tenant_id == tenant_id,
+            search_match(Revenue.search_vector, q)
+        ).order_by(search_rank(Revenue.search_vector, q).desc(), Revenue.date.desc())
+    
+    def _search_expenses_query(self, tenant_id: int, q: str) -> Select:
+        """Build the expense full-text search statement, most relevant first"""
+        return select(Expense).where(
+            Expense.tenant_id == tenant_id,
+            search_match(Expense.search_vector, q)
+        ).order_by(search_rank(Expense.search_vector, q).desc(), Expense.date.desc())
+    
     def get_financial_summary(
         self,
         db: Session,
@@ -155,55 +371,69 @@ class FinancialService(BaseService):
         year: Optional[int] = None
     ) -> FinancialSummary:
         """Get financial summary for a tenant"""
-        # Base queries
-        revenue_query = db.query(Revenue).filter(Revenue.tenant_id == tenant_id)
-        expense_query = db.query(Expense).filter(Expense.tenant_id == tenant_id)
-        
-        # Apply year filter if provided
-        if year:
-            revenue_query = revenue_query.filter(Revenue.year == year)
-            expense_query = expense_query.filter(Expense.year == year)
-        
-        # Get all revenues and expenses
-        revenues = revenue_query.all()
-        expenses = expense_query.all()
+        revenue_rows = db.execute(self._summary_query(Revenue, tenant_id, year)).all()
+        expense_rows = db.execute(self._summary_query(Expense, tenant_id, year)).all()
+        return self._build_summary(revenue_rows, expense_rows)
+    
+    async def get_financial_summary_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        year: Optional[int] = None
+    ) -> FinancialSummary:
+        """Get financial summary for a tenant (async)"""
+        revenue_rows = (await db.execute(self._summary_query(Revenue, tenant_id, year))).all()
+        expense_rows = (await db.execute(self._summary_query(Expense, tenant_id, year))).all()
+        return self._build_summary(revenue_rows, expense_rows)
+    
+    def _summary_query(self, model, tenant_id: int, year: Optional[int] = None) -> Select:
+        """
+        Build a single aggregate statement returning the total, the totals by
+        category and the totals by month for one financial table.
         
-        # Calculate totals
-        total_revenue = sum(r.amount for r in revenues)
-        total_expense = sum(e.amount for e in expenses)
-        balance = total_revenue - total_expense
+        Rows are tagged with GROUPING() flags so the caller can tell which
+        grouping set each row belongs to.
+        """
+        query = select(
+            model.category,
+            model.month,
+            func.coalesce(func.sum(model.amount), 0),
+            func.grouping(model.category),
+            func.grouping(model.month)
+        ).where(model.tenant_id == tenant_id)
         
-        # Calculate by category
-        revenue_by_category: Dict[str, float] = {}
-        for rev in revenues:
-            if rev.category not in revenue_by_category:
-                revenue_by_category[rev.category] = 0
-            revenue_by_category[rev.category] += rev.amount
-            
-        expense_by_category: Dict[str, float] = {}
-        for exp in expenses:
-            if exp.category not in expense_by_category:
-                expense_by_category[exp.category] = 0
-            expense_by_category[exp.category] += exp.amount
+        # Uses the (tenant_id, year, month, category) index within the year's partition
+        if year:
+            query = query.where(fiscal_year_condition(model.__table__, year))
         
-        # Calculate by month
-        revenue_by_month: Dict[int, float] = {}
-        for rev in revenues:
-            if rev.month not in revenue_by_month:
-                revenue_by_month[rev.month] = 0
-            revenue_by_month[rev.month] += rev.amount
-            
-        expense_by_month: Dict[int, float] = {}
-        for exp in expenses:
-            if exp.month not in expense_by_month:
-                expense_by_month[exp.month] = 0
-            expense_by_month[exp.month] += exp.amount
+        return query.group_by(
+            func.grouping_sets(tuple_(model.category), tuple_(model.month), tuple_())
+        )
+    
+    def _fold_summary_rows(self, rows) -> tuple[float, Dict[str, float], Dict[int, float]]:
+        """Split grouping-set rows into total, by-category and by-month totals"""
+        total = 0.0
+        by_category: Dict[str, float] = {}
+        by_month: Dict[int, float] = {}
+        for category, month, amount, category_grouped, month_grouped in rows:
+            if category_grouped and month_grouped:
+                total = float(amount)
+            elif month_grouped:
+                key = category.value if hasattr(category, "value") else str(category)
+                by_category[key] = float(amount)
+            else:
+                by_month[int(month)] = float(amount)
+        return total, by_category, by_month
+    
+    def _build_summary(self, revenue_rows, expense_rows) -> FinancialSummary:
+        """Build the financial summary from aggregate rows"""
+        total_revenue, revenue_by_category, revenue_by_month = self._fold_summary_rows(revenue_rows)
+        total_expense, expense_by_category, expense_by_month = self._fold_summary_rows(expense_rows)
         
-        # Return summary
         return FinancialSummary(
             total_revenue=total_revenue,
             total_expense=total_expense,
-            balance=balance,
+            balance=total_revenue - total_expense,
             revenue_by_category=revenue_by_category,
             expense_by_category=expense_by_category,
             revenue_by_month=revenue_by_month,
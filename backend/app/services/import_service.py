@@ -0,0 +1,385 @@
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Tuple, Type
+import csv
+import io
+import re
+
+import openpyxl
+import pandas as pd
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.partitioning import FISCAL_YEAR_PARTITIONED
+from app.core.search import elasticsearch_enabled
+from app.models.financial import Revenue, Expense, RevenueCategory, ExpenseCategory, ExpenseType
+from app.services.base_service import BaseService
+
+# Rows parsed, validated and copied per batch
+IMPORT_CHUNK_SIZE = 10000
+
+# Rejected rows reported in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Largest absolute value a Numeric(15, 2) column holds
+MAX_AMOUNT = 10 ** 13
+
+class ImportSpec(NamedTuple):
+    """How the rows of an import file map onto a table"""
+    model: Type[Any]
+    search_type: str
+    columns: Dict[str, bool]  # file column -> required
+    enums: Dict[str, Type[Any]]
+    natural_key: Tuple[str, ...] = ()  # Per-tenant unique columns used to upsert
+
+IMPORT_DATASETS = {
+    "revenues": ImportSpec(
+        model=Revenue,
+        search_type="revenue",
+        columns={
+            "description": True,
+            "category": True,
+            "subcategory": False,
+            "amount": True,
+            "date": True,
+            "budget_code": False,
+            "source": False,
+            "process_number": False,
+        },
+        enums={"category": RevenueCategory},
+    ),
+    "expenses": ImportSpec(
+        model=Expense,
+        search_type="expense",
+        columns={
+            "description": True,
+            "category": True,
+            "subcategory": False,
+            "expense_type": True,
+            "amount": True,
+            "date": True,
+            "beneficiary_name": True,
+            "beneficiary_document": True,
+            "budget_code": False,
+            "function_code": False,
+            "subfunction_code": False,
+            "process_number": True,
+            "bidding_process": False,
+        },
+        enums={"category": ExpenseCategory, "expense_type": ExpenseType},
+        natural_key=("process_number", "expense_type"),
+    ),
+}
+
+def _normalize_header(name: Any) -> str:
+    return re.sub(r"\s+", "_", str(name if name is not None else "").strip().lower())
+
+class FinancialImportService(BaseService):
+    """Bulk import of revenue and expense files through Postgres COPY"""
+    
+    def _read_csv(self, file: BinaryIO, encoding: str) -> Iterator[pd.DataFrame]:
+        # Municipal systems export ';' as often as ','
+        sample = file.read(64 * 1024).decode(encoding, errors="ignore")
+        file.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample.splitlines()[0] if sample else "", delimiters=",;\t|").delimiter
+        except csv.Error:
+            delimiter = ","
+        
+        reader = pd.read_csv(
+            file,
+            sep=delimiter,
+            dtype=str,
+            keep_default_na=False,
+            skip_blank_lines=False,
+            encoding=encoding,
+            chunksize=IMPORT_CHUNK_SIZE
+        )
+        for chunk in reader:
+            # Index rows by their line in the file (the header is line 1)
+            chunk.index = chunk.index + 2
+            yield chunk
+    
+    def _read_xlsx(self, file: BinaryIO) -> Iterator[pd.DataFrame]:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(name) if name is not None else "" for name in header]
+            
+            batch: List[Tuple[Any, ...]] = []
+            row_numbers: List[int] = []
+            for row_number, row in enumerate(rows, start=2):
+                if all(value is None for value in row):
+                    continue
+                batch.append(tuple(row[:len(columns)]) + (None,) * (len(columns) - len(row)))
+                row_numbers.append(row_number)
+                if len(batch) == IMPORT_CHUNK_SIZE:
+                    yield pd.DataFrame(batch, columns=columns, index=row_numbers, dtype=object)
+                    batch, row_numbers = [], []
+            if batch:
+                yield pd.DataFrame(batch, columns=columns, index=row_numbers, dtype=object)
+        finally:
+            workbook.close()
+    
+    def _read_chunks(self, file: BinaryIO, filename: str, encoding: str) -> Iterator[pd.DataFrame]:
+        """Stream an import file as DataFrames of at most IMPORT_CHUNK_SIZE rows"""
+        extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if extension == "csv":
+            return self._read_csv(file, encoding)
+        if extension == "xlsx":
+            return self._read_xlsx(file)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only .csv and .xlsx files can be imported"
+        )
+    
+    def _parse_amount(self, values: pd.Series) -> pd.Series:
+        # Accept "1234.56" as well as Brazilian "R$ 1.234,56"
+        values = values.str.replace(r"[R$\s]", "", regex=True)
+        decimal_comma = values.str.contains(",", regex=False)
+        values = values.where(
+            ~decimal_comma,
+            values.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        )
+        return pd.to_numeric(values, errors="coerce").round(2)
+    
+    def _validate(self, spec: ImportSpec, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, List[Tuple[int, str, str]], int]:
+        """
+        Validate a chunk column by column.
+        
+        Returns the valid rows converted to COPY-ready text, the
+        (row, field, message) errors of the rejected ones and the number of
+        non-blank rows in the chunk. Only the first error of a row is reported.
+        """
+        table = spec.model.__table__
+        missing = pd.Series("", index=chunk.index, dtype=object)
+        texts = {
+            column: (
+                chunk[column].where(chunk[column].notna(), "").astype(str).str.strip()
+                if column in chunk.columns else missing
+            )
+            for column in spec.columns
+        }
+        
+        # Skip blank lines (e.g. trailing formatted rows of a spreadsheet)
+        blank_row = pd.Series(True, index=chunk.index)
+        for values in texts.values():
+            blank_row &= values == ""
+        
+        checks: List[Tuple[str, pd.Series, str]] = []
+        converted: Dict[str, pd.Series] = {}
+        for column, required in spec.columns.items():
+            values = texts[column]
+            blank = values == ""
+            if required:
+                checks.append((column, blank, "Required value is missing"))
+            
+            if column == "amount":
+                amounts = self._parse_amount(values)
+                checks.append((column, ~blank & amounts.isna(), "Invalid amount"))
+                checks.append((column, amounts.abs() >= MAX_AMOUNT, "Amount out of range"))
+                converted[column] = amounts.map("{:.2f}".format)
+            elif column == "date":
+                dates = pd.to_datetime(values.where(~blank), format="mixed", dayfirst=True, errors="coerce")
+                checks.append((column, ~blank & dates.isna(), "Invalid date"))
+                converted[column] = dates.dt.strftime("%Y-%m-%d")
+            elif column in spec.enums:
+                # Enum columns are stored by member name; accept either the value or the name
+                enum_class = spec.enums[column]
+                mapping = {member.value.lower(): member.name for member in enum_class}
+                mapping.update({member.name.lower(): member.name for member in enum_class})
+                names = values.str.lower().map(mapping)
+                allowed = ", ".join(member.value for member in enum_class)
+                checks.append((column, ~blank & names.isna(), f"Invalid value (expected one of: {allowed})"))
+                converted[column] = names
+            else:
+                max_length = table.c[column].type.length
+                checks.append((column, values.str.len() > max_length, f"Longer than {max_length} characters"))
+                converted[column] = values.where(~blank, None)
+        
+        invalid = blank_row.copy()
+        errors: List[Tuple[int, str, str]] = []
+        for column, mask, message in checks:
+            rejected = mask & ~invalid
+            errors.extend((int(row), column, message) for row in chunk.index[rejected])
+            invalid |= rejected
+        
+        valid = pd.DataFrame(converted, columns=list(spec.columns))[~invalid]
+        return valid, errors, int((~blank_row).sum())
+    
+    def import_file(
+        self,
+        db: Session,
+        tenant_id: int,
+        dataset: str,
+        file: BinaryIO,
+        filename: str,
+        encoding: str = "utf-8-sig",
+        upsert: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Import a CSV or XLSX file of revenues or expenses.
+        
+        The file is parsed and validated in chunks; valid rows are streamed
+        with COPY into a temporary staging table and merged into the target
+        table with a single INSERT ... SELECT, so the whole import is one
+        transaction. Invalid rows are skipped and reported.
+        
+        With upsert, rows whose natural key already exists update that
+        record when something changed (its date included), so re-importing
+        a corrected file is idempotent.
+        """
+        spec = IMPORT_DATASETS.get(dataset)
+        if spec is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown dataset: {dataset}"
+            )
+        if upsert and not spec.natural_key:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{dataset} have no natural key to upsert on"
+            )
+        
+        table = spec.model.__table__
+        quoted = ", ".join(f'"{column}"' for column in spec.columns)
+        dialect = db.get_bind().dialect
+        staging_columns = ", ".join(
+            f'"{column}" {table.c[column].type.compile(dialect=dialect)}' for column in spec.columns
+        )
+        db.execute(text(
+            f"CREATE TEMP TABLE import_staging ({staging_columns}, "
+            "import_row bigint GENERATED ALWAYS AS IDENTITY) ON COMMIT DROP"
+        ))
+        cursor = db.connection().connection.cursor()
+        
+        total_rows = 0
+        rejected = 0
+        errors: List[Tuple[int, str, str]] = []
+        try:
+            for index, chunk in enumerate(self._read_chunks(file, filename, encoding)):
+                chunk.columns = [_normalize_header(name) for name in chunk.columns]
+                if index == 0:
+                    absent = [c for c, required in spec.columns.items() if required and c not in chunk.columns]
+                    if absent:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Missing required columns: {', '.join(absent)}"
+                        )
+                
+                valid, chunk_errors, chunk_rows = self._validate(spec, chunk)
+                total_rows += chunk_rows
+                rejected += len(chunk_errors)
+                errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+                
+                if not valid.empty:
+                    buffer = io.StringIO()
+                    valid.to_csv(buffer, index=False, header=False)
+                    buffer.seek(0)
+                    cursor.copy_expert(f"COPY import_staging ({quoted}) FROM STDIN WITH (FORMAT csv)", buffer)
+            
+            # Merge the staged rows (and queue them for the search index)
+            moved: List[int] = []
+            merge = (
+                f"INSERT INTO {table.name} ({quoted}, tenant_id, is_deleted) "
+                f"SELECT {quoted}, :tenant_id, false FROM import_staging"
+            )
+            if upsert:
+                key = ", ".join(f'"{column}"' for column in spec.natural_key)
+                conflict = key
+                partition_column = FISCAL_YEAR_PARTITIONED.get(table.name)
+                if partition_column is not None and partition_column not in spec.natural_key:
+                    # The unique index also holds the partition column: move records whose
+                    # date changed first, so they are updated rather than duplicated
+                    conflict = f'{key}, "{partition_column}"'
+                    matches = " AND ".join(f'target."{column}" = staged."{column}"' for column in spec.natural_key)
+                    # A key may already be on several dates (the index holds the date too): leave them
+                    # alone if one has the new date, else move only the oldest, as _move_partition_keys does
+                    same_key = " AND ".join(
+                        ["other.tenant_id = target.tenant_id"]
+                        + [f'other."{column}" = target."{column}"' for column in spec.natural_key]
+                    )
+                    moved = db.execute(
+                        text(
+                            f'UPDATE {table.name} target SET "{partition_column}" = staged."{partition_column}", updated_at = now() '
+                            f'FROM (SELECT DISTINCT ON ({key}) {key}, "{partition_column}" FROM import_staging '
+                            f"ORDER BY {key}, import_row DESC) staged "
+                            f"WHERE target.tenant_id = :tenant_id AND {matches} "
+                            f'AND target."{partition_column}" IS DISTINCT FROM staged."{partition_column}" '
+                            f"AND NOT EXISTS (SELECT 1 FROM {table.name} other WHERE {same_key} "
+                            f'AND (other."{partition_column}" = staged."{partition_column}" OR other.id < target.id)) '
+                            "RETURNING target.id"
+                        ),
+                        {"tenant_id": tenant_id}
+                    ).scalars().all()
+                    self._queue_search_updates(db, spec.search_type, tenant_id, moved)
+                fields = [column for column in spec.columns if column not in spec.natural_key and column != partition_column]
+                current = ", ".join(f'{table.name}."{column}"' for column in fields)
+                incoming = ", ".join(f'excluded."{column}"' for column in fields)
+                assignments = ", ".join(f'"{column}" = excluded."{column}"' for column in fields)
+                # A key may be merged once per statement: the last line of the file wins
+                merge = (
+                    f"INSERT INTO {table.name} ({quoted}, tenant_id, is_deleted) "
+                    f"SELECT DISTINCT ON ({key}) {quoted}, :tenant_id, false FROM import_staging "
+                    f"ORDER BY {key}, import_row DESC "
+                    f"ON CONFLICT (tenant_id, {conflict}) DO UPDATE SET {assignments}, "
+                    "is_deleted = false, deleted_at = NULL, updated_at = now() "
+                    # A soft-deleted record with the key is restored even if unchanged
+                    f"WHERE ({current}) IS DISTINCT FROM ({incoming}) OR {table.name}.is_deleted"
+                )
+            # xmax is 0 only for freshly inserted row versions
+            merge = f"WITH merged AS ({merge} RETURNING id, xmax = 0 AS inserted)"
+            if elasticsearch_enabled():
+                merge += (
+                    ", queued AS (INSERT INTO search_outbox (tenant_id, entity, entity_id, operation) "
+                    "SELECT :tenant_id, :entity, id, 'index' FROM merged)"
+                )
+            imported, updated = db.execute(
+                text(
+                    f"{merge} SELECT count(*) FILTER (WHERE inserted), "
+                    "count(*) FILTER (WHERE NOT inserted AND NOT id = ANY(CAST(:moved AS integer[]))) FROM merged"
+                ),
+                {"tenant_id": tenant_id, "entity": spec.search_type, "moved": moved}
+            ).one()
+            # Records only moved to a new date were updated too
+            updated += len(moved)
+            
+            if imported or updated:
+                self._touch_datasets(db, tenant_id, dataset)
+            db.commit()
+        except (ValueError, UnicodeDecodeError, pd.errors.ParserError) as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not read import file: {e}"
+            )
+        except IntegrityError as e:
+            # Without upsert a row whose natural key already exists rejects the import
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Import rejected: {e.orig}"
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+        
+        if imported or updated:
+            self._data_changed(tenant_id)
+        
+        return {
+            "dataset": dataset,
+            "total_rows": total_rows,
+            "imported": imported,
+            "updated": updated,
+            "rejected": rejected,
+            "errors": [
+                {"row": row, "field": field, "message": message}
+                for row, field, message in errors
+            ],
+        }
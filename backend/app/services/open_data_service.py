@@ -0,0 +1,203 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import enum
+import hashlib
+import logging
+import os
+
+from sqlalchemy import false, select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.parquet import arrow_type
+from app.models.dataset import OpenDataSnapshot
+from app.services.base_service import BaseService
+from app.services.export_service import ExportService, EXPORT_DATASETS
+
+logger = logging.getLogger(__name__)
+
+# Rows per Parquet row group (one server-side cursor fetch each)
+PARQUET_BATCH_SIZE = 50000
+
+class OpenDataService(BaseService):
+    """Columnar (Parquet) snapshots of public datasets, one file per tenant, dataset and year"""
+    
+    def __init__(self):
+        self.export_service = ExportService()
+    
+    def _relative_path(self, tenant_id: int, dataset: str, year: int, sha256: str) -> str:
+        # Content-addressed, so a rewrite never changes a file a download is reading
+        return os.path.join(str(tenant_id), dataset, f"{year}.{sha256[:16]}.parquet")
+    
+    def file_path(self, snapshot: OpenDataSnapshot) -> str:
+        """Absolute path of a snapshot's Parquet file"""
+        return os.path.join(settings.OPEN_DATA_DIR, snapshot.path)
+    
+    def get_dataset_years(self, db: Session, tenant_id: int, dataset: str) -> List[int]:
+        """Get the years a tenant has records of a dataset in"""
+        table = EXPORT_DATASETS[dataset].model.__table__
+        rows = db.execute(
+            select(table.c.year).where(table.c.tenant_id == tenant_id, table.c.is_deleted == false()).distinct()
+        ).scalars().all()
+        return sorted(int(value) for value in rows if value is not None)
+    
+    def _fingerprint(self, db: Session, tenant_id: int, dataset: str, year: int) -> str:
+        """Row count and latest update of a year's rows: changes on any insert, update or delete"""
+        query = self.export_service._export_query(dataset, tenant_id, year).order_by(None)
+        table = EXPORT_DATASETS[dataset].model.__table__
+        count, last_update = db.execute(
+            select(func.count(), func.max(table.c.updated_at)).select_from(
+                query.with_only_columns(table.c.updated_at).subquery()
+            )
+        ).one()
+        return f"{count}:{last_update.isoformat() if last_update else ''}"
+    
+    def write_snapshot(self, db: Session, tenant_id: int, dataset: str, year: int, fingerprint: str, final: bool) -> OpenDataSnapshot:
+        """
+        Write the Parquet file of a tenant, dataset and year and record it.
+        
+        Rows are streamed from a server-side cursor into zstd-compressed row
+        groups of a temporary file, which is then moved to a content-addressed
+        name; the previous file of the year is removed once the new one is
+        recorded.
+        """
+        # Only the worker writes snapshots, so the web app does not need pyarrow
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        spec = EXPORT_DATASETS[dataset]
+        table = spec.model.__table__
+        schema = pa.schema([
+            pa.field(name, arrow_type(pa, table.c[name]), nullable=table.c[name].nullable)
+            for name in spec.columns
+        ])
+        
+        directory = os.path.join(settings.OPEN_DATA_DIR, str(tenant_id), dataset)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f"{year}.parquet.tmp")
+        
+        row_count = 0
+        query = self.export_service._export_query(dataset, tenant_id, year)
+        result = db.execute(query.execution_options(yield_per=PARQUET_BATCH_SIZE))
+        with pq.ParquetWriter(temp_path, schema, compression="zstd") as writer:
+            for rows in result.partitions():
+                arrays = [
+                    pa.array([value.value if isinstance(value, enum.Enum) else value for value in column], type=field.type)
+                    for column, field in zip(zip(*rows), schema)
+                ]
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                row_count += len(rows)
+        
+        digest = hashlib.sha256()
+        with open(temp_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        size_bytes = os.path.getsize(temp_path)
+        relative_path = self._relative_path(tenant_id, dataset, year, digest.hexdigest())
+        os.replace(temp_path, os.path.join(settings.OPEN_DATA_DIR, relative_path))
+        
+        previous_path = db.execute(
+            select(OpenDataSnapshot.path).where(
+                OpenDataSnapshot.tenant_id == tenant_id,
+                OpenDataSnapshot.dataset == dataset,
+                OpenDataSnapshot.year == year
+            )
+        ).scalar_one_or_none()
+        stmt = pg_insert(OpenDataSnapshot).values(
+            tenant_id=tenant_id,
+            dataset=dataset,
+            year=year,
+            path=relative_path,
+            sha256=digest.hexdigest(),
+            size_bytes=size_bytes,
+            row_count=row_count,
+            fingerprint=fingerprint,
+            is_final=final
+        )
+        snapshot = db.execute(stmt.on_conflict_do_update(
+            index_elements=[OpenDataSnapshot.tenant_id, OpenDataSnapshot.dataset, OpenDataSnapshot.year],
+            set_={
+                "path": stmt.excluded.path,
+                "sha256": stmt.excluded.sha256,
+                "size_bytes": stmt.excluded.size_bytes,
+                "row_count": stmt.excluded.row_count,
+                "fingerprint": stmt.excluded.fingerprint,
+                "is_final": stmt.excluded.is_final,
+                "updated_at": func.now(),
+            }
+        ).returning(OpenDataSnapshot)).scalar_one()
+        db.commit()
+        
+        if previous_path and previous_path != relative_path:
+            try:
+                os.remove(os.path.join(settings.OPEN_DATA_DIR, previous_path))
+            except FileNotFoundError:
+                pass
+        return snapshot
+    
+    def refresh_tenant(self, db: Session, tenant_id: int, force: bool = False) -> int:
+        """
+        Bring the Parquet snapshots of a tenant up to date; returns the number of files written.
+        
+        A closed fiscal year is written once (is_final) and then left alone.
+        Open years are rewritten only when their rows changed since the last
+        file, which a count/max(updated_at) probe on the year detects cheaply.
+        With force, every year is rewritten.
+        """
+        current_year = datetime.now().year
+        existing: Dict[tuple, OpenDataSnapshot] = {
+            (snapshot.dataset, snapshot.year): snapshot
+            for snapshot in db.execute(
+                select(OpenDataSnapshot).where(OpenDataSnapshot.tenant_id == tenant_id)
+            ).scalars()
+        }
+        
+        written = 0
+        for dataset in EXPORT_DATASETS:
+            # Years with snapshots are rechecked too, in case all of their rows were deleted
+            years = set(self.get_dataset_years(db, tenant_id, dataset))
+            years.update(year for snapshot_dataset, year in existing if snapshot_dataset == dataset)
+            for year in sorted(years):
+                snapshot = existing.get((dataset, year))
+                if snapshot is not None and snapshot.is_final and not force:
+                    continue
+                
+                fingerprint = self._fingerprint(db, tenant_id, dataset, year)
+                final = year < current_year
+                if (
+                    snapshot is not None and not force
+                    and snapshot.fingerprint == fingerprint and snapshot.is_final == final
+                ):
+                    continue
+                
+                self.write_snapshot(db, tenant_id, dataset, year, fingerprint, final)
+                written += 1
+        return written
+    
+    async def get_snapshot_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        dataset: str,
+        year: int
+    ) -> Optional[OpenDataSnapshot]:
+        """Get the snapshot of a tenant, dataset and year"""
+        result = await db.execute(
+            select(OpenDataSnapshot).where(
+                OpenDataSnapshot.tenant_id == tenant_id,
+                OpenDataSnapshot.dataset == dataset,
+                OpenDataSnapshot.year == year
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    async def list_snapshots_async(self, db: AsyncSession, tenant_id: int) -> List[OpenDataSnapshot]:
+        """List the snapshots of a tenant"""
+        result = await db.execute(
+            select(OpenDataSnapshot)
+            .where(OpenDataSnapshot.tenant_id == tenant_id)
+            .order_by(OpenDataSnapshot.dataset, OpenDataSnapshot.year)
+        )
+        return result.scalars().all()
@@ -0,0 +1,253 @@
+from typing import Dict, List, Optional
+from datetime import date, datetime
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.partitioning import FISCAL_YEAR_PARTITIONED
+from app.models.financial import Revenue, Expense
+from app.services.base_service import BaseService
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = {table.name: table for table in (Revenue.__table__, Expense.__table__)}
+
+class PartitionService(BaseService):
+    """Maintains the fiscal-year partitions of revenues and expenses"""
+    
+    def _partition_name(self, table: str, year: int) -> str:
+        return f"{table}_{year}"
+    
+    def _default_name(self, table: str) -> str:
+        return f"{table}_default"
+    
+    def is_partitioned(self, db: Session, table: str) -> bool:
+        """Whether a table is partitioned (tables created before migration 0007 are not)"""
+        relkind = db.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table}
+        ).scalar()
+        return relkind == "p"
+    
+    def list_partitions(self, db: Session, table: str) -> Dict[str, str]:
+        """Get the partitions attached to a table with their bounds"""
+        rows = db.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+            ),
+            {"table": table}
+        ).all()
+        return dict(rows)
+    
+    def partition_years(self, db: Session, table: str) -> List[int]:
+        """Get the fiscal years a table has a partition for"""
+        prefix = f"{table}_"
+        return sorted(
+            int(name[len(prefix):]) for name in self.list_partitions(db, table)
+            if name.startswith(prefix) and name[len(prefix):].isdigit()
+        )
+    
+    def _default_years(self, db: Session, table: str) -> List[int]:
+        """Get the years of the rows that landed in the default partition"""
+        date_column = FISCAL_YEAR_PARTITIONED[table]
+        rows = db.execute(text(
+            f"SELECT DISTINCT EXTRACT(year FROM {date_column})::integer FROM {self._default_name(table)}"
+        )).scalars().all()
+        return sorted(rows)
+    
+    def _columns(self, table: str) -> str:
+        # Generated columns are recomputed on insert
+        return ", ".join(
+            column.name for column in PARTITIONED_TABLES[table].columns if column.computed is None
+        )
+    
+    def _bounds(self, year: int) -> Dict[str, date]:
+        return {"start": date(year, 1, 1), "end": date(year + 1, 1, 1)}
+    
+    def _bound_clause(self, year: int) -> str:
+        bounds = self._bounds(year)
+        return f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    
+    def _default_has_year(self, db: Session, table: str, year: int) -> bool:
+        """Whether rows of a year are stored in the default partition"""
+        default = self._default_name(table)
+        if default not in self.list_partitions(db, table):
+            return False
+        date_column = FISCAL_YEAR_PARTITIONED[table]
+        return db.execute(
+            text(f"SELECT 1 FROM {default} WHERE {date_column} >= :start AND {date_column} < :end LIMIT 1"),
+            self._bounds(year)
+        ).first() is not None
+    
+    def _create_hash_partitions(self, db: Session, name: str) -> None:
+        hash_partitions = settings.FINANCIAL_TENANT_HASH_PARTITIONS
+        for remainder in range(hash_partitions):
+            db.execute(text(
+                f"CREATE TABLE {name}_h{remainder} PARTITION OF {name} "
+                f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {remainder})"
+            ))
+    
+    def create_partition(self, db: Session, table: str, year: int) -> str:
+        """
+        Create the empty partition of a fiscal year, optionally sub-partitioned by tenant hash.
+        
+        Only catalog locks are taken. A year with rows in the default
+        partition cannot get one this way (Postgres would move them under
+        an exclusive lock); split it with split_year instead.
+        """
+        if self._default_has_year(db, table, year):
+            raise ValueError(f"{table} has rows of {year} in its default partition; split the year instead")
+        
+        name = self._partition_name(table, year)
+        hash_partitions = settings.FINANCIAL_TENANT_HASH_PARTITIONS
+        db.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} {self._bound_clause(year)}"
+            + (" PARTITION BY HASH (tenant_id)" if hash_partitions else "")
+        ))
+        self._create_hash_partitions(db, name)
+        db.commit()
+        logger.info(f"Created partition {name}")
+        return name
+    
+    def split_year(
+        self,
+        db: Session,
+        table: str,
+        year: int,
+        batch_size: Optional[int] = None,
+        pause: Optional[float] = None
+    ) -> str:
+        """
+        Move a year's rows out of the default partition into a partition of their own.
+        
+        Meant for historical years (tables converted by migration 0007) and
+        run explicitly (manage_partitions.py split), never by the schedule.
+        The rows are copied into a standalone table in id order, one short
+        transaction per batch, while the default partition keeps serving
+        them; an interrupted split resumes where it stopped. A final
+        transaction blocks writes to the default partition, applies the
+        changes made meanwhile, deletes the year from it and attaches the
+        copy. The attach checks the rest of the default partition under an
+        exclusive lock on it, so run splits off-peak.
+        """
+        batch_size = batch_size or settings.FINANCIAL_PARTITION_SPLIT_BATCH
+        pause = settings.FINANCIAL_PARTITION_SPLIT_PAUSE if pause is None else pause
+        name = self._partition_name(table, year)
+        default = self._default_name(table)
+        date_column = FISCAL_YEAR_PARTITIONED[table]
+        columns = self._columns(table)
+        bounds = self._bounds(year)
+        in_year = f"{date_column} >= :start AND {date_column} < :end"
+        
+        if name in self.list_partitions(db, table):
+            raise ValueError(f"{table} already has a partition for {year}")
+        
+        if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            hash_partitions = settings.FINANCIAL_TENANT_HASH_PARTITIONS
+            db.execute(text(
+                f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING INDEXES)"
+                + (" PARTITION BY HASH (tenant_id)" if hash_partitions else "")
+            ))
+            self._create_hash_partitions(db, name)
+            # Proves the bounds to ATTACH, which then skips scanning the copy
+            db.execute(text(
+                f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+                f"CHECK ({date_column} >= '{bounds['start']}' AND {date_column} < '{bounds['end']}')"
+            ))
+            db.commit()
+        
+        # Copy in batches; the rows stay in the default partition meanwhile
+        after = db.execute(text(f"SELECT coalesce(max(id), 0) FROM {name}")).scalar()
+        while True:
+            copied = db.execute(
+                text(
+                    f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} "
+                    f"WHERE {in_year} AND id > :after ORDER BY id LIMIT :limit RETURNING id"
+                ),
+                {**bounds, "after": after, "limit": batch_size}
+            ).scalars().all()
+            db.commit()
+            if len(copied) < batch_size:
+                break
+            after = max(copied)
+            if pause:
+                time.sleep(pause)
+        
+        # Swap: catch up with the writes made during the copy, then attach
+        db.execute(text(f"LOCK TABLE {default} IN SHARE MODE"))
+        db.execute(text(
+            f"DELETE FROM {name} s WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {default} d WHERE d.id = s.id AND d.updated_at = s.updated_at)"
+        ))
+        db.execute(
+            text(
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} d "
+                f"WHERE {in_year} AND NOT EXISTS (SELECT 1 FROM {name} s WHERE s.id = d.id)"
+            ),
+            bounds
+        )
+        moved = db.execute(text(f"DELETE FROM {default} WHERE {in_year}"), bounds).rowcount
+        db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {self._bound_clause(year)}"))
+        db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+        db.commit()
+        logger.info(f"Split {moved} rows of {year} out of {default} into {name}")
+        return name
+    
+    def default_years(self, db: Session, table: str) -> List[int]:
+        """Get the years with rows in the default partition, which split_year moves out"""
+        if self._default_name(table) not in self.list_partitions(db, table):
+            return []
+        return self._default_years(db, table)
+    
+    def ensure_partitions(self, db: Session) -> List[str]:
+        """
+        Create the missing partitions of every partitioned table; returns their names.
+        
+        The current year and settings.FINANCIAL_PARTITIONS_AHEAD following
+        years get an empty partition before any row of theirs arrives. A
+        year that already has rows in the default partition is left there
+        (and logged) for an explicit split_year, so this stays a catalog-only
+        operation safe to run on a schedule.
+        """
+        current_year = datetime.now().year
+        created = []
+        for table in FISCAL_YEAR_PARTITIONED:
+            if not self.is_partitioned(db, table):
+                continue
+            
+            default = self._default_name(table)
+            if default not in self.list_partitions(db, table):
+                db.execute(text(f"CREATE TABLE {default} PARTITION OF {table} DEFAULT"))
+                db.commit()
+            
+            years = set(range(current_year, current_year + settings.FINANCIAL_PARTITIONS_AHEAD + 1))
+            for year in sorted(years - set(self.partition_years(db, table))):
+                if self._default_has_year(db, table, year):
+                    logger.warning(f"{table}: rows of {year} are in {default}; run 'manage_partitions.py split {year}'")
+                    continue
+                created.append(self.create_partition(db, table, year))
+        return created
+    
+    def detach_partition(self, db: Session, table: str, year: int) -> Optional[str]:
+        """
+        Detach the partition of a closed fiscal year; returns the detached table's name.
+        
+        The partition stays in the database as a standalone table (to be
+        archived or dropped) and its rows stop being served. DETACH is not
+        run CONCURRENTLY, which Postgres refuses while a default partition
+        exists, but it only holds its lock for a catalog update.
+        """
+        if year >= datetime.now().year:
+            raise ValueError(f"Fiscal year {year} is not closed")
+        name = self._partition_name(table, year)
+        if name not in self.list_partitions(db, table):
+            return None
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        db.commit()
+        logger.info(f"Detached partition {name}")
+        return name
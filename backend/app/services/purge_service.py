@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import logging
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import Base
+from app.services.base_service import BaseService
+
+logger = logging.getLogger(__name__)
+
+class PurgeService(BaseService):
+    """Physically removes soft-deleted rows once their retention window has passed"""
+    
+    def purgeable_tables(self) -> List[Any]:
+        """Tables with soft deletes, referencing tables before the tables they reference"""
+        return [
+            table for table in reversed(Base.metadata.sorted_tables)
+            if "is_deleted" in table.c and "deleted_at" in table.c
+        ]
+    
+    def purge_table(
+        self,
+        db: Session,
+        table: Any,
+        cutoff: datetime,
+        batch_size: Optional[int] = None,
+        pause: Optional[float] = None
+    ) -> int:
+        """
+        Delete the rows of a table soft-deleted before the cutoff; returns the number removed.
+        
+        Each batch is one DELETE ... WHERE id IN (... LIMIT n FOR UPDATE SKIP
+        LOCKED) in its own transaction, found through the partial deleted_at
+        index, so locks are short and rows a request is touching are left for
+        the next run. Rows another table still references are kept.
+        """
+        batch_size = batch_size or settings.SOFT_DELETE_PURGE_BATCH
+        pause = settings.SOFT_DELETE_PURGE_PAUSE if pause is None else pause
+        expired = (
+            select(table.c.id)
+            .where(table.c.is_deleted, table.c.deleted_at < cutoff, *self._unreferenced(table))
+            .order_by(table.c.deleted_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        
+        purged = 0
+        while True:
+            deleted = db.execute(
+                delete(table).where(table.c.id.in_(expired)).returning(table.c.id)
+            ).scalars().all()
+            db.commit()
+            purged += len(deleted)
+            if len(deleted) < batch_size:
+                return purged
+            if pause:
+                time.sleep(pause)
+    
+    def purge(self, db: Session, retention_days: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """Purge every soft-delete table; returns the rows removed by table"""
+        if retention_days is None:
+            retention_days = settings.SOFT_DELETE_RETENTION_DAYS
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        
+        purged = {}
+        for table in self.purgeable_tables():
+            count = self.purge_table(db, table, cutoff, batch_size)
+            if count:
+                logger.info(f"Purged {count} rows of {table.name} deleted before {cutoff.isoformat()}")
+                purged[table.name] = count
+        return purged
@@ -0,0 +1,201 @@
+from typing import Any, Dict, Iterable, List, Tuple
+from datetime import timedelta
+import logging
+
+from elasticsearch.helpers import bulk, streaming_bulk
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.search import get_search_client
+from app.models.search import SearchOutbox
+from app.services.base_service import BaseService
+from app.services.search_service import SEARCH_ENTITIES
+
+logger = logging.getLogger(__name__)
+
+# Mappings of the public search index: one document per searchable record
+INDEX_MAPPINGS = {
+    "properties": {
+        "tenant_id": {"type": "integer"},
+        "type": {"type": "keyword"},
+        "id": {"type": "integer"},
+        "title": {"type": "text", "analyzer": "brazilian"},
+        "description": {"type": "text", "analyzer": "brazilian"},
+        "amount": {"type": "double"},
+        "date": {"type": "date"},
+    }
+}
+
+class SearchIndexService(BaseService):
+    """Keeps the Elasticsearch index in sync with the search outbox"""
+    
+    def __init__(self):
+        self.index = settings.ELASTICSEARCH_INDEX
+        self._index_ready = False
+    
+    def ensure_index(self) -> None:
+        """Create the search index (with its mappings) if it does not exist"""
+        if self._index_ready:
+            return
+        client = get_search_client()
+        if not client.indices.exists(index=self.index):
+            client.indices.create(index=self.index, mappings=INDEX_MAPPINGS)
+        self._index_ready = True
+    
+    def _document_id(self, search_type: str, entity_id: int) -> str:
+        return f"{search_type}-{entity_id}"
+    
+    def _document(self, search_type: str, record: Any) -> Dict[str, Any]:
+        """Build the index document of a record"""
+        _, title, description, amount, hit_date = SEARCH_ENTITIES[search_type]
+        amount_value = getattr(record, amount.key)
+        date_value = getattr(record, hit_date.key)
+        return {
+            "tenant_id": record.tenant_id,
+            "type": search_type,
+            "id": record.id,
+            "title": getattr(record, title.key),
+            "description": getattr(record, description.key),
+            "amount": float(amount_value) if amount_value is not None else None,
+            "date": date_value.isoformat() if date_value is not None else None,
+        }
+    
+    def _index_action(self, search_type: str, record: Any) -> Dict[str, Any]:
+        return {
+            "_op_type": "index",
+            "_index": self.index,
+            "_id": self._document_id(search_type, record.id),
+            "_routing": str(record.tenant_id),
+            "_source": self._document(search_type, record),
+        }
+    
+    def _delete_action(self, search_type: str, entity_id: int, tenant_id: int) -> Dict[str, Any]:
+        return {
+            "_op_type": "delete",
+            "_index": self.index,
+            "_id": self._document_id(search_type, entity_id),
+            "_routing": str(tenant_id),
+        }
+    
+    def process_outbox(self, db: Session, batch_size: int = 500) -> int:
+        """
+        Index one batch of outbox entries with a single bulk request.
+        
+        Entries are claimed with FOR UPDATE SKIP LOCKED so several workers
+        can drain the outbox; only entries indexed successfully are removed.
+        Failed ones record the error and are retried with exponential
+        backoff; after SEARCH_OUTBOX_MAX_ATTEMPTS they stay in the outbox as
+        dead letters (see requeue_dead_letters). Returns the number removed.
+        """
+        entries = db.execute(
+            select(SearchOutbox)
+            .where(
+                SearchOutbox.attempts < settings.SEARCH_OUTBOX_MAX_ATTEMPTS,
+                or_(SearchOutbox.next_attempt_at.is_(None), SearchOutbox.next_attempt_at <= func.now())
+            )
+            .order_by(SearchOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not entries:
+            db.commit()
+            return 0
+        self.ensure_index()
+        
+        # Collapse repeated changes of a record; the latest operation wins
+        changes: Dict[Tuple[str, int], SearchOutbox] = {}
+        entry_ids: Dict[str, List[int]] = {}
+        for entry in entries:
+            changes[(entry.entity, entry.entity_id)] = entry
+            entry_ids.setdefault(self._document_id(entry.entity, entry.entity_id), []).append(entry.id)
+        
+        # Load the records to index with one query per entity type
+        records: Dict[Tuple[str, int], Any] = {}
+        for search_type, (model, *_) in SEARCH_ENTITIES.items():
+            ids = [entity_id for (entity, entity_id), entry in changes.items()
+                   if entity == search_type and entry.operation == "index"]
+            if ids:
+                for record in db.execute(select(model).where(model.id.in_(ids))).scalars():
+                    records[(search_type, record.id)] = record
+        
+        actions = []
+        for (search_type, entity_id), entry in changes.items():
+            record = records.get((search_type, entity_id))
+            if record is not None:
+                actions.append(self._index_action(search_type, record))
+            else:
+                # Deleted (or deleted since it was queued)
+                actions.append(self._delete_action(search_type, entity_id, entry.tenant_id))
+        
+        _, errors = bulk(get_search_client(), actions, raise_on_error=False, refresh=False)
+        failed: Dict[str, str] = {}
+        for error in errors:
+            (operation, result), = error.items()
+            # Deleting a document that was never indexed is fine
+            if operation == "delete" and result.get("status") == 404:
+                continue
+            logger.error(f"Search indexing failed for {result.get('_id')}: {result.get('error')}")
+            failed[result.get("_id")] = str(result.get("error"))[:1000]
+        
+        done = [
+            outbox_id
+            for document_id, outbox_ids in entry_ids.items() if document_id not in failed
+            for outbox_id in outbox_ids
+        ]
+        db.execute(delete(SearchOutbox).where(SearchOutbox.id.in_(done)))
+        retry_delay = timedelta(seconds=settings.SEARCH_OUTBOX_RETRY_DELAY)
+        for document_id, error in failed.items():
+            # Back off: RETRY_DELAY, then twice as long after every further failure
+            db.execute(
+                update(SearchOutbox)
+                .where(SearchOutbox.id.in_(entry_ids[document_id]))
+                .values(
+                    attempts=SearchOutbox.attempts + 1,
+                    last_error=error,
+                    next_attempt_at=func.now() + retry_delay * func.power(2, SearchOutbox.attempts)
+                )
+            )
+        db.commit()
+        return len(done)
+    
+    def requeue_dead_letters(self, db: Session) -> int:
+        """Make the outbox entries that ran out of attempts due again; returns how many"""
+        requeued = db.execute(
+            update(SearchOutbox)
+            .where(SearchOutbox.attempts >= settings.SEARCH_OUTBOX_MAX_ATTEMPTS)
+            .values(attempts=0, next_attempt_at=None)
+        ).rowcount
+        db.commit()
+        return requeued
+    
+    def _tenant_actions(self, db: Session, tenant_id: int) -> Iterable[Dict[str, Any]]:
+        """Stream index actions for every searchable record of a tenant"""
+        for search_type, (model, *_) in SEARCH_ENTITIES.items():
+            records = db.execute(
+                select(model)
+                .where(model.tenant_id == tenant_id)
+                .execution_options(yield_per=1000)
+            ).scalars()
+            for record in records:
+                yield self._index_action(search_type, record)
+    
+    def reindex_tenant(self, db: Session, tenant_id: int) -> int:
+        """Rebuild every search document of a tenant from the database"""
+        client = get_search_client()
+        self.ensure_index()
+        client.delete_by_query(
+            index=self.index,
+            query={"term": {"tenant_id": tenant_id}},
+            routing=str(tenant_id),
+            conflicts="proceed",
+            refresh=True
+        )
+        
+        indexed = 0
+        for ok, result in streaming_bulk(client, self._tenant_actions(db, tenant_id), chunk_size=1000, raise_on_error=False):
+            if ok:
+                indexed += 1
+            else:
+                logger.error(f"Search reindex failed for {result}")
+        return indexed
@@ -0,0 +1,191 @@
+from typing import Any, Dict, Optional
+import asyncio
+from sqlalchemy import select, func, union_all, literal_column
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.financial import Revenue, Expense
+from app.models.contract import Contract, Bidding
+from app.core.config import settings
+from app.core.search import search_match, search_rank, get_search_client, elasticsearch_enabled
+from app.schemas.search import SearchHit
+from app.services.base_service import BaseService
+
+# Public search fields of each entity type, in facet order:
+# (model, title, description, amount, date)
+SEARCH_ENTITIES = {
+    "revenue": (Revenue, Revenue.description, Revenue.source, Revenue.amount, Revenue.date),
+    "expense": (Expense, Expense.description, Expense.beneficiary_name, Expense.amount, Expense.date),
+    "contract": (Contract, Contract.object, Contract.description, Contract.current_value, Contract.signature_date),
+    "bidding": (Bidding, Bidding.object, Bidding.description, Bidding.estimated_value, Bidding.publication_date),
+}
+
+class SearchService(BaseService):
+    # Searchable entity types, in facet order
+    SEARCH_TYPES = tuple(SEARCH_ENTITIES)
+    
+    def _entity_query(self, search_type: str, tenant_id: int, q: str) -> Select:
+        """Build the search branch of one entity type, projected on the common hit columns"""
+        model, title, description, amount, hit_date = SEARCH_ENTITIES[search_type]
+        return select(
+            literal_column(f"'{search_type}'").label("type"),
+            model.id.label("id"),
+            title.label("title"),
+            description.label("description"),
+            amount.label("amount"),
+            hit_date.label("date"),
+            search_rank(model.search_vector, q).label("rank"),
+        ).where(
+            model.tenant_id == tenant_id,
+            search_match(model.search_vector, q)
+        )
+    
+    def _hits(self, tenant_id: int, q: str) -> Any:
+        """UNION ALL of the per-entity searches"""
+        return union_all(*[
+            self._entity_query(search_type, tenant_id, q)
+            for search_type in self.SEARCH_TYPES
+        ]).subquery("hits")
+    
+    def _facet_query(self, tenant_id: int, q: str) -> Select:
+        """Count the hits per type, for pages past the last hit (no row carries the window counts)"""
+        hits = self._hits(tenant_id, q)
+        return select(hits.c.type, func.count()).group_by(hits.c.type)
+    
+    def _search_query(
+        self,
+        tenant_id: int,
+        q: str,
+        type_filter: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Select:
+        """
+        Build the unified search statement: one UNION ALL over the per-entity
+        full-text searches, ranked globally, with the total and per-type
+        facet counts computed by window functions in the same query.
+        """
+        hits = self._hits(tenant_id, q)
+        
+        # Facets are counted over every type, before the type filter applies;
+        # that is why every branch runs even when a type is filtered on
+        facets = [
+            func.count().filter(hits.c.type == search_type).over().label(f"{search_type}_count")
+            for search_type in self.SEARCH_TYPES
+        ]
+        ranked = select(hits, *facets).subquery("ranked")
+        
+        query = select(ranked)
+        if type_filter:
+            query = query.where(ranked.c.type == type_filter)
+        
+        return query.order_by(
+            ranked.c.rank.desc(),
+            ranked.c.date.desc().nulls_last(),
+            ranked.c.type,
+            ranked.c.id.desc()
+        ).offset(skip).limit(limit)
+    
+    def _build_results(self, rows, type_filter: Optional[str] = None, counts=()) -> Dict[str, Any]:
+        """Split the search rows into hits, facet counts and the total (counts: fallback (type, count) rows)"""
+        facets = {search_type: 0 for search_type in self.SEARCH_TYPES}
+        if rows:
+            # Every row carries the same window counts
+            facets = {
+                search_type: getattr(rows[0], f"{search_type}_count")
+                for search_type in self.SEARCH_TYPES
+            }
+        else:
+            facets.update(dict(counts))
+        
+        return {
+            "total": facets[type_filter] if type_filter else sum(facets.values()),
+            "facets": facets,
+            "results": [SearchHit.model_validate(row) for row in rows]
+        }
+    
+    def search(
+        self,
+        db: Session,
+        tenant_id: int,
+        q: str,
+        type_filter: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Search every public entity type of a tenant in one query"""
+        rows = db.execute(self._search_query(tenant_id, q, type_filter, skip, limit)).all()
+        counts = []
+        if not rows and skip:
+            # Page past the end: count the hits separately
+            counts = db.execute(self._facet_query(tenant_id, q)).all()
+        return self._build_results(rows, type_filter, counts)
+    
+    def search_elasticsearch(
+        self,
+        tenant_id: int,
+        q: str,
+        type_filter: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Search the Elasticsearch index, with the same result shape as the Postgres search"""
+        result = get_search_client().search(
+            index=settings.ELASTICSEARCH_INDEX,
+            routing=str(tenant_id),
+            query={
+                "bool": {
+                    "must": [{
+                        "simple_query_string": {
+                            "query": q,
+                            "fields": ["title^2", "description"],
+                            "default_operator": "and"
+                        }
+                    }],
+                    "filter": [{"term": {"tenant_id": tenant_id}}]
+                }
+            },
+            # Facets are counted over every type, before the type filter applies
+            aggs={"types": {"terms": {"field": "type", "size": len(self.SEARCH_TYPES)}}},
+            post_filter={"term": {"type": type_filter}} if type_filter else None,
+            from_=skip,
+            size=limit,
+            track_total_hits=True
+        )
+        
+        facets = {search_type: 0 for search_type in self.SEARCH_TYPES}
+        for bucket in result["aggregations"]["types"]["buckets"]:
+            facets[bucket["key"]] = bucket["doc_count"]
+        
+        return {
+            "total": result["hits"]["total"]["value"],
+            "facets": facets,
+            "results": [
+                SearchHit(**hit["_source"], rank=hit["_score"])
+                for hit in result["hits"]["hits"]
+            ]
+        }
+    
+    async def search_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        q: str,
+        type_filter: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """Search every public entity type of a tenant in one query (async)"""
+        if elasticsearch_enabled():
+            # The Elasticsearch client is sync; keep it off the event loop
+            return await asyncio.to_thread(
+                self.search_elasticsearch, tenant_id, q, type_filter, skip, limit
+            )
+        
+        rows = (await db.execute(self._search_query(tenant_id, q, type_filter, skip, limit))).all()
+        counts = []
+        if not rows and skip:
+            # Page past the end: count the hits separately
+            counts = (await db.execute(self._facet_query(tenant_id, q))).all()
+        return self._build_results(rows, type_filter, counts)
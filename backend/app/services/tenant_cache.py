@@ -0,0 +1,141 @@
+from typing import Any, Dict, Optional, Set, Tuple
+from types import SimpleNamespace
+import threading
+import time
+
+from app.core.config import settings
+from app.models.tenant import Tenant
+
+# Tenant attributes a cached entry can be looked up by
+LOOKUP_FIELDS = ("id", "slug", "custom_domain", "subdomain")
+
+class TenantCache:
+    """
+    In-process TTL cache of tenants keyed by id, slug, custom domain and subdomain.
+    
+    Entries are detached snapshots (plain attribute objects built from
+    Tenant.to_dict()), so they are safe to share between requests and
+    sessions. TenantService invalidates them explicitly on every tenant
+    write; the TTL bounds staleness across worker processes.
+    """
+    
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, Any], Tuple[float, SimpleNamespace]] = {}
+        self._keys_by_id: Dict[int, Set[Tuple[str, Any]]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, field: str, value: Any) -> Optional[SimpleNamespace]:
+        """Get a cached tenant snapshot, or None if missing or expired"""
+        key = (field, value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at < time.monotonic():
+                self._drop(snapshot.id)
+                return None
+            return snapshot
+    
+    def set(self, tenant: Tenant) -> SimpleNamespace:
+        """Cache a tenant under all of its lookup keys and return the snapshot"""
+        snapshot = SimpleNamespace(**tenant.to_dict())
+        expires_at = time.monotonic() + self.ttl
+        keys = {
+            (field, getattr(snapshot, field))
+            for field in LOOKUP_FIELDS
+            if getattr(snapshot, field) is not None
+        }
+        with self._lock:
+            self._drop(snapshot.id)
+            for key in keys:
+                self._entries[key] = (expires_at, snapshot)
+            self._keys_by_id[snapshot.id] = keys
+        return snapshot
+    
+    def invalidate(self, tenant_id: int) -> None:
+        """Drop every cached key of a tenant"""
+        with self._lock:
+            self._drop(tenant_id)
+    
+    def clear(self) -> None:
+        """Drop all cached tenants"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+    
+    def _drop(self, tenant_id: int) -> None:
+        for key in self._keys_by_id.pop(tenant_id, set()):
+            self._entries.pop(key, None)
+
+tenant_cache = TenantCache(ttl=settings.TENANT_CACHE_TTL)
+
+class TenantDomainIndex:
+    """
+    In-memory map of custom domains and subdomains to active tenant snapshots.
+    
+    The index is rebuilt from the full list of active tenants, never per
+    request: TenantService marks it stale on tenant writes and the host
+    middleware reloads it once (or after TENANT_INDEX_REFRESH seconds, to
+    pick up writes made by other workers).
+    """
+    
+    def __init__(self, base_domain: str, refresh_interval: int):
+        self.base_domain = base_domain.lower().strip(".")
+        self.refresh_interval = refresh_interval
+        self._domains: Dict[str, SimpleNamespace] = {}
+        self._subdomains: Dict[str, SimpleNamespace] = {}
+        self._loaded_at: Optional[float] = None
+    
+    @property
+    def needs_refresh(self) -> bool:
+        """Whether the index was never loaded, was invalidated or is too old"""
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_interval
+        )
+    
+    def load(self, tenants) -> None:
+        """Replace the index with the given active tenants"""
+        domains: Dict[str, SimpleNamespace] = {}
+        subdomains: Dict[str, SimpleNamespace] = {}
+        for tenant in tenants:
+            snapshot = SimpleNamespace(**tenant.to_dict())
+            if snapshot.custom_domain:
+                domains[snapshot.custom_domain.lower()] = snapshot
+            if snapshot.subdomain:
+                subdomains[snapshot.subdomain.lower()] = snapshot
+        
+        # Swap whole dicts so concurrent readers never see a partial index
+        self._domains = domains
+        self._subdomains = subdomains
+        self._loaded_at = time.monotonic()
+    
+    def defer_refresh(self) -> None:
+        """Keep the current index for another refresh interval (e.g. after a failed reload)"""
+        self._loaded_at = time.monotonic()
+    
+    def mark_stale(self) -> None:
+        """Force a reload before the next lookup"""
+        self._loaded_at = None
+    
+    def resolve(self, host: Optional[str]) -> Optional[SimpleNamespace]:
+        """Resolve a Host header value to a tenant snapshot"""
+        if not host:
+            return None
+        hostname = host.split(":", 1)[0].lower().rstrip(".")
+        
+        tenant = self._domains.get(hostname)
+        if tenant is not None:
+            return tenant
+        
+        suffix = f".{self.base_domain}"
+        if hostname.endswith(suffix):
+            return self._subdomains.get(hostname[:-len(suffix)])
+        return None
+
+tenant_domain_index = TenantDomainIndex(
+    base_domain=settings.TENANT_BASE_DOMAIN,
+    refresh_interval=settings.TENANT_INDEX_REFRESH
+)
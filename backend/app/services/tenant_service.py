@@ -1,8 +1,12 @@
-from typing import Optional, List
+from typing import Any, Optional, List, Sequence
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.tenant import Tenant
+from app.models.dataset import DatasetVersion
 from app.schemas.tenant import TenantCreate, TenantUpdate
 from app.services.base_service import BaseService
+from app.services.tenant_cache import tenant_cache, tenant_domain_index
 
 class TenantService(BaseService):
     def __init__(self):
@@ -28,6 +32,46 @@ class TenantService(BaseService):
         """Get tenant by subdomain"""
         return db.query(Tenant).filter(Tenant.subdomain == subdomain).first()
     
+    async def get_tenant_async(self, db: AsyncSession, tenant_id: int) -> Optional[Tenant]:
+        """Get tenant by ID (async)"""
+        result = await db.execute(select(Tenant).where(Tenant.id == tenant_id))
+        return result.scalars().first()
+    
+    async def get_by_slug_async(self, db: AsyncSession, slug: str) -> Optional[Tenant]:
+        """Get tenant by slug (async)"""
+        result = await db.execute(select(Tenant).where(Tenant.slug == slug))
+        return result.scalars().first()
+    
+    async def get_by_domain_async(self, db: AsyncSession, domain: str) -> Optional[Tenant]:
+        """Get tenant by custom domain (async)"""
+        result = await db.execute(select(Tenant).where(Tenant.custom_domain == domain))
+        return result.scalars().first()
+    
+    async def get_by_subdomain_async(self, db: AsyncSession, subdomain: str) -> Optional[Tenant]:
+        """Get tenant by subdomain (async)"""
+        result = await db.execute(select(Tenant).where(Tenant.subdomain == subdomain))
+        return result.scalars().first()
+    
+    async def get_cached_async(self, db: AsyncSession, field: str, value: Any) -> Optional[Any]:
+        """
+        Get a tenant snapshot by id, slug, custom_domain or subdomain,
+        going to the database only on a cache miss (async)
+        """
+        tenant = tenant_cache.get(field, value)
+        if tenant is not None:
+            return tenant
+        
+        lookups = {
+            "id": self.get_tenant_async,
+            "slug": self.get_by_slug_async,
+            "custom_domain": self.get_by_domain_async,
+            "subdomain": self.get_by_subdomain_async,
+        }
+        db_tenant = await lookups[field](db, value)
+        if db_tenant is None:
+            return None
+        return tenant_cache.set(db_tenant)
+    
     def get_tenants(
         self,
         db: Session,
@@ -87,6 +131,7 @@ class TenantService(BaseService):
         db.add(db_tenant)
         db.commit()
         db.refresh(db_tenant)
+        tenant_domain_index.mark_stale()
         return db_tenant
     
     def update_tenant(self, db: Session, tenant: Tenant, tenant_update: TenantUpdate) -> Tenant:
@@ -95,8 +140,12 @@ class TenantService(BaseService):
         for field, value in update_data.items():
             setattr(tenant, field, value)
         
+        self._touch_datasets(db, tenant.id, "tenant")
         db.commit()
         db.refresh(tenant)
+        tenant_cache.invalidate(tenant.id)
+        tenant_domain_index.mark_stale()
+        self._data_changed(tenant.id)
         return tenant
     
     def delete_tenant(self, db: Session, tenant_id: int) -> None:
@@ -105,6 +154,8 @@ class TenantService(BaseService):
         if tenant:
             db.delete(tenant)
             db.commit()
+            tenant_cache.invalidate(tenant_id)
+            tenant_domain_index.mark_stale()
     
     def activate_tenant(self, db: Session, tenant_id: int) -> Optional[Tenant]:
         """Activate tenant"""
@@ -113,6 +164,8 @@ class TenantService(BaseService):
             tenant.is_active = True
             db.commit()
             db.refresh(tenant)
+            tenant_cache.invalidate(tenant_id)
+            tenant_domain_index.mark_stale()
         return tenant
     
     def deactivate_tenant(self, db: Session, tenant_id: int) -> Optional[Tenant]:
@@ -122,12 +175,34 @@ class TenantService(BaseService):
             tenant.is_active = False
             db.commit()
             db.refresh(tenant)
+            tenant_cache.invalidate(tenant_id)
+            tenant_domain_index.mark_stale()
         return tenant
     
     def get_active_tenants(self, db: Session) -> List[Tenant]:
         """Get all active tenants"""
         return db.query(Tenant).filter(Tenant.is_active == True).order_by(Tenant.name).all()
     
+    async def get_active_tenants_async(self, db: AsyncSession) -> List[Tenant]:
+        """Get all active tenants (async)"""
+        result = await db.execute(select(Tenant).where(Tenant.is_active == True))
+        return result.scalars().all()
+    
+    async def get_dataset_versions_async(
+        self,
+        db: AsyncSession,
+        tenant_id: int,
+        datasets: Sequence[str]
+    ) -> List[DatasetVersion]:
+        """Get the change counters of a tenant's datasets (async)"""
+        result = await db.execute(
+            select(DatasetVersion).where(
+                DatasetVersion.tenant_id == tenant_id,
+                DatasetVersion.dataset.in_(datasets)
+            )
+        )
+        return result.scalars().all()
+    
     def get_trial_tenants(self, db: Session) -> List[Tenant]:
         """Get all trial tenants"""
         return db.query(Tenant).filter(Tenant.is_trial == True).order_by(Tenant.trial_ends_at).all()
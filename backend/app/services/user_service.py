@@ -1,4 +1,5 @@
 from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select, or_
 from app.models.user import User
@@ -14,6 +15,11 @@ class UserService(BaseService):
         """Get user by id"""
         return db.query(User).filter(User.id == user_id).first()
     
+    async def get_user_async(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """Get user by id (async)"""
+        result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
+    
     def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
         """Get user by email"""
         return db.query(User).filter(User.email == email).first()
@@ -0,0 +1,27 @@
+import logging
+
+from app.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.services.archive_service import ArchiveService
+from app.services.tenant_service import TenantService
+
+logger = logging.getLogger(__name__)
+
+archive_service = ArchiveService()
+tenant_service = TenantService()
+
+@celery_app.task(name="archive.tenant")
+def archive_tenant(tenant_id: int):
+    """Move the closed years of a tenant that are old enough to cold storage"""
+    with SessionLocal() as db:
+        archives = archive_service.archive_tenant(db, tenant_id)
+    for archive in archives:
+        logger.info(f"Archived {archive.row_count} {archive.dataset} of {archive.year} for tenant {tenant_id}")
+
+@celery_app.task(name="archive.run_all")
+def archive_all():
+    """Queue an archival run for every active tenant"""
+    with SessionLocal() as db:
+        tenant_ids = [tenant.id for tenant in tenant_service.get_active_tenants(db)]
+    for tenant_id in tenant_ids:
+        archive_tenant.delay(tenant_id)
@@ -0,0 +1,61 @@
+from typing import Optional
+from datetime import datetime
+import logging
+
+import redis
+from kombu.exceptions import OperationalError
+
+from app.celery_app import celery_app
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.dashboard_service import DashboardService
+from app.services.tenant_service import TenantService
+
+logger = logging.getLogger(__name__)
+
+dashboard_service = DashboardService()
+tenant_service = TenantService()
+
+@celery_app.task(name="dashboard.refresh_snapshot")
+def refresh_dashboard_snapshot(tenant_id: int, year: int):
+    """Rebuild the dashboard snapshot of a tenant and year"""
+    with SessionLocal() as db:
+        dashboard_service.refresh_snapshot(db, tenant_id, year)
+
+@celery_app.task(name="dashboard.refresh_tenant")
+def refresh_tenant_dashboards(tenant_id: int):
+    """Rebuild the current year and every existing snapshot of a tenant"""
+    with SessionLocal() as db:
+        years = set(dashboard_service.get_snapshot_years(db, tenant_id))
+        years.add(datetime.now().year)
+        for year in sorted(years):
+            dashboard_service.refresh_snapshot(db, tenant_id, year)
+
+@celery_app.task(name="dashboard.refresh_all")
+def refresh_all_dashboards():
+    """Queue a snapshot refresh for every active tenant"""
+    with SessionLocal() as db:
+        tenant_ids = [tenant.id for tenant in tenant_service.get_active_tenants(db)]
+    for tenant_id in tenant_ids:
+        refresh_tenant_dashboards.delay(tenant_id)
+
+def schedule_dashboard_refresh(tenant_id: int, year: Optional[int] = None) -> None:
+    """
+    Queue a refresh of a tenant's dashboards (or of a single year).
+    
+    Calls within DASHBOARD_REFRESH_DELAY seconds share one refresh.
+    Failures are logged only: the public endpoint falls back to live
+    queries while a snapshot is missing or stale.
+    """
+    delay = settings.DASHBOARD_REFRESH_DELAY
+    pending_key = f"dashboard:pending:{tenant_id}:{year or 'all'}"
+    try:
+        if not response_cache.client.set(pending_key, 1, nx=True, ex=delay):
+            return
+        if year is None:
+            refresh_tenant_dashboards.apply_async((tenant_id,), countdown=delay, retry=False)
+        else:
+            refresh_dashboard_snapshot.apply_async((tenant_id, year), countdown=delay, retry=False)
+    except (redis.RedisError, OperationalError) as e:
+        logger.warning(f"Could not queue dashboard refresh for tenant {tenant_id}: {e}")
@@ -0,0 +1,27 @@
+import logging
+
+from app.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.services.open_data_service import OpenDataService
+from app.services.tenant_service import TenantService
+
+logger = logging.getLogger(__name__)
+
+open_data_service = OpenDataService()
+tenant_service = TenantService()
+
+@celery_app.task(name="open_data.refresh_tenant")
+def refresh_tenant_open_data(tenant_id: int, force: bool = False):
+    """Write the Parquet snapshots of a tenant that are missing or out of date"""
+    with SessionLocal() as db:
+        written = open_data_service.refresh_tenant(db, tenant_id, force)
+    if written:
+        logger.info(f"Wrote {written} open-data snapshots for tenant {tenant_id}")
+
+@celery_app.task(name="open_data.refresh_all")
+def refresh_all_open_data():
+    """Queue an open-data snapshot refresh for every active tenant"""
+    with SessionLocal() as db:
+        tenant_ids = [tenant.id for tenant in tenant_service.get_active_tenants(db)]
+    for tenant_id in tenant_ids:
+        refresh_tenant_open_data.delay(tenant_id)
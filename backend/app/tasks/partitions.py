@@ -0,0 +1,17 @@
+import logging
+
+from app.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.services.partition_service import PartitionService
+
+logger = logging.getLogger(__name__)
+
+partition_service = PartitionService()
+
+@celery_app.task(name="partitions.ensure")
+def ensure_financial_partitions():
+    """Pre-create the coming fiscal-year partitions of revenues and expenses (never splits the default partition)"""
+    with SessionLocal() as db:
+        created = partition_service.ensure_partitions(db)
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
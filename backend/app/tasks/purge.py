@@ -0,0 +1,17 @@
+import logging
+
+from app.celery_app import celery_app
+from app.core.database import SessionLocal
+from app.services.purge_service import PurgeService
+
+logger = logging.getLogger(__name__)
+
+purge_service = PurgeService()
+
+@celery_app.task(name="purge.run")
+def purge_soft_deleted():
+    """Physically remove the rows soft-deleted longer ago than the retention window"""
+    with SessionLocal() as db:
+        purged = purge_service.purge(db)
+    if purged:
+        logger.info(f"Purged soft-deleted rows: {', '.join(f'{table}={count}' for table, count in purged.items())}")
@@ -0,0 +1,27 @@
+import logging
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.search import elasticsearch_enabled
+from app.services.search_index_service import SearchIndexService
+
+logger = logging.getLogger(__name__)
+
+search_index_service = SearchIndexService()
+
+@celery_app.task(name="search.process_outbox")
+def process_search_outbox():
+    """Drain the search outbox into Elasticsearch, one bulk request per batch, until a batch is not fully indexed"""
+    if not elasticsearch_enabled():
+        return
+    with SessionLocal() as db:
+        while search_index_service.process_outbox(db, settings.SEARCH_OUTBOX_BATCH) == settings.SEARCH_OUTBOX_BATCH:
+            pass
+
+@celery_app.task(name="search.reindex_tenant")
+def reindex_tenant_search(tenant_id: int):
+    """Rebuild the search documents of a tenant"""
+    with SessionLocal() as db:
+        indexed = search_index_service.reindex_tenant(db, tenant_id)
+    logger.info(f"Reindexed {indexed} search documents for tenant {tenant_id}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compare the two ways of rendering a public listing page.
+
+    orm:        ORM instances -> Pydantic validation -> JSON (the old path)
+    projection: Core rows of the schema's columns -> orjson (dump_rows)
+
+Rows are synthetic and built in memory, so only serialization is measured.
+
+Usage:
+    python benchmark_list_serialization.py
+    python benchmark_list_serialization.py --rows 100 --repeat 2000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pydantic import TypeAdapter
+
+import app.models  # noqa: F401  (register every mapper)
+from app.core.projection import dump_rows
+from app.models.contract import Bidding, BiddingModality, BiddingStatus
+from app.schemas.contract import BiddingResponse
+
+def build_biddings(count: int) -> List[Bidding]:
+    """Build detached Bidding instances as the ORM path would load them"""
+    now = datetime.now(timezone.utc)
+    return [
+        Bidding(
+            id=index,
+            tenant_id=1,
+            number=f"{index:05d}/2024",
+            year=2024,
+            modality=BiddingModality.ELECTRONIC_AUCTION,
+            object=f"Aquisição de material de consumo, lote {index}",
+            description="Registro de preços para aquisição de material de expediente",
+            publication_date=date(2024, 3, 1),
+            opening_date=now,
+            estimated_value=Decimal("125430.50"),
+            status=BiddingStatus.PUBLISHED,
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(1, count + 1)
+    ]
+
+def as_rows(biddings: List[Bidding]) -> List[tuple]:
+    """The tuples project() would fetch for the same records"""
+    names = list(BiddingResponse.model_fields)
+    return [
+        tuple(float(value) if isinstance(value, Decimal) else value
+              for value in (getattr(bidding, name) for name in names))
+        for bidding in biddings
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing serialization")
+    parser.add_argument("--rows", type=int, default=100, help="Rows per page (default: 100)")
+    parser.add_argument("--repeat", type=int, default=1000, help="Pages rendered per run (default: 1000)")
+    args = parser.parse_args()
+    
+    biddings = build_biddings(args.rows)
+    rows = as_rows(biddings)
+    adapter = TypeAdapter(List[BiddingResponse])
+    
+    paths = {
+        "orm": lambda: adapter.dump_json(adapter.validate_python(biddings, from_attributes=True)),
+        "projection": lambda: dump_rows(rows, BiddingResponse),
+    }
+    
+    results = {}
+    for name, render in paths.items():
+        render()
+        elapsed = min(timeit.repeat(render, number=args.repeat, repeat=3))
+        results[name] = elapsed / args.repeat * 1000
+        print(f"{name:>10}: {results[name]:.3f} ms/page ({args.rows} rows)")
+    print(f"{'speedup':>10}: {results['orm'] / results['projection']:.1f}x")
+
+if __name__ == "__main__":
+    main()
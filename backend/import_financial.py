@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Bulk import revenues or expenses from a CSV or XLSX file.
+
+Usage:
+    python import_financial.py --tenant demo revenues receitas_2024.csv
+    python import_financial.py --tenant demo expenses despesas_2024.xlsx
+    python import_financial.py --tenant demo --upsert expenses despesas_2024.xlsx
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+
+import app.models  # noqa: F401  (register every mapper)
+from app.core.database import SessionLocal
+from app.services.import_service import FinancialImportService, IMPORT_DATASETS
+from app.services.tenant_service import TenantService
+
+def main():
+    parser = argparse.ArgumentParser(description="Import revenues or expenses from a CSV/XLSX file")
+    parser.add_argument("--tenant", required=True, help="Tenant slug")
+    parser.add_argument("--encoding", default="utf-8-sig", help="CSV encoding (default: utf-8-sig)")
+    parser.add_argument("--upsert", action="store_true", help="Update records with the same natural key instead of inserting")
+    parser.add_argument("dataset", choices=sorted(IMPORT_DATASETS))
+    parser.add_argument("path", help="File to import (.csv or .xlsx)")
+    args = parser.parse_args()
+    
+    import_service = FinancialImportService()
+    
+    with SessionLocal() as db:
+        tenant = TenantService().get_by_slug(db, args.tenant)
+        if not tenant:
+            sys.exit(f"Tenant not found: {args.tenant}")
+        
+        started = time.monotonic()
+        try:
+            with open(args.path, "rb") as file:
+                result = import_service.import_file(
+                    db,
+                    tenant.id,
+                    args.dataset,
+                    file,
+                    os.path.basename(args.path),
+                    encoding=args.encoding,
+                    upsert=args.upsert
+                )
+        except HTTPException as e:
+            sys.exit(f"Import failed: {e.detail}")
+        elapsed = time.monotonic() - started
+    
+    for error in result["errors"]:
+        print(f"line {error['row']}: {error['field']}: {error['message']}")
+    print(
+        f"{args.dataset}: {result['imported']} imported, {result['updated']} updated, {result['rejected']} rejected "
+        f"of {result['total_rows']} rows in {elapsed:.1f}s"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Move closed fiscal years to cold storage (Parquet) and back.
+
+Usage:
+    python manage_archive.py archive                  # every active tenant
+    python manage_archive.py archive --tenant demo
+    python manage_archive.py list --tenant demo
+    python manage_archive.py restore --tenant demo expenses 2015
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select
+
+import app.models  # noqa: F401  (register every mapper)
+from app.core.database import SessionLocal
+from app.models.dataset import ArchivedYear
+from app.services.archive_service import ArchiveService, ARCHIVE_DATASETS
+from app.services.tenant_service import TenantService
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold storage of closed fiscal years")
+    parser.add_argument("command", choices=["archive", "list", "restore"])
+    parser.add_argument("dataset", nargs="?", choices=list(ARCHIVE_DATASETS), help="Dataset (restore)")
+    parser.add_argument("year", type=int, nargs="?", help="Fiscal year (restore)")
+    parser.add_argument("--tenant", help="Tenant slug (default: every active tenant)")
+    args = parser.parse_args()
+    if args.command == "restore" and (not args.tenant or args.dataset is None or args.year is None):
+        parser.error("restore needs --tenant, a dataset and a year")
+    
+    tenant_service = TenantService()
+    archive_service = ArchiveService()
+    
+    with SessionLocal() as db:
+        if args.tenant:
+            tenant = tenant_service.get_by_slug(db, args.tenant)
+            if not tenant:
+                sys.exit(f"Tenant not found: {args.tenant}")
+            tenants = [tenant]
+        else:
+            tenants = tenant_service.get_active_tenants(db)
+        
+        for tenant in tenants:
+            if args.command == "archive":
+                for archive in archive_service.archive_tenant(db, tenant.id):
+                    print(f"{tenant.slug}: archived {archive.row_count} {archive.dataset} of {archive.year}")
+            elif args.command == "list":
+                archives = db.execute(
+                    select(ArchivedYear)
+                    .where(ArchivedYear.tenant_id == tenant.id)
+                    .order_by(ArchivedYear.dataset, ArchivedYear.year)
+                ).scalars()
+                for archive in archives:
+                    print(f"{tenant.slug}: {archive.dataset} {archive.year}: {archive.row_count} rows, {archive.size_bytes} bytes")
+            else:
+                restored = archive_service.restore_year(db, tenant.id, args.dataset, args.year)
+                print(f"{tenant.slug}: restored {restored} {args.dataset} of {args.year}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Maintain the fiscal-year partitions of revenues and expenses.
+
+Usage:
+    python manage_partitions.py list
+    python manage_partitions.py ensure               # current and coming years
+    python manage_partitions.py create 2027
+    python manage_partitions.py split                # every year still in the default partition
+    python manage_partitions.py split 2016 --batch-size 5000
+    python manage_partitions.py detach 2015 --table expenses
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.models  # noqa: F401  (register every mapper)
+from app.core.database import SessionLocal
+from app.core.partitioning import FISCAL_YEAR_PARTITIONED
+from app.services.partition_service import PartitionService
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain fiscal-year partitions")
+    parser.add_argument("command", choices=["list", "ensure", "create", "split", "detach"])
+    parser.add_argument("year", type=int, nargs="?", help="Fiscal year (create, detach; split: default every stored year)")
+    parser.add_argument("--table", choices=list(FISCAL_YEAR_PARTITIONED), help="Table (default: every partitioned table)")
+    parser.add_argument("--batch-size", type=int, help="Rows copied per transaction by split")
+    args = parser.parse_args()
+    if args.command in ("create", "detach") and args.year is None:
+        parser.error(f"{args.command} needs a year")
+    
+    partition_service = PartitionService()
+    tables = [args.table] if args.table else list(FISCAL_YEAR_PARTITIONED)
+    
+    with SessionLocal() as db:
+        for table in tables:
+            if not partition_service.is_partitioned(db, table):
+                sys.exit(f"{table} is not partitioned; run the database migrations first")
+        
+        if args.command == "ensure":
+            for name in partition_service.ensure_partitions(db):
+                print(f"Created {name}")
+            return
+        
+        for table in tables:
+            if args.command == "list":
+                for name, bound in partition_service.list_partitions(db, table).items():
+                    print(f"{name}: {bound}")
+            elif args.command == "create":
+                if args.year in partition_service.partition_years(db, table):
+                    print(f"{table}: {args.year} already has a partition")
+                    continue
+                try:
+                    print(f"Created {partition_service.create_partition(db, table, args.year)}")
+                except ValueError as e:
+                    sys.exit(str(e))
+            elif args.command == "split":
+                years = [args.year] if args.year is not None else partition_service.default_years(db, table)
+                for year in years:
+                    if year in partition_service.partition_years(db, table):
+                        print(f"{table}: {year} already has a partition")
+                        continue
+                    print(f"Split {partition_service.split_year(db, table, year, args.batch_size)}")
+            else:
+                try:
+                    name = partition_service.detach_partition(db, table, args.year)
+                except ValueError as e:
+                    sys.exit(str(e))
+                print(f"Detached {name}" if name else f"{table}: no partition for {args.year}")
+
+if __name__ == "__main__":
+    main()
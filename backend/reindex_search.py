@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Rebuild the Elasticsearch documents of one or every tenant.
+
+Usage:
+    python reindex_search.py              # every active tenant
+    python reindex_search.py --tenant demo
+    python reindex_search.py --requeue-failed   # retry the outbox dead letters
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.models  # noqa: F401  (register every mapper)
+from app.core.database import SessionLocal
+from app.services.search_index_service import SearchIndexService
+from app.services.tenant_service import TenantService
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the public search index")
+    parser.add_argument("--tenant", help="Tenant slug (default: every active tenant)")
+    parser.add_argument("--requeue-failed", action="store_true", help="Retry the outbox entries that ran out of attempts instead")
+    args = parser.parse_args()
+    
+    tenant_service = TenantService()
+    search_index_service = SearchIndexService()
+    
+    with SessionLocal() as db:
+        if args.requeue_failed:
+            requeued = search_index_service.requeue_dead_letters(db)
+            print(f"{requeued} outbox entries requeued")
+            return
+        
+        if args.tenant:
+            tenant = tenant_service.get_by_slug(db, args.tenant)
+            if not tenant:
+                sys.exit(f"Tenant not found: {args.tenant}")
+            tenants = [tenant]
+        else:
+            tenants = tenant_service.get_active_tenants(db)
+        
+        for tenant in tenants:
+            indexed = search_index_service.reindex_tenant(db, tenant.id)
+            print(f"{tenant.slug}: {indexed} documents indexed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.api_v1.endpoints import public
+from app.api.deps import get_async_db
+from app.core.cache import CACHE_STATUS_HEADER, response_cache
+from app.models.dataset import DatasetVersion
+from app.models.financial import RevenueCategory
+from app.schemas.financial import RevenueResponse
+
+TENANT = SimpleNamespace(id=1, slug="demo", is_active=True)
+
+REVENUE = {
+    "tenant_id": 1,
+    "date": date(2024, 3, 15),
+    "amount": 1250.5,
+    "description": "IPTU",
+    "subcategory": None,
+    "budget_code": None,
+    "category": RevenueCategory.TAXES,
+    "source": None,
+    "process_number": None,
+    "id": 10,
+    "year": 2024,
+    "month": 3,
+    "created_at": datetime(2024, 3, 15, 12, 0, tzinfo=timezone.utc),
+    "updated_at": None,
+}
+
+class PublicData:
+    """The tenant's DatasetVersion counters and revenue listing, in place of the database"""
+    
+    def __init__(self):
+        self.versions = {"revenues": 1}
+        self.updated_at = datetime(2024, 3, 15, 12, 0, tzinfo=timezone.utc)
+        self.listings = 0
+    
+    def write(self, dataset: str) -> None:
+        """Bump a counter, as BaseService._touch_datasets does in every write transaction"""
+        self.versions[dataset] = self.versions.get(dataset, 0) + 1
+        self.updated_at = datetime.now(timezone.utc)
+    
+    async def get_cached_async(self, db, field, value):
+        return TENANT if value == TENANT.slug else None
+    
+    async def get_dataset_versions_async(self, db, tenant_id, datasets):
+        return [
+            DatasetVersion(tenant_id=tenant_id, dataset=dataset, version=version, updated_at=self.updated_at)
+            for dataset, version in self.versions.items() if dataset in datasets
+        ]
+    
+    async def list_revenue_rows_async(self, db, **filters):
+        self.listings += 1
+        return [tuple(REVENUE[name] for name in RevenueResponse.model_fields)]
+
+@pytest.fixture
+def data(monkeypatch):
+    data = PublicData()
+    monkeypatch.setattr(public.tenant_service, "get_cached_async", data.get_cached_async)
+    monkeypatch.setattr(public.tenant_service, "get_dataset_versions_async", data.get_dataset_versions_async)
+    monkeypatch.setattr(public.financial_service, "list_revenue_rows_async", data.list_revenue_rows_async)
+    return data
+
+@pytest.fixture
+def client(data, monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", True)
+    monkeypatch.setattr(response_cache, "_async_client", fakeredis.aioredis.FakeRedis())
+    
+    app = FastAPI()
+    app.include_router(public.router, prefix="/public")
+    app.dependency_overrides[get_async_db] = lambda: None
+    with TestClient(app) as client:
+        yield client
+
+URL = "/public/tenant/demo/revenues"
+
+def test_first_request_is_a_cache_miss_with_validators(client, data):
+    response = client.get(URL)
+    
+    assert response.status_code == 200
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert response.headers["ETag"].startswith('"')
+    assert response.headers["Last-Modified"] == "Fri, 15 Mar 2024 12:00:00 GMT"
+    assert response.json()[0]["id"] == 10
+    assert data.listings == 1
+
+def test_matching_if_none_match_is_not_modified(client, data):
+    etag = client.get(URL).headers["ETag"]
+    
+    response = client.get(URL, headers={"If-None-Match": etag})
+    
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert data.listings == 1
+
+def test_weak_if_none_match_is_not_modified(client, data):
+    etag = client.get(URL).headers["ETag"]
+    
+    response = client.get(URL, headers={"If-None-Match": f"W/{etag}"})
+    
+    assert response.status_code == 304
+
+def test_repeated_request_is_served_from_the_cache(client, data):
+    first = client.get(URL)
+    
+    second = client.get(URL)
+    
+    assert second.status_code == 200
+    assert second.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.content == first.content
+    assert data.listings == 1
+
+def test_other_query_string_is_a_separate_entry(client, data):
+    client.get(URL)
+    
+    response = client.get(URL, params={"year": 2024})
+    
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert data.listings == 2
+
+def test_write_moves_readers_to_a_new_entry(client, data):
+    etag = client.get(URL).headers["ETag"]
+    data.write("revenues")
+    
+    stale = client.get(URL, headers={"If-None-Match": etag})
+    fresh = client.get(URL)
+    
+    assert stale.status_code == 200
+    assert stale.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert stale.headers["ETag"] != etag
+    assert fresh.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert data.listings == 2
+
+def test_write_to_another_dataset_keeps_the_entry(client, data):
+    client.get(URL)
+    data.write("expenses")
+    
+    response = client.get(URL)
+    
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert data.listings == 1
+
+def test_redis_errors_fall_back_to_the_database(client, data, monkeypatch):
+    monkeypatch.setattr(response_cache, "_async_client", fakeredis.aioredis.FakeRedis(connected=False))
+    
+    first = client.get(URL)
+    second = client.get(URL)
+    
+    assert first.status_code == second.status_code == 200
+    assert second.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert data.listings == 2
@@ -0,0 +1,161 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from elastic_transport import SerializerCollection
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.search import SearchOutbox
+from app.services import search_index_service as search_index_module
+from app.services.base_service import BaseService
+from app.services.search_index_service import SearchIndexService
+from app.services.search_service import SearchService
+
+class FakeElasticsearch:
+    """
+    In-memory stand-in for the Elasticsearch client used by the bulk helper.
+    
+    Documents are kept by id; ids listed in failing are rejected with a 500.
+    """
+    
+    def __init__(self, failing=()):
+        self.documents = {}
+        self.requests = []
+        self.failing = set(failing)
+        self.indices = SimpleNamespace(exists=lambda index: True, create=lambda **kwargs: None)
+        self.transport = SimpleNamespace(serializers=SerializerCollection())
+    
+    def options(self, **kwargs):
+        return self
+    
+    def bulk(self, operations, **kwargs):
+        lines = [json.loads(line) for line in operations]
+        items = []
+        while lines:
+            (operation, header), = lines.pop(0).items()
+            document_id = header["_id"]
+            self.requests.append((operation, document_id))
+            if document_id in self.failing:
+                status, error = 500, {"type": "internal_error"}
+            elif operation == "index":
+                self.documents[document_id] = lines.pop(0)
+                status, error = 201, None
+            elif self.documents.pop(document_id, None) is not None:
+                status, error = 200, None
+            else:
+                status, error = 404, None
+            item = {"_id": document_id, "status": status}
+            if error:
+                item["error"] = error
+            items.append({operation: item})
+        return SimpleNamespace(body={"errors": any("error" in next(iter(item.values())) for item in items), "items": items})
+
+@pytest.fixture
+def db():
+    # Only the outbox table: delete events never load the indexed records
+    engine = create_engine("sqlite://")
+    SearchOutbox.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+@pytest.fixture
+def search_client(monkeypatch):
+    client = FakeElasticsearch()
+    monkeypatch.setattr(search_index_module, "get_search_client", lambda: client)
+    return client
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+def queue(db, *entries):
+    db.add_all(
+        SearchOutbox(tenant_id=1, entity=entity, entity_id=entity_id, operation=operation)
+        for entity, entity_id, operation in entries
+    )
+    db.commit()
+
+def outbox(db):
+    return db.execute(select(SearchOutbox).order_by(SearchOutbox.id)).scalars().all()
+
+def test_delete_events_remove_documents_and_drain_the_outbox(db, search_client):
+    search_client.documents["revenue-1"] = {"title": "IPTU"}
+    queue(db, ("revenue", 1, "delete"), ("expense", 2, "delete"))
+    
+    removed = SearchIndexService().process_outbox(db)
+    
+    assert removed == 2
+    assert search_client.requests == [("delete", "revenue-1"), ("delete", "expense-2")]
+    assert "revenue-1" not in search_client.documents
+    assert outbox(db) == []
+
+def test_repeated_changes_are_sent_once(db, search_client):
+    queue(db, ("contract", 5, "delete"), ("contract", 5, "delete"), ("contract", 5, "delete"))
+    
+    removed = SearchIndexService().process_outbox(db)
+    
+    assert removed == 3
+    assert search_client.requests == [("delete", "contract-5")]
+    assert outbox(db) == []
+
+def test_empty_outbox_sends_nothing(db, search_client):
+    assert SearchIndexService().process_outbox(db) == 0
+    assert search_client.requests == []
+
+def test_batches_are_bounded(db, search_client):
+    queue(db, *[("bidding", entity_id, "delete") for entity_id in range(5)])
+    
+    assert SearchIndexService().process_outbox(db, batch_size=2) == 2
+    assert len(outbox(db)) == 3
+
+def test_failed_entries_back_off_and_become_dead_letters(db, search_client, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_OUTBOX_MAX_ATTEMPTS", 1)
+    search_client.failing.add("expense-3")
+    queue(db, ("expense", 3, "delete"), ("expense", 4, "delete"))
+    service = SearchIndexService()
+    
+    assert service.process_outbox(db) == 1
+    # next_attempt_at is interval arithmetic, which only Postgres evaluates
+    failed, = db.execute(select(SearchOutbox.entity_id, SearchOutbox.attempts, SearchOutbox.last_error)).all()
+    assert (failed.entity_id, failed.attempts) == (3, 1)
+    assert "internal_error" in failed.last_error
+    
+    # Out of attempts: left alone until requeued
+    assert service.process_outbox(db) == 0
+    assert service.requeue_dead_letters(db) == 1
+    search_client.failing.clear()
+    assert service.process_outbox(db) == 1
+    assert db.execute(select(SearchOutbox.id)).all() == []
+
+def test_writes_queue_nothing_when_elasticsearch_is_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_BACKEND", "postgres")
+    
+    # No session is touched: None would fail on any use
+    BaseService()._queue_search_updates(None, "revenue", 1, [1, 2, 3])
+    BaseService()._queue_search_update(None, "revenue", SimpleNamespace(id=1, tenant_id=1))
+
+class RecordingSession:
+    """Async session that records the statements run and returns no rows"""
+    
+    def __init__(self):
+        self.statements = []
+    
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: [])
+
+@pytest.mark.anyio
+async def test_search_uses_postgres_when_elasticsearch_is_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_BACKEND", "postgres")
+    service = SearchService()
+    monkeypatch.setattr(service, "search_elasticsearch", pytest.fail)
+    db = RecordingSession()
+    
+    result = await service.search_async(db, 1, "iptu")
+    
+    assert len(db.statements) == 1
+    assert "websearch_to_tsquery" in str(db.statements[0])
+    assert result == {"total": 0, "facets": dict.fromkeys(SearchService.SEARCH_TYPES, 0), "results": []}